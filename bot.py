@@ -13,6 +13,7 @@ package ``cogs``, et planifie les tâches d'arrière-plan pour :
 import asyncio
 import os
 import sys
+import time
 import pytz
 import logging
 from datetime import datetime, timedelta, timezone
@@ -21,6 +22,7 @@ import discord
 from discord.ext import commands, tasks
 from discord import app_commands
 from modules import core
+from modules.anilist import CircuitBreaker
 
 # --- MONKEY PATCH HYBRID (avant tout chargement de cogs) ---
 # Objectif : toute commande préfixée devient hybride sans modifier les cogs
@@ -57,6 +59,10 @@ intents.message_content = True
 intents.guilds = True
 intents.members = True
 
+# Planning local AniList : synchronisation incrémentale, fenêtre complète chaque heure
+AIRING_SYNC_MINUTES = int(os.getenv("AIRING_SYNC_MINUTES", "5"))
+AIRING_FULL_SYNC_SECONDS = 3600
+
 class AnimeBot(commands.Bot):
     """Classe principale du bot gérant les fonctionnalités anime.
 
@@ -81,10 +87,31 @@ class AnimeBot(commands.Bot):
 
     async def setup_hook(self) -> None:
         """Configure le bot au démarrage."""
+        await core.anilist.start()
+        # L'état d'AniList est déduit des vraies requêtes (plus de sonde périodique)
+        core.anilist.breaker.add_listener(self._on_anilist_state)
+        # Cache AniList rechargé depuis le disque : pas de rafale au redémarrage
+        loaded = await core.anilist.cache.load()
+        lists = await core.media_lists.load()
+        logger.info(f"Cache AniList : {loaded} réponses et {lists} listes rechargées")
         await self.load_extensions()
         self.start_tasks()
 
 
+    async def close(self) -> None:
+        """Ferme proprement les ressources partagées avant la déconnexion."""
+        try:
+            await core.store.flush_async()
+        except Exception as e:
+            logger.error(f"Erreur écriture des données : {e}")
+        try:
+            await core.anilist.cache.flush()
+            await core.media_lists.flush()
+            await core.anilist.close()
+        except Exception as e:
+            logger.error(f"Erreur fermeture client AniList : {e}")
+        await super().close()
+
     async def on_ready(self):
         """Appelé quand le bot est prêt et connecté."""
         logger.info(f"Bot connecté en tant que {self.user.name} (ID: {self.user.id})")
@@ -112,10 +139,9 @@ class AnimeBot(commands.Bot):
         # self.send_daily_summaries.start()
         # self.check_new_episodes.start()
         self.monthly_reset.start()
-        self.check_anilist_status.start()
-
-        # 🔁 Force un premier check immédiat d'AniList au lancement
-        self.loop.create_task(self.check_anilist_status())
+        self.flush_anilist_cache.start()
+        self.sync_airing_index.start()
+        self.refresh_media_lists.start()
 
 
     @tasks.loop(seconds=3600)
@@ -142,34 +168,48 @@ class AnimeBot(commands.Bot):
         except Exception as e:
             logger.error(f"Erreur dans send_daily_summaries: {str(e)}")
 
-    @tasks.loop(minutes=5)
-    async def check_anilist_status(self) -> None:
-        from modules.core import query_anilist
-
-        test_query = """
-        query {
-          Media(id: 1, type: ANIME) {
-            id
-          }
-        }
-        """
-
-        response = query_anilist(test_query)
-
-        if response:
-            if not self.anilist_online:
-                self.anilist_online = True
-                logger.info("✅ AniList est de nouveau en ligne.")
-                channel = self._get_notification_channel_sync()
-                if channel:
-                    self.loop.create_task(channel.send("✅ AniList est de nouveau en ligne. Le bot fonctionne à nouveau normalement."))
-        else:
-            if self.anilist_online:
-                self.anilist_online = False
-                logger.warning("⚠️ AniList est hors ligne.")
-                channel = self._get_notification_channel_sync()
-                if channel:
-                    self.loop.create_task(channel.send("⚠️ AniList est actuellement indisponible. Certaines commandes peuvent ne pas fonctionner."))
+    @tasks.loop(minutes=1)
+    async def flush_anilist_cache(self) -> None:
+        """Écrit sur disque les réponses AniList et les listes modifiées depuis le dernier passage."""
+        await core.anilist.cache.flush()
+        await core.media_lists.flush()
+
+    @tasks.loop(minutes=AIRING_SYNC_MINUTES)
+    async def sync_airing_index(self) -> None:
+        """Tient à jour le planning local : zone proche à chaque tour, fenêtre complète chaque heure."""
+        index = core.airing_index
+        full = time.time() - index.synced_at >= AIRING_FULL_SYNC_SECONDS
+        try:
+            with core.anilist.background():
+                await index.sync(full=full)
+        except Exception as e:
+            logger.error(f"Erreur synchronisation du planning AniList : {e}")
+
+    @tasks.loop(seconds=core.MEDIA_LIST_TTL)
+    async def refresh_media_lists(self) -> None:
+        """Actualise les listes des comptes liés pour que les commandes lisent un miroir à jour."""
+        usernames = core.link_index.terms()
+        with core.anilist.background():
+            for username in usernames:
+                try:
+                    await core.media_lists.refresh(username)
+                except Exception as e:
+                    logger.error(f"Erreur actualisation de la liste AniList de {username} : {e}")
+
+    def _on_anilist_state(self, state: str) -> None:
+        """Annonce les pannes et retours d'AniList détectés par le disjoncteur du client."""
+        if state == CircuitBreaker.OPEN and self.anilist_online:
+            self.anilist_online = False
+            logger.warning("⚠️ AniList est hors ligne.")
+            channel = self._get_notification_channel_sync()
+            if channel:
+                self.loop.create_task(channel.send("⚠️ AniList est actuellement indisponible. Certaines commandes peuvent ne pas fonctionner."))
+        elif state == CircuitBreaker.CLOSED and not self.anilist_online:
+            self.anilist_online = True
+            logger.info("✅ AniList est de nouveau en ligne.")
+            channel = self._get_notification_channel_sync()
+            if channel:
+                self.loop.create_task(channel.send("✅ AniList est de nouveau en ligne. Le bot fonctionne à nouveau normalement."))
 
     @tasks.loop(minutes=10)
     async def check_new_episodes(self) -> None:
@@ -203,7 +243,7 @@ class AnimeBot(commands.Bot):
             if current_time != alert_time:
                 return
 
-            episodes = core.get_upcoming_episodes(core.ANILIST_USERNAME)
+            episodes = await core.get_upcoming_episodes(core.ANILIST_USERNAME)
             episodes_today = [
                 ep for ep in episodes
                 if datetime.fromtimestamp(ep["airingAt"], tz=core.TIMEZONE).strftime("%A") == current_day
@@ -217,7 +257,7 @@ class AnimeBot(commands.Bot):
     async def _process_new_episodes(self, channel: discord.TextChannel) -> None:
         """Traite et notifie les nouveaux épisodes."""
         try:
-            episodes = core.get_upcoming_episodes(core.ANILIST_USERNAME)
+            episodes = await core.get_upcoming_episodes(core.ANILIST_USERNAME)
             if not episodes:
                 return
 
@@ -264,16 +304,16 @@ class AnimeBot(commands.Bot):
 
     async def _process_monthly_reset(self) -> None:
         """Traite la réinitialisation mensuelle des scores."""
-        scores = core.load_scores()
-        if not scores:
+        top = await core.leaderboards.top("quiz", 1)
+        if not top:
             return
 
-        top_uid = max(scores.items(), key=lambda x: x[1])[0]
+        top_uid = top[0][0]
         winner_data = {
             "uid": top_uid,
             "timestamp": datetime.now().isoformat()
         }
-        core.save_json(core.WINNER_FILE, winner_data)
+        await core.save_json_async(core.WINNER_FILE, winner_data)
         core.save_scores({})
 
         await self._announce_monthly_winner(top_uid)
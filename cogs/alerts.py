@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import os
-import json
 import logging
 from datetime import datetime, timezone
 from typing import Dict, Any, Optional, List
@@ -14,24 +13,11 @@ from modules.image import generate_next_card
 
 LOG = logging.getLogger(__name__)
 
-DATA_PATH = "data/sent_alerts.json"  # persistance anti-doublon
 
 # ----------------- utilitaires -----------------
 def _now_ts() -> int:
     return int(datetime.now(timezone.utc).timestamp())
 
-def _load_sent() -> Dict[str, Dict[str, Any]]:
-    try:
-        with open(DATA_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return {}
-
-def _save_sent(data: Dict[str, Dict[str, Any]]) -> None:
-    os.makedirs(os.path.dirname(DATA_PATH), exist_ok=True)
-    with open(DATA_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
 def _key(anime: Dict[str, Any], tag: str) -> str:
     # clé unique par (titre/épisode/label)
     t = anime.get("title_romaji") or anime.get("title_english") or anime.get("title_native") or "?"
@@ -67,12 +53,12 @@ class Alerts(commands.Cog):
 
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
-        self.sent = _load_sent()
+        # Anti-doublon persistant, expiré par jour (voir modules.dedupe)
+        self.sent = core.sent_alerts
         self.check_airing.start()
 
     def cog_unload(self) -> None:
         self.check_airing.cancel()
-        _save_sent(self.sent)
 
     # ----------- channel via config -----------
     async def _get_alert_channel(self) -> Optional[discord.TextChannel]:
@@ -94,7 +80,7 @@ class Alerts(commands.Cog):
     # ----------- sources d’épisodes -----------
     async def _my_next(self) -> Optional[Dict[str, Any]]:
         try:
-            return core.get_my_next_airing_one()  # basé sur ANILIST_USERNAME
+            return await core.get_my_next_airing_one()  # basé sur ANILIST_USERNAME
         except Exception as e:
             LOG.exception("get_my_next_airing_one failed: %s", e)
             return None
@@ -102,13 +88,14 @@ class Alerts(commands.Cog):
     async def _users_next(self) -> List[Dict[str, Any]]:
         """Optionnel : alerter aussi les comptes AniList liés."""
         out: List[Dict[str, Any]] = []
+        # Chaque compte AniList une seule fois, même lié à plusieurs profils Discord
         try:
-            links = core.load_links()  # {discord_id_str: username}
+            usernames = core.link_index.terms()
         except Exception:
-            links = {}
-        for _uid, username in (links or {}).items():
+            usernames = []
+        for username in usernames:
             try:
-                item = core.get_user_next_airing_one(username)
+                item = await core.get_user_next_airing_one(username)
                 if item:
                     out.append(item)
             except Exception as e:
@@ -122,7 +109,7 @@ class Alerts(commands.Cog):
         header = texte au-dessus de l’image ("⏰ Alerte 30 min" / "✅ C’est l’heure !")
         """
         k = _key(anime, label)
-        if self.sent.get(k):
+        if self.sent.seen(k):
             return
 
         # on enrichit le dict pour la carte si besoin
@@ -144,8 +131,7 @@ class Alerts(commands.Cog):
                 content=header,
                 file=discord.File(img_path, filename=os.path.basename(img_path))
             )
-            self.sent[k] = {"at": _now_ts()}
-            _save_sent(self.sent)
+            await self.sent.add(k)
         except Exception as e:
             LOG.exception("Image alert failed, fallback texte: %s", e)
             # fallback texte si la génération échoue
@@ -153,42 +139,38 @@ class Alerts(commands.Cog):
             ep = anime.get("episode") or "?"
             when = _fmt_when(anime)
             await ch.send(f"{header}\n**{title}** — Épisode **{ep}** • {when}")
-            self.sent[k] = {"at": _now_ts()}
-            _save_sent(self.sent)
+            await self.sent.add(k)
 
     # ----------- boucle: -30 min + live (0 min), tous en image -----------
     @tasks.loop(seconds=60)
     async def check_airing(self):
-        ch = await self._get_alert_channel()
-        if not ch:
-            return
-
-        # purge des entrées > 14 jours
-        now = _now_ts()
-        for k, v in list(self.sent.items()):
-            ts = int(v.get("at", 0))
-            if now - ts > 14 * 24 * 3600:
-                self.sent.pop(k, None)
-
-        # 1) Planning du bot (global)
-        mine = await self._my_next()
-        if mine:
-            if _should_alert(mine, 30, slack=120):
-                await self._send_card_alert(ch, mine, "30img", "⏰ **Alerte 30 min**")
-            if _should_alert(mine, 0, slack=120):
-                await self._send_card_alert(ch, mine, "0img", "✅ **C’est l’heure !**")
-            elif _late_airing_should_fire(mine, grace=600):
-                await self._send_card_alert(ch, mine, "0img", "✅ **C’est l’heure !** (retard)")
-
-        # 2) (Optionnel) Utilisateurs liés
-        users = await self._users_next()
-        for item in users:
-            if _should_alert(item, 30, slack=120):
-                await self._send_card_alert(ch, item, "30img", "⏰ **Alerte 30 min**")
-            if _should_alert(item, 0, slack=120):
-                await self._send_card_alert(ch, item, "0img", "✅ **C’est l’heure !**")
-            elif _late_airing_should_fire(item, grace=600):
-                await self._send_card_alert(ch, item, "0img", "✅ **C’est l’heure !** (retard)")
+        with core.anilist.background():
+            ch = await self._get_alert_channel()
+            if not ch:
+                return
+
+            # oubli des jours expirés (un seau entier à la fois)
+            await self.sent.refresh()
+
+            # 1) Planning du bot (global)
+            mine = await self._my_next()
+            if mine:
+                if _should_alert(mine, 30, slack=120):
+                    await self._send_card_alert(ch, mine, "30img", "⏰ **Alerte 30 min**")
+                if _should_alert(mine, 0, slack=120):
+                    await self._send_card_alert(ch, mine, "0img", "✅ **C’est l’heure !**")
+                elif _late_airing_should_fire(mine, grace=600):
+                    await self._send_card_alert(ch, mine, "0img", "✅ **C’est l’heure !** (retard)")
+
+            # 2) (Optionnel) Utilisateurs liés
+            users = await self._users_next()
+            for item in users:
+                if _should_alert(item, 30, slack=120):
+                    await self._send_card_alert(ch, item, "30img", "⏰ **Alerte 30 min**")
+                if _should_alert(item, 0, slack=120):
+                    await self._send_card_alert(ch, item, "0img", "✅ **C’est l’heure !**")
+                elif _late_airing_should_fire(item, grace=600):
+                    await self._send_card_alert(ch, item, "0img", "✅ **C’est l’heure !** (retard)")
 
 
     @check_airing.before_loop
@@ -9,8 +9,6 @@ via !reminder on, à l'heure définie par !setalert HH:MM.
 
 from __future__ import annotations
 
-import os
-import json
 import logging
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
@@ -24,19 +22,6 @@ LOG = logging.getLogger(__name__)
 
 SENT_PATH = "data/daily_sent.json"  # {user_id: "YYYY-MM-DD"} dernière date envoyée
 
-# ---------- persistance ----------
-def _load_sent() -> Dict[str, str]:
-    try:
-        with open(SENT_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return {}
-
-def _save_sent(data: Dict[str, str]) -> None:
-    os.makedirs(os.path.dirname(SENT_PATH), exist_ok=True)
-    with open(SENT_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
 # ---------- util ----------
 def _today_str_tz() -> str:
     # date du jour en Europe/Paris
@@ -57,108 +42,109 @@ class DailyDigest(commands.Cog):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.sent = _load_sent()
+        # Servi par le store : écrit hors de la boucle avec store.save
+        self.sent: Dict[str, str] = core.store.get(SENT_PATH, {})
         self.loop_daily.start()
 
     def cog_unload(self):
         self.loop_daily.cancel()
-        _save_sent(self.sent)
 
     # ---------- cœur : boucle minute ----------
     @tasks.loop(seconds=60)
     async def loop_daily(self):
-        try:
-            user_settings = core.load_user_settings() or {}   # {uid: {"reminder": bool}}
-            prefs = core.load_preferences() or {}            # {uid: {"alert_time": "HH:MM"}}
-            links = core.load_links() or {}                  # {uid: anilist_username}
-        except Exception as e:
-            LOG.exception("Lecture prefs/settings/links échouée: %s", e)
-            return
-
-        now_tz = datetime.now(tz=core.TIMEZONE)
-        current_hhmm = now_tz.strftime("%H:%M")
-        today_str = now_tz.strftime("%Y-%m-%d")
-
-        # On parcourt tous les utilisateurs ayant des prefs
-        uids: List[str] = sorted(set(user_settings.keys()) | set(prefs.keys()))
-        if not uids:
-            return
-
-        for uid in uids:
+        with core.anilist.background():
             try:
-                st = user_settings.get(uid, {})
-                if st.get("reminder", True) is False:
-                    continue  # user a désactivé
-
-                alert_time = (prefs.get(uid, {}) or {}).get("alert_time")
-                if not alert_time:
-                    continue  # pas d'heure définie pour ce user
-
-                # On déclenche uniquement quand l'heure correspond exactement (loop/minute)
-                if alert_time != current_hhmm:
-                    continue
-
-                # déjà envoyé aujourd'hui ?
-                if self.sent.get(uid) == today_str:
-                    continue
-
-                # Source des épisodes : AniList lié sinon global
-                username = links.get(uid) or core.ANILIST_USERNAME
-                if not username:
-                    # Rien à envoyer si on ne sait pas quoi afficher
-                    continue
-
-                # Récupère tous les prochains et filtre ceux du jour
-                episodes = core.get_upcoming_episodes(username) or []
-                today_eps = [ep for ep in episodes if _is_today_ts(ep.get("airingAt", 0))]
-                if not today_eps:
-                    # Envoyer quand même un MP "rien aujourd'hui" ? On peut, c'est utile.
+                user_settings = core.load_user_settings() or {}   # {uid: {"reminder": bool}}
+                prefs = core.load_preferences() or {}            # {uid: {"alert_time": "HH:MM"}}
+                links = core.load_links() or {}                  # {uid: anilist_username}
+            except Exception as e:
+                LOG.exception("Lecture prefs/settings/links échouée: %s", e)
+                return
+
+            now_tz = datetime.now(tz=core.TIMEZONE)
+            current_hhmm = now_tz.strftime("%H:%M")
+            today_str = now_tz.strftime("%Y-%m-%d")
+
+            # On parcourt tous les utilisateurs ayant des prefs
+            uids: List[str] = sorted(set(user_settings.keys()) | set(prefs.keys()))
+            if not uids:
+                return
+
+            for uid in uids:
+                try:
+                    st = user_settings.get(uid, {})
+                    if st.get("reminder", True) is False:
+                        continue  # user a désactivé
+
+                    alert_time = (prefs.get(uid, {}) or {}).get("alert_time")
+                    if not alert_time:
+                        continue  # pas d'heure définie pour ce user
+
+                    # On déclenche uniquement quand l'heure correspond exactement (loop/minute)
+                    if alert_time != current_hhmm:
+                        continue
+
+                    # déjà envoyé aujourd'hui ?
+                    if self.sent.get(uid) == today_str:
+                        continue
+
+                    # Source des épisodes : AniList lié sinon global
+                    username = links.get(uid) or core.ANILIST_USERNAME
+                    if not username:
+                        # Rien à envoyer si on ne sait pas quoi afficher
+                        continue
+
+                    # Récupère tous les prochains et filtre ceux du jour
+                    episodes = await core.get_upcoming_episodes(username) or []
+                    today_eps = [ep for ep in episodes if _is_today_ts(ep.get("airingAt", 0))]
+                    if not today_eps:
+                        # Envoyer quand même un MP "rien aujourd'hui" ? On peut, c'est utile.
+                        user = self.bot.get_user(int(uid)) or await self.bot.fetch_user(int(uid))
+                        if user:
+                            try:
+                                await user.send("📭 **Récap du jour** : Rien de prévu aujourd'hui.")
+                                self.sent[uid] = today_str
+                                await core.store.save(SENT_PATH, keys=[uid])
+                            except discord.Forbidden:
+                                LOG.warning("MP refusé par %s", uid)
+                        continue
+
+                    # Trie par heure
+                    today_eps.sort(key=lambda e: e.get("airingAt", 0))
+
+                    # Construire l'embed
+                    embed = discord.Embed(
+                        title="🗓️ Récap des sorties d'aujourd'hui",
+                        description=f"Fuseau : {now_tz.tzname()}",
+                        color=discord.Color.blurple()
+                    )
+                    # on limite raisonnablement la taille pour éviter un embed trop long
+                    for ep in today_eps[:25]:
+                        title = ep.get("title") or ep.get("title_romaji") or ep.get("title_english") or "Titre inconnu"
+                        if isinstance(title, dict):
+                            # cas où c'est un dict AniList {romaji, english, native}
+                            title = title.get("romaji") or title.get("english") or title.get("native") or "Titre inconnu"
+                        epnum = ep.get("episode", "?")
+                        hour  = _format_time(ep.get("airingAt", 0))
+                        emoji = core.genre_emoji(ep.get("genres", []))
+                        embed.add_field(
+                            name=f"{emoji} {title} — Épisode {epnum}",
+                            value=f"⏰ {hour}",
+                            inline=False
+                        )
+
+                    # Envoi en MP
                     user = self.bot.get_user(int(uid)) or await self.bot.fetch_user(int(uid))
                     if user:
                         try:
-                            await user.send("📭 **Récap du jour** : Rien de prévu aujourd'hui.")
+                            await user.send(embed=embed)
                             self.sent[uid] = today_str
-                            _save_sent(self.sent)
+                            await core.store.save(SENT_PATH, keys=[uid])
                         except discord.Forbidden:
                             LOG.warning("MP refusé par %s", uid)
-                    continue
-
-                # Trie par heure
-                today_eps.sort(key=lambda e: e.get("airingAt", 0))
-
-                # Construire l'embed
-                embed = discord.Embed(
-                    title="🗓️ Récap des sorties d'aujourd'hui",
-                    description=f"Fuseau : {now_tz.tzname()}",
-                    color=discord.Color.blurple()
-                )
-                # on limite raisonnablement la taille pour éviter un embed trop long
-                for ep in today_eps[:25]:
-                    title = ep.get("title") or ep.get("title_romaji") or ep.get("title_english") or "Titre inconnu"
-                    if isinstance(title, dict):
-                        # cas où c'est un dict AniList {romaji, english, native}
-                        title = title.get("romaji") or title.get("english") or title.get("native") or "Titre inconnu"
-                    epnum = ep.get("episode", "?")
-                    hour  = _format_time(ep.get("airingAt", 0))
-                    emoji = core.genre_emoji(ep.get("genres", []))
-                    embed.add_field(
-                        name=f"{emoji} {title} — Épisode {epnum}",
-                        value=f"⏰ {hour}",
-                        inline=False
-                    )
 
-                # Envoi en MP
-                user = self.bot.get_user(int(uid)) or await self.bot.fetch_user(int(uid))
-                if user:
-                    try:
-                        await user.send(embed=embed)
-                        self.sent[uid] = today_str
-                        _save_sent(self.sent)
-                    except discord.Forbidden:
-                        LOG.warning("MP refusé par %s", uid)
-
-            except Exception as e:
-                LOG.exception("Digest pour %s échoué: %s", uid, e)
+                except Exception as e:
+                    LOG.exception("Digest pour %s échoué: %s", uid, e)
 
     @loop_daily.before_loop
     async def before_loop(self):
@@ -175,7 +161,7 @@ class DailyDigest(commands.Cog):
         if not username:
             return await ctx.send("Aucun AniList configuré (link manquant et ANILIST_USERNAME vide).")
 
-        episodes = core.get_upcoming_episodes(username) or []
+        episodes = await core.get_upcoming_episodes(username) or []
         today_eps = [ep for ep in episodes if _is_today_ts(ep.get("airingAt", 0))]
 
         embed = discord.Embed(
@@ -120,7 +120,7 @@ class Discovery(commands.Cog):
         for _ in range(8):  # plusieurs tentatives
             page = random.randint(1, 500)
             sort_key, _ = random.choice(SORTS)
-            data = await asyncio.to_thread(core.query_anilist, QUERY, {"page": page, "sort": [sort_key]})
+            data = await core.query_anilist(QUERY, {"page": page, "sort": [sort_key]})
             media_list = data.get("data", {}).get("Page", {}).get("media", []) or []
             if not media_list:
                 continue
@@ -241,7 +241,7 @@ class DiscoverView(discord.ui.View):
 
             lst.append(title)
             tracker[uid] = lst
-            core.save_tracker(tracker)
+            core.save_tracker(tracker, uid)
             await interaction.response.send_message(f"✅ **{title}** ajouté à ton suivi.", ephemeral=True)
         except Exception:
             await interaction.response.send_message("❌ Impossible d’ajouter au suivi.", ephemeral=True)
@@ -7,17 +7,17 @@ Missions progress is tracked automatically when users run target commands.
 """
 
 from __future__ import annotations
-import os, json, random
+import random
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
 import discord
 from discord.ext import commands
 
 from modules import core
 
-STREAK_PATH   = "data/streaks.json"
-MISSIONS_PATH = "data/missions.json"
+STREAK_PATH   = core.FileConfig.STREAKS
+MISSIONS_PATH = core.FileConfig.MISSIONS
 
 # ----------------- tiny storage helpers -----------------
 def _bar(current: int, goal: int, width: int = 20) -> str:
@@ -25,18 +25,6 @@ def _bar(current: int, goal: int, width: int = 20) -> str:
     fill = max(0, min(width, int(current / goal * width)))
     return "█" * fill + "░" * (width - fill)
 
-def _load_json(path: str, default):
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return default
-
-def _save_json(path: str, data) -> None:
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
 def _today_str() -> str:
     return datetime.now(tz=core.TIMEZONE).strftime("%Y-%m-%d")
 
@@ -74,8 +62,9 @@ DEFAULT_GOAL      = 1
 class Engagement(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.streaks: Dict[str, Dict[str, Any]] = _load_json(STREAK_PATH, {})
-        self.missions: Dict[str, Dict[str, Any]] = _load_json(MISSIONS_PATH, {})
+        # Séries (STREAK_PATH, lues aussi par les profils) et missions servies par
+        # le store partagé : écriture différée, uniquement quand une valeur change
+        self.missions: Dict[str, Dict[str, Any]] = core.store.get(MISSIONS_PATH, {})
 
     # ------------- DAILY CHECK-IN / STREAK -------------
     @commands.command(name="checkin", aliases=["daily", "login"])
@@ -84,23 +73,28 @@ class Engagement(commands.Cog):
         uid = str(ctx.author.id)
         today = _today_str()
         yesterday = _yesterday_str()
-        data = self.streaks.get(uid, {"last": None, "streak": 0, "best": 0})
-
-        if data.get("last") == today:
+        data: Dict[str, Any] = {}
+
+        # Lecture, calcul et écriture d'un bloc (une autre instance peut recevoir le même check-in)
+        def check_in(streaks: Dict[str, Dict[str, Any]]) -> None:
+            entry = dict(streaks.get(uid, {"last": None, "streak": 0, "best": 0}))
+            if entry.get("last") != today:
+                # calcule la streak
+                if entry.get("last") == yesterday:
+                    entry["streak"] = int(entry.get("streak", 0)) + 1
+                else:
+                    entry["streak"] = 1
+                # record perso
+                entry["best"] = max(int(entry.get("best", 0)), entry["streak"])
+                entry["last"] = today
+                streaks[uid] = entry
+                data["new"] = True
+            data.update(entry)
+
+        core.store.update(STREAK_PATH, [uid], check_in)
+        if not data.pop("new", False):
             return await ctx.send("✅ Tu as **déjà** fait ton check-in aujourd’hui.")
 
-        # calcule la streak
-        if data.get("last") == yesterday:
-            data["streak"] = int(data.get("streak", 0)) + 1
-        else:
-            data["streak"] = 1
-
-        # record perso
-        data["best"] = max(int(data.get("best", 0)), data["streak"])
-        data["last"] = today
-        self.streaks[uid] = data
-        _save_json(STREAK_PATH, self.streaks)
-
         # Barème clair (rapide au début, stable ensuite)
         s = data["streak"]
         if s == 1:
@@ -136,7 +130,7 @@ class Engagement(commands.Cog):
     async def streak(self, ctx: commands.Context):
         """Affiche ta série quotidienne et ton record."""
         uid = str(ctx.author.id)
-        data = self.streaks.get(uid, {"streak": 0, "best": 0})
+        data = core.store.get(STREAK_PATH, {}).get(uid, {"streak": 0, "best": 0})
         s, b = int(data.get("streak", 0)), int(data.get("best", 0))
         if s <= 0:
             return await ctx.send("📭 Aucune série en cours. Utilise `!daily` pour commencer.")
@@ -169,31 +163,78 @@ class Engagement(commands.Cog):
             "rerolled": False,
             "completed": False,
         }
-        self.missions[uid] = m
-        _save_json(MISSIONS_PATH, self.missions)
+
+        def create(missions: Dict[str, Dict[str, Any]]) -> None:
+            missions[uid] = m
+
+        # Écriture différée (ou annulée avec la transaction en cours)
+        core.store.update(MISSIONS_PATH, [uid], create)
         return m
 
-    async def _try_complete_mission(self, ctx: commands.Context):
-        """Appelée après chaque commande réussie (listener ci-dessous)."""
-        uid = str(ctx.author.id)
+    def stage_progress(self, uid: Any, key: str) -> int:
+        """Fait avancer la mission du jour si ``key`` en fait partie.
+
+        Synchrone : peut être appelée dans une transaction du store qui
+        couvre aussi les gains d'XP (``core.XP_FILES``), pour valider la
+        progression et la récompense ensemble.
+
+        Args:
+            uid: Joueur
+            key: Commande (``qualified_name``) ou événement ``_custom:...``
+
+        Returns:
+            XP de récompense si la mission vient d'être accomplie, sinon 0
+        """
+        uid = str(uid)
         m = self._get_or_create_today_mission(uid)
-        if m.get("completed"):
-            return
+        if m.get("completed") or key not in set(m.get("commands", [])):
+            return 0
+        reward = 0
+
+        def progress(missions: Dict[str, Dict[str, Any]]) -> None:
+            nonlocal reward
+            entry = missions[uid]
+            entry["progress"] = int(entry.get("progress", 0)) + 1
+            if entry["progress"] >= int(entry.get("goal", DEFAULT_GOAL)):
+                entry["completed"] = True
+                reward = int(entry.get("reward_xp", DEFAULT_REWARD_XP))
+
+        core.store.update(MISSIONS_PATH, [uid], progress)
+        return reward
+
+    def _unaffected(self, uid: str, key: str) -> bool:
+        """``key`` ne change rien à la mission du jour déjà connue (aucune écriture à faire)."""
+        m = self.missions.get(uid)
+        if not m or m.get("date") != _today_str():
+            return False
+        return bool(m.get("completed")) or key not in m.get("commands", [])
+
+    def _progress_with_reward(self, uid: Any, key: str) -> Tuple[int, List[core.RankChange]]:
+        """Progression et XP de récompense validées d'un bloc."""
+        # Chaque "gg" et chaque réaction passent ici : la plupart ne font rien avancer
+        if self._unaffected(str(uid), key):
+            return 0, []
+        with core.store.transaction(MISSIONS_PATH, *core.XP_FILES):
+            xp = self.stage_progress(uid, key)
+            changes = core.apply_xp_events([core.XpEvent(int(uid), xp)]) if xp else []
+        return xp, changes
+
+    async def notify_completed(self, uid: Any, xp: int) -> None:
+        """MP « mission accomplie » (ignoré si le joueur les refuse)."""
+        user = self.bot.get_user(int(uid)) or await self.bot.fetch_user(int(uid))
+        if user:
+            try:
+                await user.send(f"🎯 **Mission accomplie !** +{xp} XP")
+            except discord.Forbidden:
+                pass
 
+    async def _try_complete_mission(self, ctx: commands.Context):
+        """Appelée après chaque commande réussie (listener ci-dessous)."""
         cmd = ctx.command.qualified_name if ctx.command else ""
-        # si la commande matche la mission du jour, on incrémente
-        if cmd in set(m.get("commands", [])):
-            m["progress"] = int(m.get("progress", 0)) + 1
-            # check completion
-            if m["progress"] >= int(m.get("goal", DEFAULT_GOAL)):
-                m["completed"] = True
-                # récompense
-                xp = int(m.get("reward_xp", DEFAULT_REWARD_XP))
-                await core.add_xp(self.bot, ctx.channel, ctx.author.id, xp)
-                await ctx.send(f"🎯 **Mission accomplie !** +{xp} XP")
-
-            self.missions[uid] = m
-            _save_json(MISSIONS_PATH, self.missions)
+        xp, changes = self._progress_with_reward(ctx.author.id, cmd)
+        if xp:
+            await core.announce_rank_changes(ctx.channel, changes)
+            await ctx.send(f"🎯 **Mission accomplie !** +{xp} XP")
 
     @commands.command(name="mission")
     async def mission(self, ctx: commands.Context, action: Optional[str] = None):
@@ -211,8 +252,7 @@ class Engagement(commands.Cog):
                 "goal": DEFAULT_GOAL, "progress": 0,
                 "reward_xp": DEFAULT_REWARD_XP, "rerolled": True, "completed": False
             })
-            self.missions[uid] = m
-            _save_json(MISSIONS_PATH, self.missions)
+            core.store.mark_dirty(MISSIONS_PATH, uid)
             await ctx.send("🔁 Mission rerollée !")
 
         # Affichage
@@ -276,27 +316,10 @@ class Engagement(commands.Cog):
 
     async def _custom_progress(self, uid: int, key: str):
         """Incrémente la mission si c’est une mission custom."""
-        uid = str(uid)
-        m = self._get_or_create_today_mission(uid)
-        if m.get("completed") or key not in set(m.get("commands", [])):
-            return
-
-        m["progress"] = int(m.get("progress", 0)) + 1
-        if m["progress"] >= int(m.get("goal", DEFAULT_GOAL)):
-            m["completed"] = True
-            xp = int(m.get("reward_xp", DEFAULT_REWARD_XP))
-            # MP optionnel
-            user = self.bot.get_user(int(uid)) or await self.bot.fetch_user(int(uid))
-            if user:
-                try:
-                    await user.send(f"🎯 **Mission accomplie !** +{xp} XP")
-                except discord.Forbidden:
-                    pass
-            # Ajout XP (uid en int, channel=None accepté)
-            await core.add_xp(self.bot, None, int(uid), xp)
-
-        self.missions[uid] = m
-        _save_json(MISSIONS_PATH, self.missions)
+        xp, _ = self._progress_with_reward(uid, key)
+        if xp:
+            # MP optionnel (pas de salon pour annoncer un nouveau rang)
+            await self.notify_completed(uid, xp)
 
 
 async def setup(bot: commands.Bot):
@@ -71,7 +71,7 @@ class Episodes(commands.Cog):
                 limit = 100
             else:
                 filter_genre = arg.capitalize()
-        episodes = core.get_upcoming_episodes(core.ANILIST_USERNAME)
+        episodes = await core.get_upcoming_episodes(core.ANILIST_USERNAME)
         if not episodes:
             await ctx.send("Aucun épisode à venir.")
             return
@@ -99,7 +99,7 @@ class Episodes(commands.Cog):
     @commands.command(name="next")
     async def next_cmd(self, ctx):
         try:
-            item = core.get_my_next_airing_one()
+            item = await core.get_my_next_airing_one()
         except Exception as e:
             await ctx.send(f"⚠️ Impossible de récupérer le prochain épisode.\n`{type(e).__name__}: {e}`")
             return
@@ -127,7 +127,7 @@ class Episodes(commands.Cog):
             await ctx.send("⚠️ Tu n'as pas lié ton AniList. Utilise `!linkanilist <pseudo>`.")
             return
 
-        item = core.get_user_next_airing_one(username)
+        item = await core.get_user_next_airing_one(username)
         if not item:
             await ctx.send("⚠️ Aucun épisode à venir trouvé pour ton AniList.")
             return
@@ -147,7 +147,7 @@ class Episodes(commands.Cog):
     @commands.command(name="planning")
     async def planning(self, ctx: commands.Context) -> None:
         """Affiche le planning hebdomadaire global des épisodes (jours triés)."""
-        episodes = core.get_upcoming_episodes(core.ANILIST_USERNAME)
+        episodes = await core.get_upcoming_episodes(core.ANILIST_USERNAME)
         if not episodes:
             await ctx.send("📭 Aucun épisode prévu cette semaine.")
             return
@@ -209,7 +209,7 @@ class Episodes(commands.Cog):
             return
 
         # Récupérer les épisodes de l'utilisateur
-        episodes = core.get_upcoming_episodes(links[user_id])
+        episodes = await core.get_upcoming_episodes(links[user_id])
 
         if not episodes:
             await ctx.send("📭 Aucun épisode prévu cette semaine dans ta liste.")
@@ -53,7 +53,7 @@ class Link(commands.Cog):
         """
         data = core.load_links()
         data[str(ctx.author.id)] = pseudo
-        core.save_links(data)
+        core.save_links(data, ctx.author.id)
         await ctx.send(f"✅ Ton compte AniList **{pseudo}** a été lié à ton profil Discord.")
 
     @commands.command(name="unlink")
@@ -70,8 +70,11 @@ class Link(commands.Cog):
         data = core.load_links()
         uid = str(ctx.author.id)
         if uid in data:
-            del data[uid]
-            core.save_links(data)
+            pseudo = str(data.pop(uid)).strip().lower()
+            core.save_links(data, uid)
+            # Le miroir de liste ne sert plus si plus personne n'utilise ce compte
+            if pseudo not in core.link_index:
+                core.media_lists.forget(pseudo)
             await ctx.send("🔗 Ton lien AniList a bien été supprimé.")
         else:
             await ctx.send("❌ Aucun compte AniList n'était lié à ce profil.")
@@ -122,7 +125,7 @@ class Link(commands.Cog):
         '''
         stats: dict[str, dict] = {}
         for u in [user1, user2]:
-            res = core.query_anilist(query, {"name": u})
+            res = await core.query_anilist(query, {"name": u})
             try:
                 a = res["data"]["User"]["statistics"]["anime"]
                 fav = sorted(a["genres"], key=lambda g: g["count"], reverse=True)[0]["genre"] if a["genres"] else "N/A"
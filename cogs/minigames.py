@@ -59,8 +59,7 @@ class HigherLowerView(View):
             await interaction.response.send_message(
                 f"✅ Bravo ! **{self.choice1['title']['romaji']}** ({pop1}) vs **{self.choice2['title']['romaji']}** ({pop2})\nTu gagnes **5 XP** !"
             )
-            await core.add_xp(interaction.client, interaction.channel, interaction.user.id, 5)
-            core.add_mini_score(interaction.user.id, "higherlower", 1)  # <-- plus de self.ctx
+            await core.award_xp(interaction.channel, [core.XpEvent(interaction.user.id, 5, "higherlower")])
         else:
             await interaction.response.send_message(
                 f"❌ Mauvais choix. **{self.choice1['title']['romaji']}** : {pop1}, **{self.choice2['title']['romaji']}** : {pop2}."
@@ -87,7 +86,7 @@ class MiniGames(commands.Cog):
           }
         }
         '''
-        data = core.query_anilist(query, {"page": page})
+        data = await core.query_anilist(query, {"page": page})
         if not data or not data.get("data"):
             await ctx.send("❌ Impossible de récupérer des données pour le mini‑jeu.")
             return
@@ -168,7 +167,7 @@ class MiniGames(commands.Cog):
           }
         }
         '''
-        data = core.query_anilist(query, {"page": page})
+        data = await core.query_anilist(query, {"page": page})
         try:
             anime = data["data"]["Page"]["media"][0]
             title = anime["title"]["romaji"]
@@ -198,8 +197,7 @@ class MiniGames(commands.Cog):
                 guessed_year = int(msg.content.strip())
                 if abs(guessed_year - year) <= 1:
                     await ctx.send(f"✅ Bravo ! L'année était bien **{year}** (tu as répondu {guessed_year}). Tu gagnes 8 XP !")
-                    await core.add_xp(self.bot, ctx.channel, ctx.author.id, 8)
-                    core.add_mini_score(ctx.author.id, "guessyear", 1)
+                    await core.award_xp(ctx.channel, [core.XpEvent(ctx.author.id, 8, "guessyear")])
                 else:
                     await ctx.send(f"❌ Raté. L'année était **{year}** (tu as répondu {guessed_year}).")
             except ValueError:
@@ -226,7 +224,7 @@ class MiniGames(commands.Cog):
               }
             }
             '''
-            data = core.query_anilist(query, {"page": page})
+            data = await core.query_anilist(query, {"page": page})
             try:
                 candidate = data["data"]["Page"]["media"][0]
                 if candidate.get("episodes") and isinstance(candidate.get("episodes"), int):
@@ -264,8 +262,7 @@ class MiniGames(commands.Cog):
                 tolerance = max(int(episodes * 0.1), 5)
                 if abs(guessed - episodes) <= tolerance:
                     await ctx.send(f"✅ Bravo ! **{title}** compte {episodes} épisodes (tu as répondu {guessed}). Tu gagnes 8 XP !")
-                    await core.add_xp(self.bot, ctx.channel, ctx.author.id, 8)
-                    core.add_mini_score(ctx.author.id, "guessepisodes", 1)
+                    await core.award_xp(ctx.channel, [core.XpEvent(ctx.author.id, 8, "guessepisodes")])
                 else:
                     await ctx.send(f"❌ Raté. **{title}** compte {episodes} épisodes (tu as répondu {guessed}).")
             except ValueError:
@@ -291,7 +288,7 @@ class MiniGames(commands.Cog):
               }
             }
             '''
-            data = core.query_anilist(query, {"page": page})
+            data = await core.query_anilist(query, {"page": page})
             try:
                 candidate = data["data"]["Page"]["media"][0]
                 if candidate.get("genres"):
@@ -327,8 +324,7 @@ class MiniGames(commands.Cog):
             guess = msg.content.strip().lower()
             if guess in [g.lower() for g in genres]:
                 await ctx.send(f"✅ Exact ! Les genres de **{title}** incluent {', '.join(anime['genres'])}. Tu gagnes 5 XP !")
-                await core.add_xp(self.bot, ctx.channel, ctx.author.id, 5)
-                core.add_mini_score(ctx.author.id, "guessgenre", 1)
+                await core.award_xp(ctx.channel, [core.XpEvent(ctx.author.id, 5, "guessgenre")])
             else:
                 await ctx.send(f"❌ Mauvaise réponse. Les genres de **{title}** étaient : {', '.join(anime['genres'])}.")
         except asyncio.TimeoutError:
@@ -353,7 +349,7 @@ class MiniGames(commands.Cog):
           }
         }
         '''
-        data = core.query_anilist(query, {"page": page})
+        data = await core.query_anilist(query, {"page": page})
         if not data or "data" not in data:
             await ctx.send("❌ Impossible de récupérer les personnages.")
             return
@@ -386,8 +382,7 @@ class MiniGames(commands.Cog):
 
             if index == correct_index:
                 await interaction.response.edit_message(content="✅ Bien joué ! Tu gagnes 5 XP !", view=None)
-                await core.add_xp(self.bot, ctx.channel, ctx.author.id, 5)
-                core.add_mini_score(ctx.author.id, "guesscharacter", 1)
+                await core.award_xp(ctx.channel, [core.XpEvent(ctx.author.id, 5, "guesscharacter")])
             else:
                 await interaction.response.edit_message(content=f"❌ Mauvaise réponse ! C'était : **{correct_name}**", view=None)
 
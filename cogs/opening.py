@@ -175,7 +175,7 @@ class Openings(commands.Cog):
         }
         '''
         try:
-            data = core.query_anilist(query)
+            data = await core.query_anilist(query)
             pool = [m["title"]["romaji"] for m in data["data"]["Page"]["media"]]
         except Exception:
             pool = []
@@ -240,30 +240,21 @@ class Openings(commands.Cog):
         others_xp = 3
         award_lines = []
 
-        # Podium
+        # Podium puis autres bonnes réponses (hors top 3) : une seule écriture pour la manche
+        events = []
         for rank, user in enumerate(view.winners_order, start=1):
             xp = podium_xp[rank - 1]
             award_lines.append(f"**#{rank}** {user.mention} — +{xp} XP")
-            try:
-                await core.add_xp(self.bot, ctx.channel, user.id, xp)
-            except Exception:
-                pass
-            try:
-                core.add_mini_score(user.id, "guessop", 1)
-            except Exception:
-                pass
+            events.append(core.XpEvent(user.id, xp, "guessop"))
 
-        # Autres bonnes réponses (hors top 3)
         for user in view.others_correct:
             award_lines.append(f"• {user.mention} — +{others_xp} XP")
-            try:
-                await core.add_xp(self.bot, ctx.channel, user.id, others_xp)
-            except Exception:
-                pass
-            try:
-                core.add_mini_score(user.id, "guessop", 1)
-            except Exception:
-                pass
+            events.append(core.XpEvent(user.id, others_xp, "guessop"))
+
+        try:
+            await core.award_xp(ctx.channel, events)
+        except Exception:
+            pass
 
         res = discord.Embed(
             title="🏁 Résultats — Guess OP",
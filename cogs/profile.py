@@ -14,20 +14,10 @@ from modules.badges import BADGES, evaluate_tier
 # ---------- HELPERS BADGES ----------
 def _get_user_counts(user_id: int) -> dict:
     """
-    Agrège les compteurs utilisés par les badges :
-    - mini-jeux: via core.get_mini_scores(user_id)
-    - streak:    via data/streaks.json (si présent)
+    Agrège les compteurs utilisés par les badges (mini-jeux + streak_days),
+    depuis le profil du joueur (core.get_profile).
     """
-    counts = core.get_mini_scores(user_id) or {}
-    # ajoute streak_days
-    try:
-        with open("data/streaks.json", "r", encoding="utf-8") as f:
-            streaks = json.load(f)
-        entry = streaks.get(str(user_id), {})
-        counts["streak_days"] = int(entry.get("streak", 0))
-    except Exception:
-        counts["streak_days"] = 0
-    return counts
+    return core.get_profile(user_id).badge_counts()
 
 
 class BadgesView(discord.ui.View):
@@ -78,15 +68,13 @@ class Profile(commands.Cog):
     @commands.command(name="mycard")
     async def mycard(self, ctx: commands.Context) -> None:
         """Affiche une carte de membre stylée avec les statistiques globales + badges + streak."""
-        user_id_str = str(ctx.author.id)
         user_id = ctx.author.id
+        profile = core.get_profile(user_id)
     
         # Progression
-        levels = core.load_levels()
-        user_data = levels.get(user_id_str, {"xp": 0, "level": 0})
-        xp = user_data.get("xp", 0)
-        level = user_data.get("level", 0)
-        next_xp = core.xp_for_next_level(level)
+        xp = profile.xp
+        level = profile.level
+        next_xp = profile.next_xp
     
         total_segments = 20
         progress = max(0, min(total_segments, int((xp / max(1, next_xp)) * total_segments)))
@@ -100,15 +88,14 @@ class Profile(commands.Cog):
         color_emoji = next(c for lvl, c in level_colors if level >= lvl)
         bar = color_emoji * progress + "⬛" * (total_segments - progress)
     
-        title = core.get_title_for_global_level(level)
+        title = profile.title
     
-        scores = core.load_scores()
-        quiz_score = scores.get(user_id_str, 0)
-        mini_scores = core.get_mini_scores(user_id)
+        quiz_score = profile.quiz_score
+        mini_scores = profile.mini_scores
     
         # ======== COMPTEURS & STREAK ========
-        counts = _get_user_counts(user_id)
-        streak_days = int(counts.get("streak_days", 0))
+        counts = profile.badge_counts()
+        streak_days = profile.streak
     
         # ======== BADGES ========
         badge_icons = []
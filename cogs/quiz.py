@@ -175,16 +175,18 @@ class Quiz(commands.Cog):
                 if matches:
                     await ctx.send(f"✅ Bonne réponse, **{ctx.author.display_name}** !")
 
-                    scores = core.load_scores()
-                    uid = str(ctx.author.id)
-                    scores[uid] = scores.get(uid, 0) + 1
-                    core.save_scores(scores)
-
                     xp_amount = 5 if difficulty == "easy" else 10 if difficulty == "normal" else 15
-                    await core.add_xp(self.bot, ctx.channel, ctx.author.id, xp_amount)
-                    core.add_mini_score(ctx.author.id, "animequiz", 1)
-
-                    ctx.bot.dispatch("mission_progress", ctx.author.id, "_custom:quiz_solo_ok")
+                    events = [core.XpEvent(ctx.author.id, xp_amount, "animequiz", score=1)]
+                    engagement = self.bot.get_cog("Engagement")
+                    # Point de quiz, XP, mini-score et mission du jour : tout ou rien, une seule écriture
+                    with core.store.transaction(core.FileConfig.MISSIONS, *core.XP_FILES):
+                        reward = engagement.stage_progress(ctx.author.id, "_custom:quiz_solo_ok") if engagement else 0
+                        if reward:
+                            events.append(core.XpEvent(ctx.author.id, reward))
+                        changes = core.apply_xp_events(events)
+                    await core.announce_rank_changes(ctx.channel, changes)
+                    if reward:
+                        await ctx.send(f"🎯 **Mission accomplie !** +{reward} XP")
 
                     other_titles = [t for t in correct_titles if normalize(t) != normalize(msg.content)]
                     if other_titles:
@@ -221,6 +223,7 @@ class Quiz(commands.Cog):
 
             combo = 0
             combo_bonus_total = 0
+            correct_answers = []  # mini-scores crédités en fin de partie, avec le reste
 
             for i in range(nb_questions):
                 try:
@@ -267,7 +270,7 @@ class Quiz(commands.Cog):
                                 score += 1
                                 xp_gain = 5 if difficulty == "easy" else 10 if difficulty == "normal" else 15
                                 total_xp += xp_gain
-                                core.add_mini_score(ctx.author.id, "animequiz", 1)
+                                correct_answers.append(core.XpEvent(ctx.author.id, 0, "animequiz"))
 
                                 combo += 1
                                 if combo == 3:
@@ -290,21 +293,18 @@ class Quiz(commands.Cog):
 
                 await asyncio.sleep(1.5)
 
-            scores = core.load_scores()
-            uid = str(ctx.author.id)
-
             if score < (nb_questions / 2):
                 penalty = 1
-                scores[uid] = max(0, scores.get(uid, 0) - penalty)
+                points = -penalty
                 await ctx.send(f"⚠️ Moins de 50% de bonnes réponses, -{penalty} point retiré.")
             else:
-                scores[uid] = scores.get(uid, 0) + score
-
-            core.save_scores(scores)
+                points = score
 
             total_xp += combo_bonus_total
-            if total_xp > 0:
-                await core.add_xp(self.bot, ctx.channel, ctx.author.id, total_xp)
+            # Score et XP de la partie en une seule mise à jour
+            await core.award_xp(
+                ctx.channel, [*correct_answers, core.XpEvent(ctx.author.id, max(0, total_xp), score=points)]
+            )
 
             precision = (score / nb_questions * 100) if nb_questions > 0 else 0.0
             embed = discord.Embed(
@@ -425,9 +425,7 @@ class Quiz(commands.Cog):
                     f"**{ctx.author.display_name}** {s1} - {s2} **{opponent.display_name}**\n"
                     f"🎖️ +20 XP pour le vainqueur !"
                 )
-                await core.add_xp(self.bot, ctx.channel, winner.id, 20)  # (petite correction logique)
-
-                core.add_mini_score(winner.id, "duel", 1)
+                await core.award_xp(ctx.channel, [core.XpEvent(winner.id, 20, "duel")])
 
             await ctx.send(embed=embed)
 
@@ -440,12 +438,15 @@ class Quiz(commands.Cog):
         """Affiche le top 10 des scores du quiz."""
         try:
             await _maybe_defer(ctx, ephemeral=False)
-            scores = core.load_scores()
-            if not scores:
+            leaderboard = await core.leaderboards.top("quiz", 10)
+            if not leaderboard:
                 await ctx.send("🏆 Aucun score enregistré pour l'instant.")
                 return
 
-            leaderboard = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:10]
+            winner_data = core.load_json(core.WINNER_FILE, None)
+            # Pseudos résolus en un lot (cache, puis appels REST simultanés)
+            wanted = [uid for uid, _ in leaderboard] + ([winner_data["uid"]] if winner_data else [])
+            names = await core.display_names.resolve(self.bot, wanted)
 
             embed = discord.Embed(
                 title="🏆 Classement Anime Quiz",
@@ -454,26 +455,23 @@ class Quiz(commands.Cog):
 
             lines: List[str] = []
             for i, (uid, score) in enumerate(leaderboard, 1):
-                try:
-                    user = await self.bot.fetch_user(int(uid))
-                    title = core.get_title_for_quiz_score(score)
-                    medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else "👑"
-                    lines.append(f"{medal} **{user.display_name}** — {score} pts\n➥ *{title}*")
-                except Exception as e:
-                    logger.error(f"Erreur récupération utilisateur {uid}: {e}")
+                name = names.get(int(uid))
+                if name is None:
                     continue
+                title = core.get_title_for_quiz_score(score)
+                medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else "👑"
+                lines.append(f"{medal} **{name}** — {score} pts\n➥ *{title}*")
 
             embed.description = "\n\n".join(lines) if lines else "Aucun score."
 
-            winner_data = core.load_json(core.WINNER_FILE, None)
             if winner_data:
                 try:
-                    winner_user = await self.bot.fetch_user(int(winner_data["uid"]))
+                    winner_name = names[int(winner_data["uid"])]
                     won_at = datetime.fromisoformat(winner_data["timestamp"])
                     month = won_at.strftime("%B %Y")
                     embed.add_field(
                         name="🏅 Vainqueur du mois dernier",
-                        value=f"**{winner_user.display_name}**\n{month}",
+                        value=f"**{winner_name or 'Inconnu'}**\n{month}",
                         inline=False
                     )
                 except Exception:
@@ -522,6 +520,7 @@ class Quiz(commands.Cog):
 
             progress = core.get_xp_bar(xp, next_xp)
             title = core.get_title_for_global_level(level)
+            xp_rank = await core.leaderboards.rank("xp", ctx.author.id)
 
             embed.add_field(
                 name="📊 Progression",
@@ -529,6 +528,7 @@ class Quiz(commands.Cog):
                     f"**Niveau {level}** ({xp}/{next_xp} XP)\n"
                     f"`{progress}`\n"
                     f"Titre actuel : **{title}**"
+                    + (f"\nClassement XP : **#{xp_rank}**" if xp_rank else "")
                 ),
                 inline=False
             )
@@ -536,8 +536,7 @@ class Quiz(commands.Cog):
             if quiz_score > 0:
                 quiz_title = core.get_title_for_quiz_score(quiz_score)
 
-                sorted_scores = sorted(scores.items(), key=lambda x: x[1], reverse=True)
-                position = next((i for i, (uid, _) in enumerate(sorted_scores, 1) if uid == str(ctx.author.id)), None)
+                position = await core.leaderboards.rank("quiz", ctx.author.id)
 
                 if position is not None:
                     embed.add_field(
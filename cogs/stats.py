@@ -53,7 +53,7 @@ class Stats(commands.Cog):
     @commands.command(name="mystats")
     async def mystats_cmd(self, ctx):
         try:
-            s = core.get_anilist_stats_for_discord(ctx.author.id, fallback_env=True)
+            s = await core.get_anilist_stats_for_discord(ctx.author.id, fallback_env=True)
         except Exception as e:
             await ctx.send(f"{EMOJI['warn']} Impossible de récupérer tes stats AniList.\n`{type(e).__name__}: {e}`")
             return
@@ -125,7 +125,7 @@ class Stats(commands.Cog):
           }
         }
         '''
-        data = core.query_anilist(query, {"name": username})
+        data = await core.query_anilist(query, {"name": username})
         if not data or not data.get("data", {}).get("User"):
             await ctx.send(f"❌ Impossible de récupérer le profil **{username}**.")
             return
@@ -176,7 +176,7 @@ class Stats(commands.Cog):
           }
         }
         '''
-        data = core.query_anilist(query, {"name": username})
+        data = await core.query_anilist(query, {"name": username})
         if not data or not data.get("data", {}).get("User"):
             await ctx.send("❌ Impossible de récupérer les données AniList.")
             return
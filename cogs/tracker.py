@@ -20,8 +20,8 @@ from modules.image import generate_next_card
 
 LOG = logging.getLogger(__name__)
 
-# Anti-spam (mémoire vive). Si tu veux la persistance, on pourra le passer en JSON.
-_sent_alerts: Dict[str, int] = {}  # key: user_id|title|episode|min, value: ts
+# Anti-spam persistant et expiré par jour, partagé avec les alertes de salon (core.sent_alerts)
+DEDUPE_PREFIX = "track|"  # clé : track|user_id|title|episode|min
 
 def _now_ts() -> int:
     return int(datetime.now(timezone.utc).timestamp())
@@ -159,7 +159,7 @@ class Tracker(commands.Cog):
 
         current_list.append(title)
         tracker[uid] = current_list
-        core.save_tracker(tracker)
+        core.save_tracker(tracker, uid)
 
         info = []
         if selected.get("nextAiringEpisode"):
@@ -221,7 +221,7 @@ class Tracker(commands.Cog):
 
         current_list.remove(to_remove)
         tracker[uid] = current_list
-        core.save_tracker(tracker)
+        core.save_tracker(tracker, uid)
 
         await self._dm(ctx, content=f"✅ **{to_remove}** a été retiré de ta liste.")
 
@@ -248,7 +248,7 @@ class Tracker(commands.Cog):
 
         if msg.content.lower() == "oui":
             tracker[uid] = []
-            core.save_tracker(tracker)
+            core.save_tracker(tracker, uid)
             await self._dm(ctx, content="✅ Ta liste a été vidée.")
         else:
             await ctx.send("❌ Opération annulée.")
@@ -273,7 +273,7 @@ class Tracker(commands.Cog):
         }
         '''
         try:
-            result = core.query_anilist(query, {"search": search})
+            result = await core.query_anilist(query, {"search": search})
             return result["data"]["Page"]["media"] if result and "data" in result else []
         except Exception as e:
             LOG.error(f"Erreur recherche anime: {e}")
@@ -283,15 +283,17 @@ class Tracker(commands.Cog):
 
     @tasks.loop(seconds=120)
     async def alert_loop(self):
-        tracker = core.load_tracker()
-        for uid, animes in tracker.items():
-            # user peut ne pas être en cache → fetch_user en fallback
-            user = self.bot.get_user(int(uid)) or await self.bot.fetch_user(int(uid))
-            if not user:
-                continue
-
-            for title in animes:
-                anime = core.get_next_airing_for_title(title)
+        with core.anilist.background():
+            sent = core.sent_alerts
+            await sent.refresh()
+            # Un titre distinct à la fois (index inversé titre -> utilisateurs) :
+            # une recherche et une carte par titre, puis un MP par abonné
+            followers = dict(core.tracker_index.items())
+            titles = list(followers)
+            # Recherches lancées ensemble : le client AniList les regroupe en quelques requêtes à alias
+            results = await asyncio.gather(*(core.get_next_airing_for_title(t) for t in titles))
+
+            for title, anime in zip(titles, results):
                 if not anime:
                     continue
 
@@ -299,15 +301,16 @@ class Tracker(commands.Cog):
                     if not _should_alert(anime, m):
                         continue
 
-                    key = f"{uid}|{title}|{anime.get('episode')}|{m}"
-                    if _sent_alerts.get(key):
+                    keys = {uid: f"{DEDUPE_PREFIX}{uid}|{title}|{anime.get('episode')}|{m}" for uid in followers[title]}
+                    pending = [uid for uid, key in keys.items() if not sent.seen(key)]
+                    if not pending:
                         continue
 
-                    # Génération de la carte (même style que !next)
+                    # Génération de la carte (même style que !next), une fois pour tous les abonnés
                     try:
                         img_path = generate_next_card(
                             anime,
-                            out_path=f"/tmp/track_alert_{uid}.png",
+                            out_path=f"/tmp/track_alert_{anime.get('mediaId') or anime.get('id') or 'x'}_{m}.png",
                             scale=1.2,
                             padding=40
                         )
@@ -315,23 +318,34 @@ class Tracker(commands.Cog):
                         LOG.warning("generate_next_card failed: %s", e)
                         img_path = None
 
-                    try:
-                        if img_path:
-                            await user.send(
-                                f"⏰ **Alerte {m} min** pour **{anime.get('title_romaji') or anime.get('title_english') or 'Anime'}** — Épisode {anime.get('episode')}",
-                                file=discord.File(img_path, filename=f"alert_{int(_now_ts())}.png")
-                            )
-                        else:
-                            when = core.format_airing_datetime_fr(anime.get("airingAt"), "Europe/Paris")
-                            await user.send(
-                                f"⏰ **Alerte {m} min** — **{anime.get('title_romaji') or anime.get('title_english') or 'Anime'}** "
-                                f"(Épisode {anime.get('episode')}) • {when}"
-                            )
-                        _sent_alerts[key] = _now_ts()
-                    except discord.Forbidden:
-                        LOG.warning("MP refusés par l'utilisateur %s", uid)
-                    except Exception as e:
-                        LOG.warning("Envoi MP échoué (%s): %s", uid, e)
+                    name = anime.get('title_romaji') or anime.get('title_english') or 'Anime'
+                    for uid in pending:
+                        # user peut ne pas être en cache → fetch_user en fallback
+                        try:
+                            user = self.bot.get_user(int(uid)) or await self.bot.fetch_user(int(uid))
+                        except Exception as e:
+                            LOG.warning("Utilisateur %s introuvable: %s", uid, e)
+                            continue
+                        if not user:
+                            continue
+
+                        try:
+                            if img_path:
+                                await user.send(
+                                    f"⏰ **Alerte {m} min** pour **{name}** — Épisode {anime.get('episode')}",
+                                    file=discord.File(img_path, filename=f"alert_{int(_now_ts())}.png")
+                                )
+                            else:
+                                when = core.format_airing_datetime_fr(anime.get("airingAt"), "Europe/Paris")
+                                await user.send(
+                                    f"⏰ **Alerte {m} min** — **{name}** "
+                                    f"(Épisode {anime.get('episode')}) • {when}"
+                                )
+                            await sent.add(keys[uid])
+                        except discord.Forbidden:
+                            LOG.warning("MP refusés par l'utilisateur %s", uid)
+                        except Exception as e:
+                            LOG.warning("Envoi MP échoué (%s): %s", uid, e)
 
     @alert_loop.before_loop
     async def before_alert_loop(self):
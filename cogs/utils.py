@@ -100,7 +100,7 @@ class Utils(commands.Cog):
     async def testalert(self, ctx):
         ch = ctx.channel
         try:
-            item = core.get_my_next_airing_one()
+            item = await core.get_my_next_airing_one()
             if not item:
                 return await ctx.send("Aucun prochain épisode (ANILIST_USERNAME ?)")
             item["when"] = core.format_airing_datetime_fr(item.get("airingAt"), "Europe/Paris")
@@ -110,6 +110,64 @@ class Utils(commands.Cog):
             await ctx.send(f"Erreur test: `{type(e).__name__}: {e}`")
 
     
+    @commands.command(name="apistats")
+    @commands.is_owner()
+    async def apistats(self, ctx: commands.Context) -> None:
+        """Affiche l'état de l'ordonnanceur AniList (files, attentes, limite)."""
+        m = core.anilist.metrics()
+        embed = discord.Embed(title="📡 AniList — ordonnanceur", color=discord.Color.blue())
+        embed.add_field(
+            name="Seau",
+            value=(
+                f"Jetons : **{m['tokens']}** / {m['rate_per_minute']} par min\n"
+                f"Bloqué encore : **{m['blocked_for']}s** • 429 reçues : **{m['throttled']}**\n"
+                f"En vol : **{m['inflight']}** • Requêtes fusionnées : **{m['coalesced']}**\n"
+                f"Lots : **{m['batch']['documents']}** requêtes pour **{m['batch']['items']}** sélections"
+            ),
+            inline=False,
+        )
+        for lane, st in m["lanes"].items():
+            embed.add_field(
+                name=f"File {lane}",
+                value=(
+                    f"En attente : **{st['queued']}** • Servies : **{st['served']}**\n"
+                    f"Attente moy. : **{st['wait_avg_ms']} ms** • max : **{st['wait_max_ms']} ms**"
+                ),
+                inline=True,
+            )
+        b = m["breaker"]
+        embed.add_field(
+            name="Disjoncteur",
+            value=(
+                f"État : **{b['state']}** • Échecs consécutifs : **{b['failures']}**\n"
+                f"Ouvertures : **{b['trips']}** • Réponses servies en secours : **{b['served_stale']}**"
+            ),
+            inline=False,
+        )
+        c = m["cache"]
+        lookups = c["hits"] + c["stale_hits"] + c["misses"]
+        ratio = (c["hits"] + c["stale_hits"]) * 100 / lookups if lookups else 0.0
+        embed.add_field(
+            name="Cache",
+            value=(
+                f"Entrées : **{c['size']}** / {c['maxsize']} • Taux de succès : **{ratio:.1f}%**\n"
+                f"Frais : **{c['hits']}** • Périmés : **{c['stale_hits']}** • Manqués : **{c['misses']}**"
+            ),
+            inline=False,
+        )
+        a = core.airing_index.metrics()
+        lists = core.media_lists.metrics()
+        embed.add_field(
+            name="Planning local",
+            value=(
+                f"Diffusions : **{a['schedules']}** • Animes : **{a['media']}**\n"
+                f"Listes : **{lists['users']}** comptes, **{lists['entries']}** entrées\n"
+                + (f"Synchronisé <t:{a['synced_at']}:R>" if a["ready"] else "Pas encore synchronisé")
+            ),
+            inline=False,
+        )
+        await ctx.send(embed=embed)
+
     @commands.command(name="showchannel")
     @commands.is_owner()
     async def showchannel(self, ctx: commands.Context) -> None:
@@ -0,0 +1,244 @@
+"""
+Miroir local du planning de diffusion AniList.
+
+Un :class:`AiringIndex` garde en mémoire les ``Page.airingSchedules`` d'une
+fenêtre glissante (±8 jours par défaut), triés par ``airingAt`` et indexés
+par ``mediaId`` et par titre normalisé. Les commandes de planning et les
+boucles d'alertes y lisent directement au lieu d'interroger AniList, dont
+le trafic devient indépendant du nombre d'utilisateurs.
+
+Synchronisation :
+- ``sync(full=True)`` recharge toute la fenêtre ;
+- ``sync()`` ne recharge que la zone qui bouge (les prochaines heures), où
+  se concentrent les reports et les ajouts de dernière minute.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import unicodedata
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+LOG = logging.getLogger(__name__)
+
+DAY = 86400
+
+SCHEDULE_QUERY = """
+query ($page: Int, $start: Int, $end: Int) {
+  Page(page: $page, perPage: 50) {
+    pageInfo { hasNextPage }
+    airingSchedules(airingAt_greater: $start, airingAt_lesser: $end, sort: TIME) {
+      id
+      airingAt
+      episode
+      mediaId
+      media {
+        id
+        title { romaji english native }
+        coverImage { extraLarge large }
+        genres
+        format
+        season
+        seasonYear
+      }
+    }
+  }
+}
+"""
+
+
+def title_key(title: Optional[str]) -> str:
+    """Clé de recherche d'un titre : sans accents, minuscules, alphanumérique."""
+    if not title:
+        return ""
+    text = "".join(c for c in unicodedata.normalize("NFD", title) if unicodedata.category(c) != "Mn")
+    return "".join(c for c in text.lower() if c.isalnum())
+
+
+class AiringIndex:
+    """Planning de diffusion indexé par date, par média et par titre.
+
+    Attributes:
+        client: Client AniList utilisé pour la synchronisation
+        days: Demi-largeur de la fenêtre conservée (jours)
+        horizon: Portée de la synchronisation incrémentale (secondes)
+        synced_at: Horodatage de la dernière synchronisation complète
+    """
+
+    def __init__(self, client: Any, *, days: int = 8, horizon: int = 6 * 3600) -> None:
+        self.client = client
+        self.days = days
+        self.horizon = horizon
+        self.synced_at = 0.0
+        # (airingAt, id) triés ; les entrées elles-mêmes sont dans _entries
+        self._timeline: List[Tuple[int, int]] = []
+        self._entries: Dict[int, Dict[str, Any]] = {}
+        self._by_media: Dict[int, List[Tuple[int, int]]] = {}
+        self._by_title: Dict[str, int] = {}
+        self._media: Dict[int, Dict[str, Any]] = {}
+        self._ready = asyncio.Event()
+        self._lock = asyncio.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def __len__(self) -> int:
+        return len(self._timeline)
+
+    # ----------------- synchronisation -----------------
+
+    async def sync(self, full: bool = False) -> int:
+        """Recharge une partie de la fenêtre depuis AniList.
+
+        Args:
+            full: ``True`` pour toute la fenêtre, sinon ``[maintenant - 1 h, + horizon]``
+
+        Returns:
+            Nombre de diffusions reçues
+        """
+        async with self._lock:
+            now = int(time.time())
+            if full or not self.ready:
+                start, end = now - self.days * DAY, now + self.days * DAY
+            else:
+                start, end = now - 3600, now + self.horizon
+
+            schedules = await self._fetch(start, end)
+            if schedules is None:
+                return 0
+            self._replace(start, end, schedules)
+            self._prune(now - self.days * DAY)
+            if full or not self.ready:
+                self.synced_at = time.time()
+                self._ready.set()
+            LOG.debug("[Airing] %d diffusions reçues, %d en index", len(schedules), len(self))
+            return len(schedules)
+
+    async def wait_ready(self, timeout: float = 30.0) -> bool:
+        """Attend la première synchronisation complète (au plus ``timeout`` secondes)."""
+        if self.ready:
+            return True
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def _fetch(self, start: int, end: int) -> Optional[List[Dict[str, Any]]]:
+        schedules: List[Dict[str, Any]] = []
+        page = 1
+        while True:
+            data = await self.client.query(
+                SCHEDULE_QUERY, {"page": page, "start": start, "end": end}, cache=False
+            )
+            page_data = ((data or {}).get("data") or {}).get("Page")
+            if page_data is None:
+                # Page manquante : on garde l'index tel quel plutôt que de le vider
+                LOG.warning("[Airing] Synchronisation interrompue (page %d)", page)
+                return None
+            schedules.extend(page_data.get("airingSchedules") or [])
+            if not (page_data.get("pageInfo") or {}).get("hasNextPage"):
+                return schedules
+            page += 1
+
+    def _replace(self, start: int, end: int, schedules: Iterable[Dict[str, Any]]) -> None:
+        # Tout ce qui était prévu dans la plage est remplacé : reports et annulations compris
+        lo = bisect_right(self._timeline, (start, float("inf")))
+        hi = bisect_left(self._timeline, (end, -1))
+        for _, sid in self._timeline[lo:hi]:
+            self._drop(sid)
+        del self._timeline[lo:hi]
+        for s in schedules:
+            self._add(s)
+
+    def _prune(self, before: int) -> None:
+        cut = bisect_left(self._timeline, (before, -1))
+        for _, sid in self._timeline[:cut]:
+            self._drop(sid)
+        del self._timeline[:cut]
+
+    def _add(self, s: Dict[str, Any]) -> None:
+        sid, at, media_id = s.get("id"), s.get("airingAt"), s.get("mediaId")
+        if sid is None or at is None or media_id is None:
+            return
+        if sid in self._entries:
+            old = self._entries[sid]
+            self._timeline.remove((old["airingAt"], sid))
+            self._drop(sid)
+        entry = {"id": sid, "airingAt": at, "episode": s.get("episode"), "mediaId": media_id}
+        self._entries[sid] = entry
+        insort(self._timeline, (at, sid))
+        insort(self._by_media.setdefault(media_id, []), (at, sid))
+        media = s.get("media")
+        if media:
+            self._media[media_id] = media
+            for t in (media.get("title") or {}).values():
+                key = title_key(t)
+                if key:
+                    self._by_title[key] = media_id
+
+    def _drop(self, sid: int) -> None:
+        """Retire ``sid`` des index secondaires (pas de la timeline)."""
+        entry = self._entries.pop(sid, None)
+        if entry is None:
+            return
+        media_id = entry["mediaId"]
+        items = self._by_media.get(media_id)
+        if items:
+            i = bisect_left(items, (entry["airingAt"], sid))
+            if i < len(items) and items[i] == (entry["airingAt"], sid):
+                del items[i]
+            if not items:
+                # Plus aucune diffusion dans la fenêtre : on oublie le média
+                del self._by_media[media_id]
+                media = self._media.pop(media_id, None) or {}
+                for t in (media.get("title") or {}).values():
+                    key = title_key(t)
+                    if self._by_title.get(key) == media_id:
+                        del self._by_title[key]
+
+    # ----------------- lecture -----------------
+
+    def _item(self, sid: int) -> Dict[str, Any]:
+        entry = self._entries[sid]
+        return {**entry, "media": self._media.get(entry["mediaId"], {})}
+
+    def next_airing(self, after: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Prochaine diffusion (tous animes confondus) après ``after``."""
+        after = int(time.time()) if after is None else after
+        i = bisect_right(self._timeline, (after, float("inf")))
+        return self._item(self._timeline[i][1]) if i < len(self._timeline) else None
+
+    def between(self, start: int, end: int) -> List[Dict[str, Any]]:
+        """Diffusions dont ``start <= airingAt < end``, dans l'ordre chronologique."""
+        lo = bisect_left(self._timeline, (start, -1))
+        hi = bisect_left(self._timeline, (end, -1))
+        return [self._item(sid) for _, sid in self._timeline[lo:hi]]
+
+    def next_for_media(self, media_id: int, after: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Prochaine diffusion d'un média après ``after`` (par défaut : maintenant)."""
+        after = int(time.time()) if after is None else after
+        items = self._by_media.get(media_id) or []
+        i = bisect_right(items, (after, float("inf")))
+        return self._item(items[i][1]) if i < len(items) else None
+
+    def next_for_title(self, title: str, after: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Prochaine diffusion d'un anime désigné par l'un de ses titres."""
+        media_id = self._by_title.get(title_key(title))
+        return self.next_for_media(media_id, after) if media_id is not None else None
+
+    def covers(self, title: str) -> bool:
+        """Indique si le titre correspond à un média présent dans la fenêtre."""
+        return title_key(title) in self._by_title
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "schedules": len(self._timeline),
+            "media": len(self._by_media),
+            "ready": self.ready,
+            "synced_at": int(self.synced_at),
+        }
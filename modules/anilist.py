@@ -0,0 +1,796 @@
+"""
+Client AniList asynchrone.
+
+Toutes les requêtes GraphQL du bot passent par une seule
+``aiohttp.ClientSession`` longue durée : les connexions HTTPS restent
+ouvertes (keep-alive) et sont réutilisées d'une requête à l'autre au lieu
+de refaire DNS + TLS à chaque appel, et la boucle d'événements n'est plus
+jamais bloquée pendant l'aller-retour réseau.
+
+Utilisation :
+    client = AniListClient()
+    data = await client.query(QUERY, {"id": 1})
+
+Un shim synchrone (``query_sync``) reste disponible pour les appelants
+historiques qui tournent hors de la boucle (threads, scripts).
+
+Chaque requête passe par un :class:`RateLimiter` (token bucket calé sur la
+limite AniList, ~90 req/min) à deux files : ``HIGH`` pour les commandes
+interactives, ``LOW`` pour les boucles d'arrière-plan, qui cèdent la place
+en premier quand le budget baisse :
+
+    with background():
+        await client.query(...)   # file LOW
+
+Les recherches unitaires (un ``Media`` ou un ``Character`` par appel) passent
+par :meth:`AniListClient.fetch` : les appels concurrents sont regroupés en
+un seul document GraphQL à alias (``m0: Media(...)``, ``m1: ...``) par un
+:class:`BatchLoader`, puis le résultat est redistribué à chaque appelant.
+
+Un :class:`CircuitBreaker` suit l'issue des vraies requêtes : après
+plusieurs échecs (timeouts, erreurs réseau, 5xx), AniList est considéré
+comme indisponible et les appelants reçoivent aussitôt la dernière réponse
+connue, marquée ``stale`` (:class:`StaleResponse`), au lieu d'attendre un
+timeout. Une requête d'essai repasse de temps en temps pour détecter le retour.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import aiohttp
+
+from modules.anilist_cache import CacheStore, ResponseCache, policy_for
+
+LOG = logging.getLogger(__name__)
+
+ANILIST_URL = os.getenv("ANILIST_URL", "https://graphql.anilist.co")
+
+HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "application/json",
+}
+
+# Files de priorité
+HIGH = "high"
+LOW = "low"
+
+_lane: contextvars.ContextVar[str] = contextvars.ContextVar("anilist_lane", default=HIGH)
+
+
+def request_key(query: str, variables: Optional[Dict[str, Any]] = None) -> str:
+    """Clé stable d'une requête : hash du document normalisé + variables triées."""
+    doc = " ".join(query.split())
+    digest = hashlib.sha1(doc.encode("utf-8")).hexdigest()
+    return digest + ":" + json.dumps(variables or {}, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+@contextmanager
+def background() -> Iterator[None]:
+    """Place les requêtes AniList du bloc dans la file basse priorité."""
+    token = _lane.set(LOW)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+class RateLimiter:
+    """Token bucket AniList avec deux files de priorité.
+
+    Les jetons se rechargent en continu (``rate_per_minute``). La file ``HIGH``
+    est toujours servie en premier ; la file ``LOW`` ne consomme un jeton que
+    s'il en reste plus de ``low_reserve``, si bien que les boucles de fond
+    ralentissent d'elles-mêmes avant que les commandes ne soient affectées.
+    Les en-têtes ``X-RateLimit-*`` et ``Retry-After`` renvoyés par AniList
+    recalent le seau sur l'état réel côté serveur.
+
+    Attributes:
+        rate_per_minute: Débit autorisé
+        capacity: Taille maximale du seau (rafale)
+        low_reserve: Jetons réservés aux requêtes interactives
+    """
+
+    def __init__(self, rate_per_minute: int = 90, burst: Optional[int] = None, low_reserve: int = 10) -> None:
+        self.rate_per_minute = rate_per_minute
+        self.capacity = float(burst or rate_per_minute)
+        self.low_reserve = low_reserve
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._queues: Dict[str, Deque[asyncio.Future]] = {HIGH: deque(), LOW: deque()}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._pump_task: Optional[asyncio.Task] = None
+        self._stats: Dict[str, Dict[str, float]] = {
+            lane: {"served": 0, "wait_total": 0.0, "wait_max": 0.0} for lane in (HIGH, LOW)
+        }
+        self.throttled = 0  # nombre de réponses 429 reçues
+
+    # ----------------- seau -----------------
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate_per_minute / 60)
+        self._updated = now
+
+    def _need(self, lane: str) -> float:
+        return 1 if lane == HIGH else 1 + self.low_reserve
+
+    def _can_take(self, lane: str) -> bool:
+        self._refill()
+        return time.monotonic() >= self._blocked_until and self.tokens >= self._need(lane)
+
+    async def acquire(self, lane: str = HIGH) -> None:
+        """Attend un jeton dans la file demandée."""
+        start = time.monotonic()
+        # Voie rapide : rien devant nous dans notre file (ni dans HIGH pour LOW)
+        ahead = self._queues[HIGH] if lane == HIGH else (self._queues[HIGH] or self._queues[LOW])
+        if not ahead and self._can_take(lane):
+            self.tokens -= 1
+            self._record(lane, 0.0)
+            return
+
+        fut = asyncio.get_running_loop().create_future()
+        self._queues[lane].append(fut)
+        self._ensure_pump()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut in self._queues[lane]:
+                self._queues[lane].remove(fut)
+            raise
+        self._record(lane, time.monotonic() - start)
+
+    def _ensure_pump(self) -> None:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.get_running_loop().create_task(self._pump())
+
+    async def _pump(self) -> None:
+        while self._queues[HIGH] or self._queues[LOW]:
+            lane = HIGH if self._queues[HIGH] else LOW
+            queue = self._queues[lane]
+            if queue[0].done():  # annulé entre-temps
+                queue.popleft()
+                continue
+            if self._can_take(lane):
+                self.tokens -= 1
+                queue.popleft().set_result(None)
+                continue
+
+            delay = max(self._blocked_until - time.monotonic(),
+                        (self._need(lane) - self.tokens) * 60 / self.rate_per_minute, 0.01)
+            self._wakeup.clear()
+            try:
+                # réveil anticipé si une requête HIGH arrive pendant qu'on attend pour LOW
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    # ----------------- retours serveur -----------------
+
+    def update_from_headers(self, headers: Any, status: int) -> Optional[float]:
+        """Recale le seau sur les en-têtes AniList.
+
+        Returns:
+            Le délai imposé par ``Retry-After`` (secondes) pour une 429, sinon None
+        """
+        try:
+            limit = headers.get("X-RateLimit-Limit")
+            if limit and int(limit) > 0 and int(limit) != self.rate_per_minute:
+                self.rate_per_minute = int(limit)
+                self.capacity = float(int(limit))
+            remaining = headers.get("X-RateLimit-Remaining")
+            if remaining is not None:
+                self._refill()
+                self.tokens = min(self.tokens, float(remaining))
+        except (TypeError, ValueError):
+            pass
+
+        if status != 429:
+            return None
+        self.throttled += 1
+        retry_after = 60.0
+        try:
+            if headers.get("Retry-After") is not None:
+                retry_after = float(headers.get("Retry-After"))
+            elif headers.get("X-RateLimit-Reset") is not None:
+                retry_after = max(0.0, float(headers.get("X-RateLimit-Reset")) - time.time())
+        except (TypeError, ValueError):
+            pass
+        self.tokens = 0.0
+        self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+        return retry_after
+
+    # ----------------- métriques -----------------
+
+    def _record(self, lane: str, waited: float) -> None:
+        st = self._stats[lane]
+        st["served"] += 1
+        st["wait_total"] += waited
+        st["wait_max"] = max(st["wait_max"], waited)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Profondeur des files, temps d'attente et état du seau."""
+        self._refill()
+        lanes = {}
+        for lane, st in self._stats.items():
+            served = int(st["served"])
+            lanes[lane] = {
+                "queued": sum(1 for f in self._queues[lane] if not f.done()),
+                "served": served,
+                "wait_avg_ms": round(st["wait_total"] / served * 1000, 1) if served else 0.0,
+                "wait_max_ms": round(st["wait_max"] * 1000, 1),
+            }
+        return {
+            "tokens": round(self.tokens, 1),
+            "rate_per_minute": self.rate_per_minute,
+            "blocked_for": round(max(0.0, self._blocked_until - time.monotonic()), 1),
+            "throttled": self.throttled,
+            "lanes": lanes,
+        }
+
+
+class StaleResponse(dict):
+    """Réponse servie depuis le cache pendant une panne d'AniList.
+
+    Se manipule comme la réponse d'origine ; ``stale`` vaut toujours
+    ``True`` et ``age`` indique depuis combien de secondes elle est périmée.
+    """
+
+    stale = True
+
+    def __init__(self, value: Dict[str, Any], age: float = 0.0) -> None:
+        super().__init__(value)
+        self.age = age
+
+
+def is_stale(response: Any) -> bool:
+    """Indique si une réponse provient du cache faute de pouvoir joindre AniList."""
+    return getattr(response, "stale", False)
+
+
+class CircuitBreaker:
+    """Disjoncteur alimenté par l'issue des requêtes réelles.
+
+    - ``closed`` : tout passe ; ``failure_threshold`` échecs consécutifs l'ouvrent ;
+    - ``open`` : plus rien ne part pendant ``reset_timeout`` secondes ;
+    - ``half_open`` : une seule requête d'essai ; succès → ``closed``, échec → ``open``.
+
+    Les fonctions enregistrées avec :meth:`add_listener` sont appelées à
+    chaque changement d'état avec le nouvel état.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_at = 0.0
+        self._listeners: List[Callable[[str], None]] = []
+        self.trips = 0
+
+    def add_listener(self, callback: Callable[[str], None]) -> None:
+        self._listeners.append(callback)
+
+    def _set_state(self, state: str) -> None:
+        if state == self.state:
+            return
+        LOG.warning("[AniList] Disjoncteur : %s -> %s", self.state, state)
+        self.state = state
+        for callback in self._listeners:
+            try:
+                callback(state)
+            except Exception as e:
+                LOG.error("[AniList] Erreur dans un abonné du disjoncteur : %s", e)
+
+    def allow_request(self) -> bool:
+        """``True`` si une requête peut partir vers AniList."""
+        now = time.monotonic()
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and now - self.opened_at < self.reset_timeout:
+            return False
+        # Essai : un seul à la fois ; un essai resté sans réponse est remplacé
+        if self.state == self.HALF_OPEN and now - self._probe_at < self.reset_timeout:
+            return False
+        self._probe_at = now
+        self._set_state(self.HALF_OPEN)
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._set_state(self.CLOSED)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.trips += 1
+            self.opened_at = time.monotonic()
+            self._set_state(self.OPEN)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {"state": self.state, "failures": self.failures, "trips": self.trips}
+
+
+class _Pending(NamedTuple):
+    """Sélection unitaire en attente d'envoi dans un lot."""
+
+    key: str
+    item_doc: str
+    field: str
+    args: Dict[str, Tuple[str, Any]]
+    selection: str
+    lane: str
+    cache: bool
+    future: asyncio.Future
+
+
+class BatchLoader:
+    """Regroupe les sélections unitaires concurrentes en documents à alias.
+
+    Chaque appel à :meth:`load` décrit un champ racine (``Media``,
+    ``Character``...), ses arguments typés et sa sélection. Les appels reçus
+    pendant ``window`` secondes sont empaquetés par ``max_size`` :
+
+        query ($m0_search: String, $m1_id: Int) {
+          m0: Media(search: $m0_search) { ... }
+          m1: Media(id: $m1_id) { ... }
+        }
+
+    Le cache est tenu par élément (une entrée par sélection unitaire), le
+    document combiné n'est donc jamais mis en cache lui-même.
+
+    Attributes:
+        client: Client utilisé pour envoyer les documents combinés
+        max_size: Nombre maximal de sélections par document
+        window: Délai de regroupement (secondes)
+    """
+
+    def __init__(self, client: "AniListClient", max_size: int = 20, window: float = 0.01) -> None:
+        self.client = client
+        self.max_size = max(1, max_size)
+        self.window = window
+        self._pending: List[_Pending] = []
+        self._waiting: Dict[str, asyncio.Future] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.documents = 0
+        self.items = 0
+
+    @staticmethod
+    def _item_document(field: str, args: Dict[str, Tuple[str, Any]], selection: str) -> str:
+        params = ", ".join(f"${name}: {gql_type}" for name, (gql_type, _) in sorted(args.items()))
+        call = ", ".join(f"{name}: ${name}" for name in sorted(args))
+        return f"query ({params}) {{ {field}({call}) {selection} }}" if args else f"query {{ {field} {selection} }}"
+
+    async def load(
+        self,
+        field: str,
+        args: Dict[str, Tuple[str, Any]],
+        selection: str,
+        *,
+        cache: bool = True,
+    ) -> Optional[Dict[str, Any]]:
+        """Récupère une sélection unitaire, regroupée avec les appels concurrents.
+
+        Args:
+            field: Champ racine GraphQL (``"Media"``, ``"Character"``...)
+            args: ``{nom: (type GraphQL, valeur)}``, ex. ``{"id": ("Int", 1)}``
+            selection: Sélection entre accolades, ex. ``"{ id title { romaji } }"``
+            cache: ``False`` pour ignorer le cache
+
+        Returns:
+            La valeur du champ, ``None`` si introuvable. Si AniList ne répond
+            pas (ou disjoncteur ouvert) : une :class:`StaleResponse` si la
+            sélection est en cache, ``None`` sinon.
+        """
+        item_doc = self._item_document(field, args, selection)
+        variables = {name: value for name, (_, value) in args.items()}
+        key = request_key(item_doc, variables)
+
+        value, state = None, None
+        if cache:
+            value, state = self.client.cache.get(key)
+            if state == ResponseCache.FRESH:
+                return value
+        if not self.client.breaker.allow_request():
+            return self.client._degraded(key) if cache else None
+        if cache and state == ResponseCache.STALE:
+            # Actualisation en arrière-plan : personne n'attend ce futur
+            fut = self._enqueue(key, item_doc, field, args, selection, LOW, cache)
+            fut.add_done_callback(lambda f: f.cancelled() or f.exception())
+            return value
+        return await asyncio.shield(self._enqueue(key, item_doc, field, args, selection, _lane.get(), cache))
+
+    def _enqueue(
+        self,
+        key: str,
+        item_doc: str,
+        field: str,
+        args: Dict[str, Tuple[str, Any]],
+        selection: str,
+        lane: str,
+        cache: bool,
+    ) -> asyncio.Future:
+        fut = self._waiting.get(key)
+        if fut is not None:
+            self.client.coalesced += 1
+            return fut
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._waiting[key] = fut
+        self._pending.append(_Pending(key, item_doc, field, args, selection, lane, cache, fut))
+        if len(self._pending) >= self.max_size:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._dispatch)
+        return fut
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        loop = asyncio.get_running_loop()
+        for i in range(0, len(pending), self.max_size):
+            loop.create_task(self._run(pending[i:i + self.max_size]))
+
+    async def _run(self, chunk: List[_Pending]) -> None:
+        params: List[str] = []
+        fields: List[str] = []
+        variables: Dict[str, Any] = {}
+        for i, item in enumerate(chunk):
+            alias = f"m{i}"
+            for name, (gql_type, value) in sorted(item.args.items()):
+                params.append(f"${alias}_{name}: {gql_type}")
+                variables[f"{alias}_{name}"] = value
+            call = ", ".join(f"{name}: ${alias}_{name}" for name in sorted(item.args))
+            fields.append(f"{alias}: {item.field}({call}) {item.selection}" if call else f"{alias}: {item.field} {item.selection}")
+        header = f"query ({', '.join(params)})" if params else "query"
+        document = header + " {\n  " + "\n  ".join(fields) + "\n}"
+        # Une seule sélection interactive suffit à faire passer le lot en file haute
+        lane = HIGH if any(item.lane == HIGH for item in chunk) else LOW
+
+        self.documents += 1
+        self.items += len(chunk)
+        client = self.client
+        try:
+            result: Dict[str, Any] = {}
+            # Disjoncteur déjà consulté par load() : le consulter à nouveau
+            # consommerait l'essai half_open et le lot ne partirait jamais
+            if client.breaker.state != CircuitBreaker.OPEN:
+                try:
+                    result = await client._shared(
+                        request_key(document, variables), document, variables, None, lane, False
+                    )
+                except Exception as e:
+                    LOG.warning("[AniList] Lot de %d sélections en échec : %s", len(chunk), e)
+            data = (result or {}).get("data")
+            for i, item in enumerate(chunk):
+                if data is None:
+                    # Lot perdu (panne, disjoncteur ouvert) : dernière valeur connue
+                    value = client._degraded(item.key) if item.cache else None
+                else:
+                    value = data.get(f"m{i}")
+                    if value is not None and item.cache:
+                        ttl, stale = policy_for(item.item_doc)
+                        client.cache.set(item.key, value, ttl, stale)
+                if not item.future.done():
+                    item.future.set_result(value)
+        finally:
+            for item in chunk:
+                self._waiting.pop(item.key, None)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "documents": self.documents,
+            "items": self.items,
+            "pending": len(self._pending),
+        }
+
+
+class AniListClient:
+    """Client GraphQL AniList basé sur une session aiohttp partagée.
+
+    Attributes:
+        url: URL de l'endpoint GraphQL
+        limit: Nombre maximal de connexions simultanées
+        limit_per_host: Nombre maximal de connexions vers un même hôte
+        timeout: Timeout total par requête (secondes)
+        keepalive_timeout: Durée de vie d'une connexion inactive (secondes)
+        limiter: Ordonnanceur de débit partagé par toutes les requêtes
+        max_retries: Nouvelles tentatives après une réponse 429
+        cache: Cache des réponses (TTL par type de requête), persisté dans
+            ``cache_path`` si fourni
+        batcher: Regroupement des sélections unitaires (voir :meth:`fetch`)
+        breaker: Disjoncteur, ouvert quand AniList ne répond plus
+    """
+
+    def __init__(
+        self,
+        url: str = ANILIST_URL,
+        *,
+        limit: int = 10,
+        limit_per_host: int = 10,
+        timeout: float = 10.0,
+        keepalive_timeout: float = 60.0,
+        rate_per_minute: int = 90,
+        max_retries: int = 3,
+        cache_size: int = 2000,
+        cache_path: Optional[str] = None,
+        batch_size: int = 20,
+        failure_threshold: int = 5,
+        reset_timeout: float = 60.0,
+    ) -> None:
+        self.url = url
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.keepalive_timeout = keepalive_timeout
+        self.limiter = RateLimiter(rate_per_minute)
+        self.max_retries = max_retries
+        self.cache = ResponseCache(cache_size, CacheStore(cache_path) if cache_path else None)
+        self.batcher = BatchLoader(self, batch_size)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.served_stale = 0
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.coalesced = 0  # appels servis par une requête déjà en vol
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    # ----------------- session -----------------
+
+    async def start(self) -> None:
+        """Ouvre la session sur la boucle courante (appelé au démarrage du bot)."""
+        await self._get_session()
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, headers=HEADERS)
+            self._loop = loop
+        return self._session
+
+    async def close(self) -> None:
+        """Ferme la session et libère les connexions du pool."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+    # ----------------- requêtes -----------------
+
+    async def query(
+        self,
+        query: str,
+        variables: Optional[Dict[str, Any]] = None,
+        *,
+        timeout: Optional[float] = None,
+        priority: Optional[str] = None,
+        cache: bool = True,
+    ) -> Dict[str, Any]:
+        """Exécute une requête GraphQL en respectant la limite de débit.
+
+        Une réponse fraîche en cache est renvoyée sans appel réseau ; une
+        réponse périmée mais encore dans sa fenêtre de secours est renvoyée
+        immédiatement pendant qu'une actualisation part en file ``LOW``.
+        Si la même requête est déjà en vol, on attend son résultat au lieu
+        d'en émettre une seconde. La réponse est partagée : ne pas la modifier.
+
+        Args:
+            query: Document GraphQL
+            variables: Variables de la requête
+            timeout: Timeout spécifique à cet appel (sinon ``self.timeout``)
+            priority: ``HIGH`` ou ``LOW`` (par défaut : file du contexte courant)
+            cache: ``False`` pour forcer un appel réseau (sondes, etc.)
+
+        Returns:
+            La réponse JSON décodée, ou ``{}`` en cas d'erreur. Quand le
+            disjoncteur est ouvert : une :class:`StaleResponse` si la requête
+            est en cache, ``{}`` sinon.
+        """
+        lane = priority or _lane.get()
+        key = request_key(query, variables)
+        value, state = None, None
+        if cache:
+            value, state = self.cache.get(key)
+            if state == ResponseCache.FRESH:
+                return value
+        if not self.breaker.allow_request():
+            # AniList indisponible : dernière réponse connue tout de suite, sans attendre
+            return (self._degraded(key) if cache else None) or {}
+        if cache and state == ResponseCache.STALE:
+            self._shared(key, query, variables, timeout, LOW, cache)
+            return value
+        return await asyncio.shield(self._shared(key, query, variables, timeout, lane, cache))
+
+    def _degraded(self, key: str) -> Optional[StaleResponse]:
+        """Dernière valeur connue pour ``key``, même expirée, marquée ``stale``."""
+        value, age = self.cache.peek(key)
+        if value is None:
+            return None
+        self.served_stale += 1
+        return StaleResponse(value, age)
+
+    def _shared(
+        self,
+        key: str,
+        query: str,
+        variables: Optional[Dict[str, Any]],
+        timeout: Optional[float],
+        lane: str,
+        cache: bool,
+    ) -> asyncio.Task:
+        """Retourne la tâche en vol pour ``key``, en la créant si besoin."""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return task
+        # Tâche dédiée : l'annulation d'un appelant n'interrompt pas les autres
+        task = asyncio.get_running_loop().create_task(self._execute(query, variables, timeout, lane))
+        self._inflight[key] = task
+
+        def _done(t: asyncio.Task) -> None:
+            self._inflight.pop(key, None)
+            if cache and not t.cancelled() and t.exception() is None:
+                result = t.result()
+                if result and result.get("data") and not result.get("errors"):
+                    ttl, stale = policy_for(query)
+                    self.cache.set(key, result, ttl, stale)
+
+        task.add_done_callback(_done)
+        return task
+
+    async def fetch(
+        self,
+        field: str,
+        args: Dict[str, Tuple[str, Any]],
+        selection: str,
+        *,
+        cache: bool = True,
+    ) -> Optional[Dict[str, Any]]:
+        """Récupère un champ racine unitaire via le :class:`BatchLoader`.
+
+        Exemple : ``await client.fetch("Media", {"id": ("Int", 1)}, "{ id }")``
+        """
+        return await self.batcher.load(field, args, selection, cache=cache)
+
+    async def _execute(
+        self,
+        query: str,
+        variables: Optional[Dict[str, Any]],
+        timeout: Optional[float],
+        lane: str,
+    ) -> Dict[str, Any]:
+        session = await self._get_session()
+        payload = {"query": query, "variables": variables or {}}
+        client_timeout = aiohttp.ClientTimeout(total=timeout or self.timeout)
+
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(lane)
+            try:
+                async with session.post(self.url, json=payload, timeout=client_timeout) as resp:
+                    retry_after = self.limiter.update_from_headers(resp.headers, resp.status)
+                    if resp.status >= 500:
+                        self.breaker.record_failure()
+                    elif retry_after is None:
+                        # 2xx/4xx : AniList répond, même si la requête est refusée
+                        self.breaker.record_success()
+                    if resp.status == 200:
+                        try:
+                            return await resp.json(content_type=None)
+                        except ValueError as e:
+                            # Page d'erreur HTML d'un proxy, corps tronqué...
+                            self.breaker.record_failure()
+                            LOG.warning("[AniList] Réponse illisible : %s", e)
+                            return {}
+                    if retry_after is not None:
+                        LOG.warning("[AniList] 429 (file %s), nouvel essai dans %.0fs (%d/%d)",
+                                    lane, retry_after, attempt + 1, self.max_retries)
+                        continue
+                    # AniList répond 404 dès qu'un alias est introuvable, avec les
+                    # autres résultats dans "data" : on garde ces résultats partiels
+                    try:
+                        body = await resp.json(content_type=None)
+                    except ValueError:
+                        body = None
+                    if isinstance(body, dict) and body.get("data"):
+                        return body
+                    LOG.warning("[AniList] HTTP %s", resp.status)
+                    return {}
+            except asyncio.TimeoutError:
+                self.breaker.record_failure()
+                LOG.warning("[AniList] Timeout après %.1fs", timeout or self.timeout)
+                return {}
+            except aiohttp.ClientError as e:
+                self.breaker.record_failure()
+                LOG.warning("[AniList] Erreur réseau : %s", e)
+                return {}
+        LOG.error("[AniList] Limite de débit toujours atteinte après %d essais", self.max_retries + 1)
+        return {}
+
+    def metrics(self) -> Dict[str, Any]:
+        """Métriques de l'ordonnanceur (files, attentes, seau) et des fusions."""
+        m = self.limiter.metrics()
+        m["inflight"] = len(self._inflight)
+        m["coalesced"] = self.coalesced
+        m["cache"] = self.cache.metrics()
+        m["batch"] = self.batcher.metrics()
+        m["breaker"] = {**self.breaker.metrics(), "served_stale": self.served_stale}
+        return m
+
+    @staticmethod
+    def background():
+        """Raccourci vers :func:`background` : ``with core.anilist.background(): ...``"""
+        return background()
+
+    def query_sync(
+        self,
+        query: str,
+        variables: Optional[Dict[str, Any]] = None,
+        *,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Version bloquante de :meth:`query` pour le code historique.
+
+        Depuis un thread (``asyncio.to_thread``), la requête est confiée à la
+        boucle du bot et profite de la session partagée. Sans boucle (scripts),
+        une session temporaire est ouverte le temps de l'appel.
+
+        Raises:
+            RuntimeError: si appelé depuis la boucle elle-même (il faut ``await``)
+        """
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        loop = self._loop
+        if loop is not None and loop.is_running() and running is not loop:
+            fut = asyncio.run_coroutine_threadsafe(self.query(query, variables, timeout=timeout), loop)
+            return fut.result()
+        if running is None:
+            return asyncio.run(self._one_shot(query, variables, timeout))
+        raise RuntimeError("query_sync() appelé depuis la boucle asyncio : utiliser `await query()`.")
+
+    async def _one_shot(
+        self,
+        query: str,
+        variables: Optional[Dict[str, Any]],
+        timeout: Optional[float],
+    ) -> Dict[str, Any]:
+        client = AniListClient(
+            self.url,
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            timeout=self.timeout,
+            keepalive_timeout=self.keepalive_timeout,
+            rate_per_minute=self.limiter.rate_per_minute,
+        )
+        try:
+            return await client.query(query, variables, timeout=timeout)
+        finally:
+            await client.close()
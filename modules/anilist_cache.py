@@ -0,0 +1,297 @@
+"""
+Cache mémoire des réponses AniList.
+
+Cache LRU borné dont la durée de vie dépend du type de requête : les
+métadonnées d'un anime ou d'un personnage changent rarement, le prochain
+épisode quelques fois par jour, les statistiques d'un utilisateur souvent.
+
+Chaque entrée a deux échéances :
+- ``fresh_until`` : jusque-là, la réponse est servie telle quelle ;
+- ``stale_until`` : entre les deux, la réponse est encore servie
+  immédiatement mais une actualisation est lancée en arrière-plan
+  (stale-while-revalidate). Au-delà, l'entrée n'est plus servie
+  normalement mais reste disponible pour :meth:`ResponseCache.peek`
+  (réponse de secours quand AniList est en panne).
+
+Le cache peut être adossé à une table SQLite (:class:`CacheStore`) pour
+survivre aux redémarrages : les écritures sont regroupées et vidées
+périodiquement hors de la boucle, et le cache est rechargé au démarrage,
+entrées expirées comprises tant qu'elles ont moins de ``retention``
+secondes (``ANILIST_CACHE_RETENTION``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Tuple
+
+LOG = logging.getLogger(__name__)
+
+# (motif recherché dans le document GraphQL, TTL frais, fenêtre "stale") en secondes.
+# La première règle qui correspond l'emporte : de la plus volatile à la plus stable.
+POLICIES: List[Tuple[Pattern[str], int, int]] = [
+    (re.compile(r"\bstatistics\b"), 120, 600),                        # User.statistics
+    (re.compile(r"\b(airingSchedules|nextAiringEpisode)\b"), 300, 900),  # prochains épisodes
+    (re.compile(r"\b(MediaListCollection|mediaList)\b"), 180, 600),   # listes utilisateurs
+    (re.compile(r"\b(Media|media|Character|characters)\b"), 86400, 7 * 86400),  # métadonnées
+]
+DEFAULT_POLICY = (600, 1800)
+
+# Durée pendant laquelle une réponse expirée reste sur disque pour le mode dégradé
+RETENTION = int(os.getenv("ANILIST_CACHE_RETENTION", str(30 * 86400)))
+
+
+@lru_cache(maxsize=256)
+def policy_for(query: str) -> Tuple[int, int]:
+    """Retourne ``(ttl, stale)`` pour un document GraphQL."""
+    for pattern, ttl, stale in POLICIES:
+        if pattern.search(query):
+            return ttl, stale
+    return DEFAULT_POLICY
+
+
+class CacheStore:
+    """Table SQLite des réponses AniList (clé, JSON, échéances, dernier accès).
+
+    Les méthodes sont bloquantes : les appeler via ``asyncio.to_thread``.
+
+    Attributes:
+        path: Chemin du fichier SQLite
+        max_rows: Nombre maximal de lignes conservées sur disque
+        retention: Secondes pendant lesquelles une ligne expirée est gardée après ``stale_until``
+    """
+
+    def __init__(self, path: str, max_rows: int = 20000, retention: float = RETENTION) -> None:
+        self.path = path
+        self.max_rows = max_rows
+        self.retention = retention
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10)
+        if not self._ready:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS responses (
+                       key TEXT PRIMARY KEY,
+                       value TEXT NOT NULL,
+                       fresh_until REAL NOT NULL,
+                       stale_until REAL NOT NULL,
+                       last_access REAL NOT NULL
+                   )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_access ON responses(last_access)")
+            self._ready = True
+        return conn
+
+    def load(self, limit: int) -> List[Tuple[str, Any, float, float]]:
+        """Retourne les ``limit`` entrées les plus récemment utilisées, expirées comprises.
+
+        Une entrée expirée n'est plus servie par :meth:`ResponseCache.get`
+        mais reste disponible pour :meth:`ResponseCache.peek`.
+
+        Returns:
+            ``(key, valeur, fresh_until, stale_until)`` du moins au plus récent
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT key, value, fresh_until, stale_until FROM responses "
+                "WHERE stale_until > ? ORDER BY last_access DESC LIMIT ?",
+                (time.time() - self.retention, limit),
+            ).fetchall()
+        finally:
+            conn.close()
+        entries = []
+        for key, value, fresh_until, stale_until in reversed(rows):
+            try:
+                entries.append((key, json.loads(value), fresh_until, stale_until))
+            except ValueError:
+                continue
+        return entries
+
+    def write(
+        self,
+        entries: Iterable[Tuple[str, Any, float, float]],
+        touched: Iterable[str],
+        removed: Iterable[str],
+    ) -> None:
+        """Écrit les entrées modifiées puis applique la rétention et la limite de taille."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (key, json.dumps(value, ensure_ascii=False, separators=(",", ":")), fresh, stale, now)
+                        for key, value, fresh, stale in entries
+                    ],
+                )
+                conn.executemany(
+                    "UPDATE responses SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in touched],
+                )
+                conn.executemany("DELETE FROM responses WHERE key = ?", [(key,) for key in removed])
+                conn.execute("DELETE FROM responses WHERE stale_until <= ?", (now - self.retention,))
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    " SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                    (self.max_rows,),
+                )
+        finally:
+            conn.close()
+
+
+class ResponseCache:
+    """Cache LRU + TTL des réponses AniList.
+
+    Attributes:
+        maxsize: Nombre maximal d'entrées conservées en mémoire
+        store: Stockage persistant optionnel (voir :meth:`load` et :meth:`flush`)
+    """
+
+    FRESH = "fresh"
+    STALE = "stale"
+
+    def __init__(self, maxsize: int = 2000, store: Optional[CacheStore] = None) -> None:
+        self.maxsize = maxsize
+        self.store = store
+        # key -> (valeur, fresh_until, stale_until)
+        self._data: "OrderedDict[str, Tuple[Any, float, float]]" = OrderedDict()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        # Modifications pas encore écrites sur disque
+        self._dirty: set = set()
+        # Entrées modifiées sorties de la mémoire (LRU) avant leur écriture
+        self._evicted: Dict[str, Tuple[Any, float, float]] = {}
+        self._touched: set = set()
+        self._removed: set = set()
+        self._flush_lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Tuple[Optional[Any], Optional[str]]:
+        """Cherche une réponse.
+
+        Returns:
+            ``(valeur, FRESH)``, ``(valeur, STALE)`` ou ``(None, None)``
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None, None
+        value, fresh_until, stale_until = entry
+        now = time.time()
+        if now >= stale_until:
+            # Conservée (jusqu'à éviction LRU) pour peek() en cas de panne
+            self.misses += 1
+            return None, None
+        self._data.move_to_end(key)
+        self._touched.add(key)
+        if now < fresh_until:
+            self.hits += 1
+            return value, self.FRESH
+        self.stale_hits += 1
+        return value, self.STALE
+
+    def peek(self, key: str) -> Tuple[Optional[Any], float]:
+        """Dernière valeur connue, même expirée, sans toucher aux compteurs.
+
+        Returns:
+            ``(valeur, secondes depuis la fin de fraîcheur)`` ou ``(None, 0.0)``
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            return None, 0.0
+        value, fresh_until, _ = entry
+        return value, max(0.0, time.time() - fresh_until)
+
+    def set(self, key: str, value: Any, ttl: float, stale: float) -> None:
+        """Enregistre une réponse valable ``ttl`` secondes (+ ``stale`` en secours)."""
+        now = time.time()
+        self._data[key] = (value, now + ttl, now + ttl + stale)
+        self._data.move_to_end(key)
+        self._dirty.add(key)
+        self._evicted.pop(key, None)
+        self._removed.discard(key)
+        while len(self._data) > self.maxsize:
+            # L'entrée sort de la mémoire mais reste sur disque (écrite au prochain flush)
+            old, entry = self._data.popitem(last=False)
+            if old in self._dirty:
+                self._dirty.discard(old)
+                self._evicted[old] = entry
+
+    def invalidate(self, key: str) -> None:
+        self._data.pop(key, None)
+        self._dirty.discard(key)
+        self._evicted.pop(key, None)
+        self._removed.add(key)
+
+    def clear(self) -> None:
+        self._removed.update(self._data)
+        self._removed.update(self._evicted)
+        self._data.clear()
+        self._dirty.clear()
+        self._evicted.clear()
+
+    # ----------------- persistance -----------------
+
+    async def load(self) -> int:
+        """Recharge le cache depuis le disque (à appeler au démarrage).
+
+        Returns:
+            Nombre d'entrées rechargées
+        """
+        if self.store is None:
+            return 0
+        try:
+            entries = await asyncio.to_thread(self.store.load, self.maxsize)
+        except sqlite3.Error as e:
+            LOG.error("[AniList] Lecture du cache persistant impossible : %s", e)
+            return 0
+        for key, value, fresh_until, stale_until in entries:
+            if key not in self._data:
+                self._data[key] = (value, fresh_until, stale_until)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        return len(entries)
+
+    async def flush(self) -> None:
+        """Écrit les modifications en attente sur disque, hors de la boucle."""
+        if self.store is None:
+            return
+        async with self._flush_lock:
+            if not (self._dirty or self._evicted or self._touched or self._removed):
+                return
+            entries = [(k, *self._data[k]) for k in self._dirty if k in self._data]
+            entries += [(k, *entry) for k, entry in self._evicted.items()]
+            touched = list(self._touched - self._dirty - self._evicted.keys())
+            removed = list(self._removed)
+            self._dirty, self._touched, self._removed = set(), set(), set()
+            self._evicted = {}
+            try:
+                await asyncio.to_thread(self.store.write, entries, touched, removed)
+            except sqlite3.Error as e:
+                LOG.error("[AniList] Écriture du cache persistant impossible : %s", e)
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "pending": len(self._dirty) + len(self._evicted),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+        }
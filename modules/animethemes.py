@@ -129,9 +129,9 @@ async def random_opening_filtered(
             continue
         title, theme_label, video_url = got
 
-        # AniList lookup (core.query_anilist est sync → to_thread)
+        # AniList lookup (client asynchrone partagé)
         try:
-            data = await asyncio.to_thread(core.query_anilist, _ANILIST_QUERY, {"search": title})
+            data = await core.query_anilist(_ANILIST_QUERY, {"search": title})
             media_list = data.get("data", {}).get("Page", {}).get("media", []) or []
             if not media_list:
                 continue
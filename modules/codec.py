@@ -0,0 +1,160 @@
+"""
+Formats d'écriture des fichiers de données.
+
+- ``json``         : JSON indenté (lisible, format historique) ;
+- ``json-compact`` : JSON sans indentation ni espaces ;
+- ``packed``       : binaire pour les tables numériques indexées par ID
+  Discord (``{id: n}`` comme ``quiz_scores``, ou ``{id: {champ: n}}`` à
+  champs fixes comme ``quiz_levels``). Une donnée qui ne s'y prête pas est
+  écrite en ``json-compact``.
+
+La lecture (:func:`decode`) reconnaît le format toute seule : on peut
+changer de format sans convertir les fichiers existants.
+
+Format ``packed`` (petit-boutiste, par colonnes)::
+
+    b"ABPK" | version u8 | nb_champs u8 | (longueur u8 + nom UTF-8) * nb_champs
+    | nb_lignes u32 | ids u64 * nb_lignes | (valeurs i64 * nb_lignes) * max(1, nb_champs)
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+import sys
+from array import array
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+MAGIC = b"ABPK"
+VERSION = 1
+
+CODECS = ("json", "json-compact", "packed")
+
+
+def _columns(data: Any) -> Optional[Tuple[List[str], array, List[array]]]:
+    """Colonnes ``(champs, ids, valeurs)`` si ``data`` peut s'écrire en ``packed``, sinon ``None``."""
+    if not isinstance(data, dict) or not data:
+        return None
+    keys = list(data)
+    values = list(data.values())
+    try:
+        ids = array("Q", map(int, keys))
+        # Uniquement la forme canonique des IDs, pour retrouver exactement les mêmes clés
+        if ",".join(keys) != ",".join(map(str, ids)):
+            return None
+        kinds = set(map(type, values))
+        if kinds == {int}:
+            return [], ids, [array("q", values)]
+        if kinds != {dict}:
+            return None
+        fields = sorted(values[0])
+        if not fields or len(fields) > 255 or set(map(len, values)) != {len(fields)}:
+            return None
+        columns = []
+        for name in fields:
+            column = [v[name] for v in values]
+            if set(map(type, column)) != {int}:
+                return None
+            columns.append(array("q", column))
+    except (KeyError, TypeError, ValueError, OverflowError):
+        return None
+    if any(len(f.encode("utf-8")) > 255 for f in fields):
+        return None
+    return fields, ids, columns
+
+
+def _le(column: array) -> bytes:
+    if sys.byteorder == "big":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def _pack(fields: List[str], ids: array, columns: List[array]) -> bytes:
+    parts = [MAGIC, struct.pack("<BB", VERSION, len(fields))]
+    for name in fields:
+        raw = name.encode("utf-8")
+        parts.append(struct.pack("<B", len(raw)) + raw)
+    parts.append(struct.pack("<I", len(ids)))
+    parts.append(_le(ids))
+    parts.extend(_le(c) for c in columns)
+    return b"".join(parts)
+
+
+def _unpack(raw: bytes) -> Dict[str, Any]:
+    version, count = struct.unpack_from("<BB", raw, 4)
+    if version != VERSION:
+        raise ValueError(f"Version packed inconnue : {version}")
+    offset = 6
+    fields: List[str] = []
+    for _ in range(count):
+        (length,) = struct.unpack_from("<B", raw, offset)
+        fields.append(raw[offset + 1:offset + 1 + length].decode("utf-8"))
+        offset += 1 + length
+    (rows,) = struct.unpack_from("<I", raw, offset)
+    offset += 4
+    if len(raw) - offset != rows * 8 * (1 + max(1, len(fields))):
+        raise ValueError("Fichier packed tronqué")
+    columns = []
+    for typecode in "Q" + "q" * max(1, len(fields)):
+        column = array(typecode)
+        column.frombytes(raw[offset:offset + rows * 8])
+        if sys.byteorder == "big":
+            column.byteswap()
+        columns.append(column)
+        offset += rows * 8
+    keys = map(str, columns[0])
+    if not fields:
+        return dict(zip(keys, columns[1]))
+    return dict(zip(keys, (dict(zip(fields, row)) for row in zip(*columns[1:]))))
+
+
+def encode(data: Any, codec: str = "json") -> Union[str, bytes]:
+    """Sérialise ``data`` au format ``codec`` (``str`` pour JSON, ``bytes`` pour ``packed``)."""
+    if codec == "packed":
+        columns = _columns(data)
+        if columns is not None:
+            return _pack(*columns)
+        codec = "json-compact"
+    if codec == "json-compact":
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    if codec == "json":
+        return json.dumps(data, indent=2, ensure_ascii=False)
+    raise ValueError(f"Format inconnu : {codec}")
+
+
+def snapshot(data: Any, codec: str = "json") -> Union[str, bytes]:
+    """Copie sérialisée de ``data``, à prendre sur la boucle avant d'écrire depuis un thread.
+
+    Le JSON indenté passe par l'encodeur Python pur (``indent``) : on prend
+    ici la version compacte (encodeur C) et :func:`finish` l'indente dans le
+    thread d'écriture.
+    """
+    return encode(data, "json-compact" if codec == "json" else codec)
+
+
+def finish(raw: Union[str, bytes], codec: str = "json") -> Union[str, bytes]:
+    """Contenu final d'un :func:`snapshot` (appelé hors de la boucle)."""
+    if codec == "json" and isinstance(raw, str):
+        return encode(json.loads(raw), "json")
+    return raw
+
+
+def decode(raw: bytes) -> Any:
+    """Relit des données écrites par :func:`encode`, quel que soit le format."""
+    if raw.startswith(MAGIC):
+        try:
+            return _unpack(raw)
+        except struct.error as e:
+            raise ValueError(f"Fichier packed illisible : {e}") from e
+    return json.loads(raw.decode("utf-8"))
+
+
+def detect(raw: bytes) -> str:
+    """Nom du format d'un contenu (``json`` et ``json-compact`` ne sont pas distingués)."""
+    return "packed" if raw.startswith(MAGIC) else "json"
+
+
+def read_file(path: str) -> Any:
+    with open(path, "rb") as f:
+        return decode(f.read())
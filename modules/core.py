@@ -12,15 +12,18 @@ Ce module centralise toutes les fonctionnalités essentielles :
 from __future__ import annotations
 
 import asyncio
+import atexit
 import json
 import logging
 import os
 import re
 import unicodedata
 import random
+from array import array
+from collections import OrderedDict
+from bisect import bisect_right
 from datetime import datetime, timedelta, timezone
-from functools import lru_cache
-from typing import Any, Optional, Dict, List, Set, Union, Tuple, Iterable
+from typing import Any, Optional, Dict, List, NamedTuple, Sequence, Set, Union, Tuple, Iterable
 import discord
 import requests
 import pytz
@@ -31,6 +34,16 @@ from babel.dates import format_datetime
 from PIL import Image, ImageDraw, ImageFont
 import io
 
+from modules.airing import AiringIndex
+from modules.anilist import AniListClient
+from modules.medialist import MediaListMirror
+from modules import codec
+from modules.dedupe import DedupeStore
+from modules.indexes import InvertedIndex
+from modules.leaderboard import DisplayNames, Leaderboards
+from modules.store import ALL, DataStore, JsonBackend, JournaledJsonBackend, SharedJournalBackend, atomic_write
+from modules import sqlite_store
+
 # Configuration du logging
 logging.basicConfig(
     level=logging.INFO,
@@ -74,6 +87,12 @@ class FileConfig:
     CONFIG = os.path.join(DATA_DIR, "config.json")
     GUESSOP_SCORES = os.path.join(DATA_DIR, "guessop_scores.json")
     GUESSCHAR_SCORES = os.path.join(DATA_DIR, "guesschar_scores.json")
+    ANILIST_CACHE = os.path.join(DATA_DIR, "anilist_cache.sqlite3")
+    MEDIA_LISTS = os.path.join(DATA_DIR, "media_lists.json")
+    DATABASE = os.path.join(DATA_DIR, "animebot.sqlite3")
+    STREAKS = os.path.join(DATA_DIR, "streaks.json")
+    MISSIONS = os.path.join(DATA_DIR, "missions.json")
+    SENT_ALERTS = os.path.join(DATA_DIR, "sent_alerts")  # dossier des seaux journaliers
 
 # Variables d'environnement et constantes
 DISCORD_BOT_TOKEN = os.getenv("DISCORD_BOT_TOKEN")
@@ -81,6 +100,97 @@ ANILIST_USERNAME = os.getenv("ANILIST_USERNAME", "Zirnoixdcoco")
 TIMEZONE = pytz.timezone(os.getenv("BOT_TIMEZONE", "Europe/Paris"))
 OWNER_ID = 180389173985804288
 
+# Client AniList partagé (pool de connexions keep-alive)
+ANILIST_MAX_CONNECTIONS = int(os.getenv("ANILIST_MAX_CONNECTIONS", "10"))
+ANILIST_TIMEOUT = float(os.getenv("ANILIST_TIMEOUT", "10"))
+ANILIST_CACHE_SIZE = int(os.getenv("ANILIST_CACHE_SIZE", "2000"))
+ANILIST_BATCH_SIZE = int(os.getenv("ANILIST_BATCH_SIZE", "20"))
+ANILIST_BREAKER_FAILURES = int(os.getenv("ANILIST_BREAKER_FAILURES", "5"))
+ANILIST_BREAKER_RESET = float(os.getenv("ANILIST_BREAKER_RESET", "60"))
+anilist = AniListClient(
+    limit=ANILIST_MAX_CONNECTIONS,
+    limit_per_host=ANILIST_MAX_CONNECTIONS,
+    timeout=ANILIST_TIMEOUT,
+    cache_size=ANILIST_CACHE_SIZE,
+    cache_path=FileConfig.ANILIST_CACHE,
+    batch_size=ANILIST_BATCH_SIZE,
+    failure_threshold=ANILIST_BREAKER_FAILURES,
+    reset_timeout=ANILIST_BREAKER_RESET,
+)
+
+# Miroir local du planning AniList (synchronisé par bot.py)
+AIRING_WINDOW_DAYS = int(os.getenv("AIRING_WINDOW_DAYS", "8"))
+AIRING_WAIT_SECONDS = 10  # attente max de la première synchronisation par une commande
+airing_index = AiringIndex(anilist, days=AIRING_WINDOW_DAYS)
+
+# Miroir local des listes AniList (mises à jour incrémentales)
+MEDIA_LIST_TTL = int(os.getenv("MEDIA_LIST_TTL", "300"))
+media_lists = MediaListMirror(anilist, FileConfig.MEDIA_LISTS, ttl=MEDIA_LIST_TTL)
+
+# Fichiers de données servis depuis la mémoire, écrits en différé
+STORE_FLUSH_DELAY = float(os.getenv("STORE_FLUSH_DELAY", "2"))
+# Journal d'ajouts : une ligne par utilisateur modifié, compaction toutes les N lignes
+STORE_JOURNAL = os.getenv("STORE_JOURNAL", "0") == "1"
+STORE_JOURNAL_COMPACT = int(os.getenv("STORE_JOURNAL_COMPACT", "500"))
+# Format d'écriture : "json" (indenté), "json-compact" ou "packed" (binaire des tables numériques)
+STORE_CODEC = os.getenv("STORE_CODEC", "json")
+if STORE_CODEC not in codec.CODECS:
+    logger.warning(f"STORE_CODEC inconnu ({STORE_CODEC}), utilisation de json")
+    STORE_CODEC = "json"
+# Plusieurs instances sur le même data/ : journal partagé, écrit sous verrou à chaque modification
+STORE_SHARED = os.getenv("STORE_SHARED", "0") == "1"
+if STORE_SHARED:
+    _store_backend = SharedJournalBackend(STORE_JOURNAL_COMPACT, codec=STORE_CODEC)
+elif STORE_JOURNAL:
+    _store_backend = JournaledJsonBackend(STORE_JOURNAL_COMPACT, codec=STORE_CODEC)
+else:
+    _store_backend = JsonBackend(codec=STORE_CODEC)
+store = DataStore(flush_delay=STORE_FLUSH_DELAY, backend=_store_backend)
+atexit.register(store.close)
+
+# Moteur de stockage : "json" (un fichier par jeu de données) ou "sqlite" (une ligne par utilisateur)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "json").lower()
+database: Optional[sqlite_store.SqliteBackend] = None
+if STORAGE_BACKEND == "sqlite" and STORE_SHARED:
+    # Les tables SQLite sont écrites en différé, hors du journal partagé : une autre
+    # instance écraserait des lignes sans voir ces modifications
+    raise RuntimeError("STORE_SHARED=1 n'est pas compatible avec STORAGE_BACKEND=sqlite")
+if STORAGE_BACKEND == "sqlite":
+    database = sqlite_store.SqliteBackend(FileConfig.DATABASE, {
+        FileConfig.LEVELS: sqlite_store.LEVELS,
+        FileConfig.QUIZ_SCORES: sqlite_store.QUIZ_SCORES,
+        FileConfig.MINI_SCORES: sqlite_store.MINI_SCORES,
+        FileConfig.LINKED_USERS: sqlite_store.LINKS,
+        FileConfig.TRACKER: sqlite_store.TRACKER,
+    })
+    for _path in database.tables:
+        # Import unique des anciens fichiers JSON (laissés en place)
+        database.migrate(_path)
+    store.mount(database, *database.tables)
+
+# Classements tenus à jour à chaque modification (quiz, XP totale, un par mini-jeu)
+leaderboards = Leaderboards(store)
+# (avec STORAGE_BACKEND=sqlite, lus dans les colonnes indexées de quiz_scores / levels / mini_scores_items)
+leaderboards.register("quiz", FileConfig.QUIZ_SCORES, lambda score: int(score or 0), columns=("score",))
+leaderboards.register(
+    "xp", FileConfig.LEVELS, lambda d: total_xp(int(d.get("level", 0)), int(d.get("xp", 0))),
+    columns=("level", "xp"),
+)
+leaderboards.register_group("mini", FileConfig.MINI_SCORES, lambda games: games.items())
+display_names = DisplayNames()
+
+# Index inversés pour les boucles d'alertes : titre suivi -> utilisateurs, pseudo AniList -> comptes Discord
+# (pseudos en minuscules : AniList ne distingue pas la casse, un compte n'apparaît qu'une fois)
+tracker_index = InvertedIndex(store, FileConfig.TRACKER, lambda titles: map(str, titles))
+link_index = InvertedIndex(store, FileConfig.LINKED_USERS, lambda username: [str(username).strip().lower()])
+
+# Anti-doublon des alertes : un seau par jour en ajout seul, expiré d'un bloc
+ALERT_DEDUPE_DAYS = int(os.getenv("ALERT_DEDUPE_DAYS", "14"))
+sent_alerts = DedupeStore(
+    FileConfig.SENT_ALERTS, ttl_days=ALERT_DEDUPE_DAYS,
+    legacy=os.path.join(DATA_DIR, "sent_alerts.json"),  # ancien format, importé une fois
+)
+
 # Constantes pour les dates
 JOURS_FR = {
     "Monday": "Lundi", "Tuesday": "Mardi", "Wednesday": "Mercredi",
@@ -205,8 +315,8 @@ def load_json(path: str, default: Any) -> Any:
     if not os.path.exists(path):
         return default
     try:
-        with open(path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        # Format reconnu automatiquement (JSON ou packed)
+        return codec.read_file(path)
     except Exception as e:
         logger.error(f"Erreur lors du chargement de {path}: {e}")
         return default
@@ -220,9 +330,26 @@ def save_json(path: str, data: Any) -> None:
         data: Données à sauvegarder
     """
     try:
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-    except Exception as e:
+        # Remplacement atomique : jamais de fichier tronqué après un crash
+        atomic_write(path, codec.encode(data, STORE_CODEC))
+    except (OSError, TypeError, ValueError) as e:
+        logger.error(f"Erreur lors de la sauvegarde de {path}: {e}")
+
+
+async def save_json_async(path: str, data: Any) -> None:
+    """Comme :func:`save_json`, sans bloquer la boucle.
+
+    Les données sont copiées (sérialisées) sur la boucle ; la mise en forme et
+    l'écriture atomique se font dans un thread.
+
+    Args:
+        path: Chemin du fichier
+        data: Données à sauvegarder
+    """
+    try:
+        raw = codec.snapshot(data, STORE_CODEC)
+        await asyncio.to_thread(lambda: atomic_write(path, codec.finish(raw, STORE_CODEC)))
+    except (OSError, TypeError, ValueError) as e:
         logger.error(f"Erreur lors de la sauvegarde de {path}: {e}")
 
 
@@ -230,90 +357,264 @@ def save_json(path: str, data: Any) -> None:
 # Gestion des scores, niveaux et mini-jeux
 ###############################################################################
 
+XP_BASE = 50
+XP_GROWTH = 1.08
+
+
+def _xp_step(level: int) -> int:
+    return int(XP_BASE * (XP_GROWTH ** level))
+
+
+def _build_cumulative_xp() -> array:
+    """XP totale nécessaire pour atteindre chaque niveau (tant qu'elle tient sur 63 bits)."""
+    table = array("q", [0])
+    level = 0
+    while table[-1] + _xp_step(level) < 2 ** 62:
+        table.append(table[-1] + _xp_step(level))
+        level += 1
+    return table
+
+
+# CUMULATIVE_XP[n] = XP totale pour atteindre le niveau n (même courbe que xp_for_next_level)
+CUMULATIVE_XP = _build_cumulative_xp()
+MAX_LEVEL = len(CUMULATIVE_XP) - 1
+
+
 def xp_for_next_level(level: int) -> int:
-    base_xp = 50
-    growth = 1.08
-    return int(base_xp * (growth ** level))
+    if 0 <= level < MAX_LEVEL:
+        return CUMULATIVE_XP[level + 1] - CUMULATIVE_XP[level]
+    return _xp_step(level)
+
+
+def total_xp(level: int, xp: int) -> int:
+    """XP totale d'un joueur à partir de son niveau et de l'XP du niveau en cours."""
+    return CUMULATIVE_XP[min(max(level, 0), MAX_LEVEL)] + xp
+
+
+def level_for_total_xp(total: int, table: Sequence[int] = CUMULATIVE_XP) -> Tuple[int, int]:
+    """Niveau atteint avec ``total`` XP et XP restante dans ce niveau (recherche binaire)."""
+    level = max(0, bisect_right(table, total) - 1)
+    return level, total - table[level]
+
+
+def recompute_levels(levels: Dict[str, dict], old_table: Optional[Sequence[int]] = None) -> int:
+    """Recalcule niveau et XP de tous les joueurs, par exemple après un changement de courbe.
+
+    L'XP totale de chaque joueur est lue avec l'ancienne table cumulée, puis
+    replacée sur la courbe actuelle. Les totaux sont triés et parcourus en
+    même temps que la table : un seul passage au lieu d'une recherche par joueur.
+
+    Args:
+        levels: Contenu de ``quiz_levels`` (modifié sur place)
+        old_table: Table cumulée de l'ancienne courbe (par défaut : l'actuelle,
+            ce qui normalise les entrées incohérentes)
+
+    Returns:
+        Nombre de joueurs dont le niveau ou l'XP a changé
+    """
+    old_table = CUMULATIVE_XP if old_table is None else old_table
+    totals = sorted(
+        (old_table[min(max(int(d.get("level", 0)), 0), len(old_table) - 1)] + int(d.get("xp", 0)), uid)
+        for uid, d in levels.items()
+    )
+    changed = 0
+    level = 0
+    for total, uid in totals:
+        while level < MAX_LEVEL and CUMULATIVE_XP[level + 1] <= total:
+            level += 1
+        data = levels[uid]
+        new = (level, max(0, total - CUMULATIVE_XP[level]))
+        if (data.get("level"), data.get("xp")) != new:
+            data["level"], data["xp"] = new
+            changed += 1
+    return changed
 
 def load_scores() -> dict:
     """Charge les scores du quiz."""
-    return load_json(FileConfig.QUIZ_SCORES, {})
+    return store.get(FileConfig.QUIZ_SCORES, {})
 
 
 def save_scores(scores: dict) -> None:
     """Sauvegarde les scores du quiz."""
-    save_json(FileConfig.QUIZ_SCORES, scores)
+    store.set(FileConfig.QUIZ_SCORES, scores)
 
 
 def load_levels() -> dict:
     """Charge les niveaux des utilisateurs."""
-    return load_json(FileConfig.LEVELS, {})
+    return store.get(FileConfig.LEVELS, {})
 
 
 def save_levels(data: dict) -> None:
     """Sauvegarde les niveaux des utilisateurs."""
-    save_json(FileConfig.LEVELS, data)
+    store.set(FileConfig.LEVELS, data)
+
+
+class XpEvent(NamedTuple):
+    """Gain d'un joueur, à passer à :func:`award_xp` avec les autres gains de la manche.
+
+    Attributes:
+        user_id: ID Discord du joueur
+        amount: XP gagnée
+        source: Mini-jeu crédité d'un point dans ``mini_scores`` (``None`` : aucun)
+        score: Points de quiz ajoutés (ou retirés) dans ``quiz_scores``
+    """
+
+    user_id: int
+    amount: int
+    source: Optional[str] = None
+    score: int = 0
+
+
+class RankChange(NamedTuple):
+    """Niveau et rang d'un joueur avant et après un lot de gains."""
+
+    user_id: int
+    old_level: int
+    new_level: int
+    old_title: str
+    new_title: str
+
+    @property
+    def leveled(self) -> bool:
+        return self.new_level > self.old_level
+
+    @property
+    def promoted(self) -> bool:
+        return self.new_title != self.old_title
+
+
+def _apply_xp(data: dict, amount: int) -> None:
+    """Ajoute de l'XP à une entrée de ``quiz_levels`` et applique les passages de niveau."""
+    level = int(data.get("level", 0))
+    xp = int(data.get("xp", 0)) + int(amount)
+    if xp >= xp_for_next_level(level):
+        # Même courbe que partout (xp_for_next_level), via la table cumulée
+        level, xp = level_for_total_xp(total_xp(level, xp))
+    data["level"], data["xp"] = level, xp
+
+
+# Fichiers modifiés par un lot de gains (à inclure dans une transaction englobante)
+XP_FILES = (FileConfig.LEVELS, FileConfig.QUIZ_SCORES, FileConfig.MINI_SCORES)
+
+
+def apply_xp_events(events: Iterable[XpEvent]) -> List[RankChange]:
+    """Applique un lot de gains aux niveaux, scores de quiz et mini-scores.
+
+    Tous les fichiers touchés sont modifiés dans une même transaction du
+    store (tout ou rien, une seule écriture), qui rejoint celle de
+    l'appelant si elle couvre :data:`XP_FILES`. Un joueur présent plusieurs
+    fois dans le lot n'est traité qu'une fois (gains cumulés) ; ses niveaux
+    ne sont pas touchés si ce cumul est nul (partie sans XP, score seul).
+
+    Args:
+        events: Gains de la manche
+
+    Returns:
+        Un :class:`RankChange` par joueur dont l'XP change, dans l'ordre de
+        première apparition
+    """
+    xp: Dict[str, int] = {}
+    points: Dict[str, int] = {}
+    games: Dict[str, Dict[str, int]] = {}
+    for e in events:
+        uid = str(e.user_id)
+        xp[uid] = xp.get(uid, 0) + int(e.amount)
+        if e.score:
+            points[uid] = points.get(uid, 0) + int(e.score)
+        if e.source:
+            per_user = games.setdefault(uid, {})
+            per_user[e.source] = per_user.get(e.source, 0) + 1
+    # Aucune ligne de niveau créée ni réécrite pour un gain nul
+    xp = {uid: amount for uid, amount in xp.items() if amount}
+
+    changes: List[RankChange] = []
+
+    def level_up(levels: dict) -> None:
+        for uid, amount in xp.items():
+            data = levels.setdefault(uid, {"xp": 0, "level": 0})
+            old_level = int(data.get("level", 0))
+            _apply_xp(data, amount)
+            changes.append(RankChange(
+                int(uid), old_level, data["level"],
+                get_title_for_global_level(old_level), get_title_for_global_level(data["level"]),
+            ))
+
+    def add_points(scores: dict) -> None:
+        for uid, delta in points.items():
+            scores[uid] = max(0, scores.get(uid, 0) + delta)
+
+    def add_games(mini: dict) -> None:
+        for uid, per_user in games.items():
+            entry = mini.setdefault(uid, {})
+            for game, n in per_user.items():
+                entry[game] = entry.get(game, 0) + n
+
+    with store.transaction(*XP_FILES):
+        if xp:
+            store.update(FileConfig.LEVELS, xp, level_up)
+        if points:
+            store.update(FileConfig.QUIZ_SCORES, points, add_points)
+        if games:
+            store.update(FileConfig.MINI_SCORES, games, add_games)
+    return changes
+
+
+async def announce_rank_changes(channel, changes: Iterable[RankChange]) -> None:
+    """Annonce en un seul message les joueurs qui changent de rang."""
+    lines = [
+        f"🎉 **<@{c.user_id}>** atteint le rang **{c.new_title}** (niv. {c.new_level}) !"
+        for c in changes if c.promoted
+    ]
+    if not lines or channel is None:
+        return
+    try:
+        await channel.send("\n".join(lines))
+    except Exception:
+        pass
+
+
+async def award_xp(channel, events: Iterable[XpEvent], announce: bool = True) -> List[RankChange]:
+    """Applique un lot de gains (:func:`apply_xp_events`) et annonce les nouveaux rangs.
+
+    Args:
+        channel: Salon des annonces
+        events: Gains de la manche
+        announce: Annoncer les changements de rang
+
+    Returns:
+        Les changements de niveau/rang de chaque joueur
+    """
+    changes = apply_xp_events(events)
+    if announce:
+        await announce_rank_changes(channel, changes)
+    return changes
 
 
-# core.py
 async def add_xp(bot, channel, user_id: int, amount: int, announce: bool = True):
-    levels = load_levels()
-    key = str(user_id)
-    data = levels.get(key, {"xp": 0, "level": 0})
-
-    old_level = int(data.get("level", 0))
-    old_title = get_title_for_global_level(old_level)  # <-- rang AVANT
-
-    # Ajout d’XP
-    data["xp"] = int(data.get("xp", 0)) + int(amount)
-
-    # Level-up avec la même courbe que partout (xp_for_next_level)
-    leveled = False
-    while True:
-        need = xp_for_next_level(int(data["level"]))
-        if data["xp"] < need:
-            break
-        data["xp"] -= need
-        data["level"] = int(data["level"]) + 1
-        leveled = True
-
-    levels[key] = data
-    save_levels(levels)
-
-    # Nouveau rang APRES
-    new_level = int(data["level"])
-    new_title = get_title_for_global_level(new_level)
-
-    # 👉 Annoncer UNIQUEMENT si rang (titre) a changé
-    if announce and (new_title != old_title):
-        try:
-            await channel.send(
-                f"🎉 **<@{user_id}>** atteint le rang **{new_title}** (niv. {new_level}) !"
-            )
-        except Exception:
-            pass
+    """Ajoute de l'XP à un joueur (un lot d'un seul gain, voir :func:`award_xp`)."""
+    changes = await award_xp(channel, [XpEvent(user_id, amount)], announce=announce)
+    if changes:
+        (change,) = changes
+    else:
+        level = int(load_levels().get(str(user_id), {}).get("level", 0))
+        title = get_title_for_global_level(level)
+        change = RankChange(user_id, level, level, title, title)
+    return {"leveled": change.leveled, "old_level": change.old_level, "new_level": change.new_level,
+            "old_title": change.old_title, "new_title": change.new_title}
+
+# Seuils des rangs, pour une recherche binaire
+_GLOBAL_TITLE_LEVELS = [req for req, _ in LEVEL_TITLES_GLOBAL]
+_QUIZ_TITLE_SCORES = [req for req, _ in LEVEL_TITLES_QUIZ]
 
-    return {"leveled": leveled, "old_level": old_level, "new_level": new_level,
-            "old_title": old_title, "new_title": new_title}
 
 def get_title_for_global_level(level: int) -> str:
-    current_title = LEVEL_TITLES_GLOBAL[0][1]
-    for req_level, title in LEVEL_TITLES_GLOBAL:
-        if level >= req_level:
-            current_title = title
-        else:
-            break
-    return current_title
+    i = bisect_right(_GLOBAL_TITLE_LEVELS, level) - 1
+    return LEVEL_TITLES_GLOBAL[max(i, 0)][1]
 
 
 def get_title_for_quiz_score(score: int) -> str:
-    current_title = LEVEL_TITLES_QUIZ[0][1]
-    for req_score, title in LEVEL_TITLES_QUIZ:
-        if score >= req_score:
-            current_title = title
-        else:
-            break
-    return current_title
+    i = bisect_right(_QUIZ_TITLE_SCORES, score) - 1
+    return LEVEL_TITLES_QUIZ[max(i, 0)][1]
 
 
 def format_airing_datetime_fr(ts: int, tz_name: str = "Europe/Paris") -> str:
@@ -327,11 +628,54 @@ def format_airing_datetime_fr(ts: int, tz_name: str = "Europe/Paris") -> str:
     return f"{wd} {dt_local.day} {mo} {dt_local:%H:%M}"
 
 
-def get_next_airing_one() -> Optional[Dict[str, Any]]:
+def _airing_item(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Met une diffusion de l'index au format des fonctions ``get_*_airing_*``."""
+    m = entry.get("media") or {}
+    t = m.get("title") or {}
+    cover = m.get("coverImage") or {}
+    return {
+        "mediaId": entry.get("mediaId"),
+        "airingAt": entry.get("airingAt"),
+        "episode": entry.get("episode"),
+        "title_romaji": t.get("romaji"),
+        "title_english": t.get("english"),
+        "title_native": t.get("native"),
+        "cover": cover.get("extraLarge") or cover.get("large"),
+        "genres": m.get("genres") or [],
+        "format": m.get("format"),
+        "season": m.get("season"),
+        "seasonYear": m.get("seasonYear"),
+    }
+
+
+def _next_episode(media: Dict[str, Any], after: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """Prochain épisode d'un média : index local d'abord, sinon ``nextAiringEpisode``.
+
+    Le ``nextAiringEpisode`` du miroir de listes date de la dernière lecture
+    de l'entrée : une date déjà passée n'est pas renvoyée.
+    """
+    if airing_index.ready and media.get("id"):
+        entry = airing_index.next_for_media(media["id"], after)
+        if entry:
+            return {"airingAt": entry["airingAt"], "episode": entry["episode"]}
+    nae = media.get("nextAiringEpisode")
+    if not nae or not nae.get("airingAt"):
+        return None
+    if int(nae["airingAt"]) <= (after if after is not None else int(time.time())):
+        return None
+    return nae
+
+
+async def get_next_airing_one() -> Optional[Dict[str, Any]]:
     """
     Récupère le tout prochain épisode à sortir (global).
     Champs : title_*, episode, airingAt, cover, genres
     """
+    if airing_index.ready:
+        entry = airing_index.next_airing()
+        if entry:
+            return _airing_item(entry)
+
     query = """
     query {
       Page(perPage: 1){
@@ -348,7 +692,7 @@ def get_next_airing_one() -> Optional[Dict[str, Any]]:
       }
     }
     """
-    data = query_anilist(query, variables=None)
+    data = await query_anilist(query, variables=None)
     schedules = (data or {}).get("data", {}).get("Page", {}).get("airingSchedules", []) or []
     if not schedules:
         return None
@@ -366,26 +710,30 @@ def get_next_airing_one() -> Optional[Dict[str, Any]]:
         "genres": m.get("genres") or [],
     }
 
-def get_next_airing_for_title(title: str):
-    """Retourne les infos du prochain épisode pour un titre donné."""
-    query = '''
-    query ($search: String) {
-      Media(type: ANIME, search: $search) {
+async def get_next_airing_for_title(title: str):
+    """Retourne les infos du prochain épisode pour un titre donné.
+
+    Répond depuis le planning local quand le titre y figure ; sinon, les
+    appels concurrents sont regroupés en une seule requête AniList.
+    """
+    if airing_index.ready:
+        entry = airing_index.next_for_title(title)
+        if entry:
+            return _airing_item(entry)
+
+    selection = '''{
         title { romaji english native }
         nextAiringEpisode { episode airingAt }
         coverImage { large extraLarge }
         format
         season
         seasonYear
-      }
-    }
-    '''
+      }'''
     try:
-        result = query_anilist(query, {"search": title})
-        if not result or "data" not in result or not result["data"]["Media"]:
-            return None
-        media = result["data"]["Media"]
-        if not media.get("nextAiringEpisode"):
+        media = await anilist.fetch(
+            "Media", {"type": ("MediaType", "ANIME"), "search": ("String", title)}, selection
+        )
+        if not media or not media.get("nextAiringEpisode"):
             return None
         return {
             "title_romaji": media["title"]["romaji"],
@@ -405,12 +753,12 @@ def get_next_airing_for_title(title: str):
 
 def load_mini_scores() -> dict:
     """Charge les scores des mini-jeux."""
-    return load_json(FileConfig.MINI_SCORES, {})
+    return store.get(FileConfig.MINI_SCORES, {})
 
 
 def save_mini_scores(data: dict) -> None:
     """Sauvegarde les scores des mini-jeux."""
-    save_json(FileConfig.MINI_SCORES, data)
+    store.set(FileConfig.MINI_SCORES, data)
 
 
 def add_mini_score(user_id: int, game: str, amount: int = 1) -> None:
@@ -421,17 +769,18 @@ def add_mini_score(user_id: int, game: str, amount: int = 1) -> None:
         game: Nom du mini-jeu
         amount: Points à ajouter
     """
-    data = load_mini_scores()
     uid = str(user_id)
-    data.setdefault(uid, {})
-    data[uid][game] = data[uid].get(game, 0) + amount
-    save_mini_scores(data)
+
+    def add(data: dict) -> None:
+        data.setdefault(uid, {})
+        data[uid][game] = data[uid].get(game, 0) + amount
+
+    store.update(FileConfig.MINI_SCORES, [uid], add)
 
 
 def get_mini_scores(user_id: int) -> dict:
-    """Récupère tous les scores mini-jeux d'un utilisateur."""
-    data = load_mini_scores()
-    return data.get(str(user_id), {})
+    """Récupère tous les scores mini-jeux d'un utilisateur (copie)."""
+    return dict(get_profile(user_id).mini_scores)
 
 
 ###############################################################################
@@ -440,12 +789,21 @@ def get_mini_scores(user_id: int) -> dict:
 
 def load_links() -> dict:
     """Charge les liens entre comptes Discord et AniList."""
-    return load_json(FileConfig.LINKED_USERS, {})
+    return store.get(FileConfig.LINKED_USERS, {})
+
 
+def save_links(data: dict, *user_ids: Any) -> None:
+    """Sauvegarde les liens entre comptes.
 
-def save_links(data: dict) -> None:
-    """Sauvegarde les liens entre comptes."""
-    save_json(FileConfig.LINKED_USERS, data)
+    Args:
+        data: Liens (l'objet renvoyé par :func:`load_links`)
+        user_ids: Seuls comptes modifiés (mise à jour ciblée de l'index ``link_index``) ;
+            aucun = tout le fichier remplacé
+    """
+    if user_ids:
+        store.mark_dirty(FileConfig.LINKED_USERS, *user_ids)
+    else:
+        store.set(FileConfig.LINKED_USERS, data)
 
 
 def get_user_anilist(user_id: int) -> Optional[str]:
@@ -459,32 +817,41 @@ def get_user_stats(user_id: int):
 
 def load_preferences() -> dict:
     """Charge les préférences utilisateurs."""
-    return load_json(FileConfig.PREFERENCES, {})
+    return store.get(FileConfig.PREFERENCES, {})
 
 
 def save_preferences(data: dict) -> None:
     """Sauvegarde les préférences utilisateurs."""
-    save_json(FileConfig.PREFERENCES, data)
+    store.set(FileConfig.PREFERENCES, data)
 
 
 def load_user_settings() -> dict:
     """Charge les paramètres utilisateurs."""
-    return load_json(FileConfig.USER_SETTINGS, {})
+    return store.get(FileConfig.USER_SETTINGS, {})
 
 
 def save_user_settings(settings: dict) -> None:
     """Sauvegarde les paramètres utilisateurs."""
-    save_json(FileConfig.USER_SETTINGS, settings)
+    store.set(FileConfig.USER_SETTINGS, settings)
 
 
 def load_tracker() -> dict:
     """Charge le tracker d'animes."""
-    return load_json(FileConfig.TRACKER, {})
+    return store.get(FileConfig.TRACKER, {})
+
 
+def save_tracker(data: dict, *user_ids: Any) -> None:
+    """Sauvegarde le tracker d'animes.
 
-def save_tracker(data: dict) -> None:
-    """Sauvegarde le tracker d'animes."""
-    save_json(FileConfig.TRACKER, data)
+    Args:
+        data: Tracker (l'objet renvoyé par :func:`load_tracker`)
+        user_ids: Seuls utilisateurs modifiés (mise à jour ciblée de ``tracker_index``) ;
+            aucun = tout le fichier remplacé
+    """
+    if user_ids:
+        store.mark_dirty(FileConfig.TRACKER, *user_ids)
+    else:
+        store.set(FileConfig.TRACKER, data)
 
 
 ###############################################################################
@@ -495,24 +862,25 @@ def save_tracker(data: dict) -> None:
 import time  # en haut du fichier
 
 
-import requests
+async def query_anilist(query: str, variables: dict = None) -> dict:
+    """Exécute une requête GraphQL AniList sans bloquer la boucle.
+
+    Args:
+        query: Document GraphQL
+        variables: Variables de la requête
+
+    Returns:
+        La réponse JSON, ou ``{}`` en cas d'erreur
+    """
+    return await anilist.query(query, variables)
 
-def query_anilist(query: str, variables: dict = None) -> dict:
-    url = "https://graphql.anilist.co"
-    headers = {
-        "Content-Type": "application/json",
-        "Accept": "application/json"
-    }
-    payload = {"query": query, "variables": variables or {}}
 
+def query_anilist_sync(query: str, variables: dict = None) -> dict:
+    """Shim bloquant de :func:`query_anilist` (threads et scripts uniquement)."""
     try:
-        response = requests.post(url, json=payload, headers=headers)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return {}
+        return anilist.query_sync(query, variables)
     except Exception as e:
-        print(f"[AniList] Erreur : {e}")
+        logger.error(f"[AniList] Erreur : {e}")
         return {}
 
 def load_cached_titles() -> list[dict]:
@@ -521,60 +889,44 @@ def load_cached_titles() -> list[dict]:
             return json.load(f)
     return []
     
-def get_upcoming_episodes(username: str) -> list[dict]:
+async def get_upcoming_episodes(username: str) -> list[dict]:
     """Récupère les prochains épisodes pour un utilisateur.
 
+    La liste vient du miroir local (mis à jour de façon incrémentale) et les
+    dates de diffusion du planning local : aucun téléchargement complet.
+
     Args:
         username: Nom d'utilisateur AniList
 
     Returns:
         Liste des épisodes à venir avec leurs informations
     """
-    query = '''
-    query ($name: String) {
-      MediaListCollection(userName: $name, type: ANIME) {
-        lists {
-          entries {
-            media {
-              id
-              title { romaji }
-              coverImage { extraLarge }
-              nextAiringEpisode { airingAt episode }
-              genres
-            }
-          }
-        }
-      }
-    }
-    '''
     try:
-        data = query_anilist(query, {"name": username})
-        if not data or "data" not in data:
-            return []
+        entries = await media_lists.entries(username)
+        await airing_index.wait_ready(AIRING_WAIT_SECONDS)
 
         episodes = []
-        for lst in data["data"]["MediaListCollection"]["lists"]:
-            for entry in lst["entries"]:
-                media = entry.get("media", {})
-                next_ep = media.get("nextAiringEpisode")
-                if not next_ep:
-                    continue
-
-                episodes.append({
-                    "mediaId": media.get("id"),
-                    "title": media["title"]["romaji"],
-                    "episode": next_ep["episode"],
-                    "airingAt": next_ep["airingAt"],
-                    "genres": media.get("genres", []),
-                    "image": media.get("coverImage", {}).get("extraLarge")
-                })
+        for entry in entries:
+            media = entry.get("media") or {}
+            next_ep = _next_episode(media)
+            if not next_ep:
+                continue
+
+            episodes.append({
+                "mediaId": media.get("id"),
+                "title": (media.get("title") or {}).get("romaji"),
+                "episode": next_ep["episode"],
+                "airingAt": next_ep["airingAt"],
+                "genres": media.get("genres", []),
+                "image": (media.get("coverImage") or {}).get("extraLarge")
+            })
         return episodes
     except Exception as e:
         logger.error(f"Erreur récupération épisodes: {e}")
         return []
 
 
-def get_anime_details(media_id: int) -> Optional[dict]:
+async def get_anime_details(media_id: int) -> Optional[dict]:
     """Récupère les détails d'un anime spécifique.
 
     Args:
@@ -583,9 +935,7 @@ def get_anime_details(media_id: int) -> Optional[dict]:
     Returns:
         Détails de l'anime ou None en cas d'erreur
     """
-    query = '''
-    query ($id: Int) {
-      Media(id: $id) {
+    selection = '''{
         id
         title { romaji english native }
         description
@@ -602,20 +952,16 @@ def get_anime_details(media_id: int) -> Optional[dict]:
         averageScore
         popularity
         studios { nodes { name } }
-      }
-    }
-    '''
+      }'''
     try:
-        data = query_anilist(query, {"id": media_id})
-        return data["data"]["Media"] if data and "data" in data else None
+        return await anilist.fetch("Media", {"id": ("Int", media_id)}, selection)
     except Exception as e:
         logger.error(f"Erreur récupération détails anime: {e}")
         return None
 
 
-@lru_cache(maxsize=100)
-def get_character_details(char_id: int) -> Optional[dict]:
-    """Récupère les détails d'un personnage (avec cache).
+async def get_character_details(char_id: int) -> Optional[dict]:
+    """Récupère les détails d'un personnage (mis en cache 24 h par le client AniList).
 
     Args:
         char_id: ID du personnage sur AniList
@@ -623,9 +969,7 @@ def get_character_details(char_id: int) -> Optional[dict]:
     Returns:
         Détails du personnage ou None en cas d'erreur
     """
-    query = '''
-    query ($id: Int) {
-      Character(id: $id) {
+    selection = '''{
         name { full native }
         image { large }
         description
@@ -638,12 +982,9 @@ def get_character_details(char_id: int) -> Optional[dict]:
             type
           }
         }
-      }
-    }
-    '''
+      }'''
     try:
-        data = query_anilist(query, {"id": char_id})
-        return data["data"]["Character"] if data and "data" in data else None
+        return await anilist.fetch("Character", {"id": ("Int", char_id)}, selection)
     except Exception as e:
         logger.error(f"Erreur récupération personnage: {e}")
         return None
@@ -1039,7 +1380,7 @@ def get_xp_bar(xp: int, next_xp: int, length: int = 20) -> str:
 
 def get_config() -> dict:
     """Charge la configuration globale du bot."""
-    config = load_json(FileConfig.CONFIG, {})
+    config = store.get(FileConfig.CONFIG, {})
     if not config:
         config.update({
             "channel_id": None,
@@ -1053,7 +1394,7 @@ def get_config() -> dict:
 
 def save_config(config: dict) -> None:
     """Sauvegarde la configuration globale du bot."""
-    save_json(FileConfig.CONFIG, config)
+    store.set(FileConfig.CONFIG, config)
 
 
 def should_notify(ep: dict) -> bool:
@@ -1074,51 +1415,22 @@ def should_notify(ep: dict) -> bool:
 
     return abs(ep["airingAt"] - now) <= delay
 
-def get_my_next_airing_one() -> Optional[Dict[str, Any]]:
-    """
-    Prochain épisode à sortir pour l'utilisateur défini par ANILIST_USERNAME.
-    Parcourt toute la liste CURRENT (pagination) et prend le plus proche dans le futur.
-    """
-    username = os.getenv("ANILIST_USERNAME")
-    if not username:
-        return None
+async def _next_airing_from_list(username: str) -> Optional[Dict[str, Any]]:
+    """Prochain épisode à sortir parmi les animes en cours (CURRENT) d'un utilisateur."""
+    entries = await media_lists.entries(username, {"CURRENT"})
+    await airing_index.wait_ready(AIRING_WAIT_SECONDS)
 
-    query = """
-    query ($userName:String, $page:Int, $perPage:Int){
-      Page(page:$page, perPage:$perPage){
-        pageInfo{ hasNextPage }
-        mediaList(userName:$userName, status:CURRENT, type:ANIME){
-          media{
-            id
-            title{ romaji english native }
-            coverImage{ extraLarge large }
-            genres
-            nextAiringEpisode{ airingAt episode }
-          }
-        }
-      }
-    }
-    """
-
-    page = 1
-    per_page = 50
     now = int(datetime.now(timezone.utc).timestamp())
     best: Optional[Dict[str, Any]] = None
-
-    while True:
-        data = query_anilist(query, variables={"userName": username, "page": page, "perPage": per_page})
-        page_data = (data or {}).get("data", {}).get("Page", {}) or {}
-        entries = page_data.get("mediaList", []) or []
-
-        for e in entries:
-            m = e.get("media") or {}
-            nae = m.get("nextAiringEpisode") or {}
-            airing = nae.get("airingAt")
-            if not airing or airing < now:
-                continue
-
+    for entry in entries:
+        m = entry.get("media") or {}
+        nae = _next_episode(m, now) or {}
+        airing = nae.get("airingAt")
+        if not airing or airing < now:
+            continue
+        if best is None or airing < best["airingAt"]:
             t = m.get("title") or {}
-            item = {
+            best = {
                 "airingAt": airing,
                 "episode": nae.get("episode"),
                 "title_romaji": t.get("romaji"),
@@ -1128,22 +1440,25 @@ def get_my_next_airing_one() -> Optional[Dict[str, Any]]:
                           or (m.get("coverImage") or {}).get("large")),
                 "genres": m.get("genres") or [],
             }
+    return best
 
-            if best is None or airing < best["airingAt"]:
-                best = item
-
-        if not page_data.get("pageInfo", {}).get("hasNextPage"):
-            break
-        page += 1
 
-    return best
+async def get_my_next_airing_one() -> Optional[Dict[str, Any]]:
+    """
+    Prochain épisode à sortir pour l'utilisateur défini par ANILIST_USERNAME.
+    Parcourt la liste CURRENT (miroir local) et prend le plus proche dans le futur.
+    """
+    username = os.getenv("ANILIST_USERNAME")
+    if not username:
+        return None
+    return await _next_airing_from_list(username)
 
 def get_linked_anilist(discord_id: int):
     """Retourne le pseudo AniList lié à un utilisateur Discord."""
     links = load_links()
     return links.get(str(discord_id))
 
-def get_anilist_stats(username: str) -> Optional[Dict[str, Any]]:
+async def get_anilist_stats(username: str) -> Optional[Dict[str, Any]]:
     """
     Récupère les stats AniList d'un utilisateur.
     Retourne: {count, minutesWatched, meanScore, favoriteGenre}
@@ -1162,7 +1477,7 @@ def get_anilist_stats(username: str) -> Optional[Dict[str, Any]]:
       }
     }
     """
-    data = query_anilist(query, {"name": username}) or {}
+    data = await query_anilist(query, {"name": username}) or {}
     user = (data.get("data") or {}).get("User") or None
     if not user:
         return None
@@ -1180,7 +1495,7 @@ def get_anilist_stats(username: str) -> Optional[Dict[str, Any]]:
         "favoriteGenre": fav_genre or "—",
     }
 
-def get_anilist_stats_for_discord(discord_id: int, fallback_env: bool = True) -> Optional[Dict[str, Any]]:
+async def get_anilist_stats_for_discord(discord_id: int, fallback_env: bool = True) -> Optional[Dict[str, Any]]:
     """
     Stats pour un utilisateur Discord:
     - si lié: son AniList
@@ -1191,7 +1506,7 @@ def get_anilist_stats_for_discord(discord_id: int, fallback_env: bool = True) ->
         username = os.getenv("ANILIST_USERNAME")
     if not username:
         return None
-    return get_anilist_stats(username)
+    return await get_anilist_stats(username)
 
 def humanize_minutes(total_minutes: int) -> str:
     """Convertit des minutes en 'Xd Yh Zm' propre."""
@@ -1205,62 +1520,101 @@ def humanize_minutes(total_minutes: int) -> str:
     if minutes or not parts: parts.append(f"{minutes}m")
     return " ".join(parts)
     
-def get_user_next_airing_one(username: str):
+async def get_user_next_airing_one(username: str):
     """
     Retourne le prochain épisode à venir pour un utilisateur AniList.
     """
-    query = """
-    query ($userName: String) {
-      MediaListCollection(userName: $userName, type: ANIME, status_in: [CURRENT]) {
-        lists {
-          entries {
-            media {
-              title {
-                romaji
-                english
-                native
-              }
-              coverImage {
-                large
-              }
-              genres
-              nextAiringEpisode {
-                episode
-                airingAt
-              }
-            }
-          }
-        }
-      }
-    }
+    return await _next_airing_from_list(username)
+
+###############################################################################
+# Mini-jeux et quiz
+###############################################################################
+
+class UserProfile(NamedTuple):
+    """Vue d'un joueur assemblée depuis le store (niveaux, quiz, mini-jeux, série).
+
+    Obtenue avec :func:`get_profile` ; les champs sont des copies, les
+    modifier ne touche pas aux données.
     """
-    data = query_anilist(query, {"userName": username})
 
-    entries = []
-    for lst in data.get("MediaListCollection", {}).get("lists", []):
-        for entry in lst.get("entries", []):
-            media = entry.get("media")
-            if media.get("nextAiringEpisode"):
-                entries.append(media)
+    user_id: int
+    level: int
+    xp: int
+    quiz_score: int
+    mini_scores: Dict[str, int]
+    streak: int
+    best_streak: int
 
-    if not entries:
-        return None
+    @property
+    def next_xp(self) -> int:
+        return xp_for_next_level(self.level)
 
-    entries.sort(key=lambda m: m["nextAiringEpisode"]["airingAt"])
-    m = entries[0]
-    return {
-        "title_romaji": m["title"].get("romaji"),
-        "title_english": m["title"].get("english"),
-        "title_native": m["title"].get("native"),
-        "cover": m["coverImage"]["large"],
-        "episode": m["nextAiringEpisode"]["episode"],
-        "airingAt": m["nextAiringEpisode"]["airingAt"],
-        "genres": m.get("genres", [])
-    }
+    @property
+    def title(self) -> str:
+        return get_title_for_global_level(self.level)
+
+    @property
+    def quiz_title(self) -> str:
+        return get_title_for_quiz_score(self.quiz_score)
+
+    def badge_counts(self) -> Dict[str, int]:
+        """Compteurs utilisés par les badges : mini-jeux + ``streak_days``."""
+        return {**self.mini_scores, "streak_days": self.streak}
+
+
+# Profils déjà assemblés (LRU), invalidés à chaque modification des fichiers sources
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "1000"))
+# Écart minimal entre deux vérifications des écritures des autres instances (moteur partagé)
+PROFILE_POLL_INTERVAL = 1.0
+_PROFILES: "OrderedDict[str, UserProfile]" = OrderedDict()
+_PROFILE_SOURCES = (FileConfig.LEVELS, FileConfig.QUIZ_SCORES, FileConfig.MINI_SCORES, FileConfig.STREAKS)
+_profiles_polled_at = 0.0
+
+
+def _invalidate_profiles(data: Any, keys: Set[str]) -> None:
+    if ALL in keys:
+        _PROFILES.clear()
+    else:
+        for key in keys:
+            _PROFILES.pop(key, None)
+
+
+for _path in _PROFILE_SOURCES:
+    store.add_listener(_path, _invalidate_profiles)
+
+
+def get_profile(user_id: int) -> UserProfile:
+    """Profil complet d'un joueur, en une lecture du store (mis en cache)."""
+    global _profiles_polled_at
+    uid = str(user_id)
+    profile = _PROFILES.get(uid)
+    if profile is not None:
+        now = time.monotonic()
+        if now - _profiles_polled_at >= PROFILE_POLL_INTERVAL:
+            # Écritures des autres instances : le rattrapage invalide le cache (observateurs)
+            _profiles_polled_at = now
+            for path in _PROFILE_SOURCES:
+                store.refresh_if_changed(path)
+            profile = _PROFILES.get(uid)
+    if profile is not None:
+        _PROFILES.move_to_end(uid)
+        return profile
+    # store.get() vérifie lui-même les écritures des autres instances
+    level = load_levels().get(uid, {})
+    streak = store.get(FileConfig.STREAKS, {}).get(uid, {})
+    profile = _PROFILES[uid] = UserProfile(
+        user_id=int(user_id),
+        level=int(level.get("level", 0)),
+        xp=int(level.get("xp", 0)),
+        quiz_score=int(load_scores().get(uid, 0)),
+        mini_scores=dict(load_mini_scores().get(uid, {})),
+        streak=int(streak.get("streak", 0)),
+        best_streak=int(streak.get("best", 0)),
+    )
+    if len(_PROFILES) > PROFILE_CACHE_SIZE:
+        _PROFILES.popitem(last=False)
+    return profile
 
-###############################################################################
-# Mini-jeux et quiz
-###############################################################################
 
 def get_game_stats(user_id: int) -> dict:
     """Récupère les statistiques complètes d'un utilisateur.
@@ -1271,21 +1625,15 @@ def get_game_stats(user_id: int) -> dict:
     Returns:
         Dictionnaire avec toutes les stats
     """
-    levels = load_levels()
-    scores = load_scores()
-    mini_scores = get_mini_scores(user_id)
-
-    user_data = levels.get(str(user_id), {"xp": 0, "level": 0})
-    quiz_score = scores.get(str(user_id), 0)
-
+    profile = get_profile(user_id)
     return {
-        "xp": user_data["xp"],
-        "level": user_data["level"],
-        "next_xp": (user_data["level"] + 1) * 100,
-        "quiz_score": quiz_score,
-        "mini_scores": mini_scores,
-        "title": get_title_for_global_level(user_data["level"]),
-        "quiz_title": get_title_for_quiz_score(quiz_score),
+        "xp": profile.xp,
+        "level": profile.level,
+        "next_xp": (profile.level + 1) * 100,
+        "quiz_score": profile.quiz_score,
+        "mini_scores": dict(profile.mini_scores),
+        "title": profile.title,
+        "quiz_title": profile.quiz_title,
     }
 
 
@@ -1323,7 +1671,8 @@ def check_files() -> None:
     os.makedirs(os.path.join(ASSETS_DIR, "audio", "openings"), exist_ok=True)
 
     for path in vars(FileConfig).values():
-        if isinstance(path, str) and not os.path.exists(path):
+        # Seuls les fichiers JSON sont initialisés (le cache AniList est une base SQLite)
+        if isinstance(path, str) and path.endswith(".json") and not os.path.exists(path):
             save_json(path, {})
 
 
@@ -0,0 +1,242 @@
+"""
+Mémoire anti-doublon des alertes envoyées, rangée par jour.
+
+Chaque clé envoyée (``titre|épisode|label``...) est ajoutée au seau du jour
+(UTC). Un seau est un fichier ``<dossier>/<AAAA-MM-JJ>.log`` auquel on ne
+fait qu'ajouter une ligne par clé ; l'expiration supprime les seaux plus
+vieux que ``ttl_days`` d'un coup (un fichier, un ensemble en mémoire) au
+lieu de parcourir chaque entrée. L'appartenance est une recherche dans un
+dictionnaire clé -> jour.
+
+Les alertes de salon (``cogs/alerts.py``) et les MP du tracker
+(``cogs/tracker.py``) partagent la même instance, ``core.sent_alerts`` ;
+les clés du tracker sont préfixées par ``track|``.
+
+Mémoire et disque restent bornés par ``ttl_days`` quelle que soit la durée
+de fonctionnement. Plusieurs instances sur le même dossier voient les
+envois des autres à chaque :meth:`DedupeStore.refresh` : le dossier est
+parcouru et les ajouts lus dans un thread, puis appliqués sur la boucle.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from modules import codec
+
+LOG = logging.getLogger(__name__)
+
+DAY = 86400
+
+
+def _day(ts: float) -> int:
+    return int(ts // DAY)
+
+
+def _bucket_name(day: int) -> str:
+    return datetime.fromtimestamp(day * DAY, tz=timezone.utc).strftime("%Y-%m-%d") + ".log"
+
+
+def _parse_bucket(name: str) -> Optional[int]:
+    if not name.endswith(".log"):
+        return None
+    try:
+        dt = datetime.strptime(name[:-4], "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+    return _day(dt.timestamp())
+
+
+class DedupeStore:
+    """Clés déjà traitées, oubliées après ``ttl_days`` jours.
+
+    Attributes:
+        path: Dossier des seaux journaliers
+        ttl_days: Nombre de jours gardés (le jour courant en plus)
+        legacy: Ancien fichier ``{clé: {"at": ts}}`` importé à la création du dossier
+    """
+
+    def __init__(self, path: str, ttl_days: int = 14, legacy: Optional[str] = None) -> None:
+        self.path = path
+        self.ttl_days = ttl_days
+        self.legacy = legacy
+        self._buckets: Dict[int, Set[str]] = {}
+        self._days: Dict[str, int] = {}
+        # seau -> octets déjà lus (les ajouts des autres instances viennent après)
+        self._offsets: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.expired = 0
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._days)
+
+    def __contains__(self, key: str) -> bool:
+        return self.seen(key)
+
+    # ----------------- lecture -----------------
+
+    def seen(self, key: str) -> bool:
+        """``True`` si ``key`` a été ajoutée depuis moins de ``ttl_days`` jours."""
+        self._ensure_loaded()
+        day = self._days.get(key)
+        return day is not None and day >= self._oldest(time.time())
+
+    def _oldest(self, now: float) -> int:
+        return _day(now) - self.ttl_days
+
+    def _ensure_loaded(self) -> None:
+        """Premier chargement sur place, si ``seen``/``add`` précèdent tout :meth:`refresh`."""
+        if self._loaded:
+            return
+        self._loaded = True
+        oldest = self._oldest(time.time())
+        self._apply(self._load_files(oldest, {}), oldest)
+
+    def _load_files(self, oldest: int, offsets: Dict[int, int]) -> Dict[int, Tuple[List[str], int]]:
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path, exist_ok=True)
+            self._import_legacy()
+        return self._scan(oldest, offsets)
+
+    def _import_legacy(self) -> None:
+        if not self.legacy or not os.path.exists(self.legacy):
+            return
+        try:
+            data = codec.read_file(self.legacy)
+        except (OSError, ValueError) as e:
+            LOG.error(f"Import de {self.legacy} impossible : {e}")
+            return
+        oldest = self._oldest(time.time())
+        lines: Dict[int, list] = {}
+        for key, value in (data or {}).items():
+            at = value.get("at", 0) if isinstance(value, dict) else 0
+            if _day(int(at or 0)) >= oldest:
+                lines.setdefault(_day(int(at)), []).append(key)
+        for day, keys in lines.items():
+            self._append(day, keys)
+        LOG.info(f"{sum(map(len, lines.values()))} alertes importées depuis {self.legacy}")
+
+    async def refresh(self, now: Optional[float] = None) -> int:
+        """Supprime les seaux expirés et lit les ajouts faits par d'autres instances.
+
+        L'oubli des jours expirés se fait en mémoire ; le parcours du dossier
+        et la lecture des seaux (le premier chargement compris) se font dans
+        un thread.
+
+        Returns:
+            Nombre de clés oubliées
+        """
+        oldest = self._oldest(time.time() if now is None else now)
+        dropped = 0
+        for day in [d for d in self._buckets if d < oldest]:
+            keys = self._buckets.pop(day)
+            for key in keys:
+                if self._days.get(key) == day:
+                    del self._days[key]
+            self._offsets.pop(day, None)
+            dropped += len(keys)
+        if self._loaded:
+            scanned = await asyncio.to_thread(self._scan, oldest, dict(self._offsets))
+        else:
+            scanned = await asyncio.to_thread(self._load_files, oldest, {})
+            self._loaded = True
+        self._apply(scanned, oldest)
+        self.expired += dropped
+        return dropped
+
+    def _scan(self, oldest: int, offsets: Dict[int, int]) -> Dict[int, Tuple[List[str], int]]:
+        """Supprime les seaux expirés du dossier et lit les lignes ajoutées après ``offsets``.
+
+        Ne touche pas à l'état en mémoire (appelée depuis un thread).
+
+        Returns:
+            ``{jour: (clés lues, nouvel offset)}`` des seaux qui ont grandi
+        """
+        try:
+            names = os.listdir(self.path)
+        except FileNotFoundError:
+            names = []
+        scanned: Dict[int, Tuple[List[str], int]] = {}
+        for name in names:
+            day = _parse_bucket(name)
+            if day is None:
+                continue
+            if day < oldest:
+                try:
+                    os.remove(os.path.join(self.path, name))
+                except FileNotFoundError:
+                    pass
+                continue
+            read = self._read_bucket(day, offsets.get(day, 0))
+            if read is not None:
+                scanned[day] = read
+        return scanned
+
+    def _read_bucket(self, day: int, offset: int) -> Optional[Tuple[List[str], int]]:
+        file = os.path.join(self.path, _bucket_name(day))
+        try:
+            if os.path.getsize(file) <= offset:
+                return None
+            with open(file, "rb") as f:
+                f.seek(offset)
+                raw = f.read()
+        except FileNotFoundError:
+            return None
+        # Une ligne incomplète (écriture en cours ailleurs) sera relue au prochain passage
+        end = raw.rfind(b"\n") + 1
+        keys = []
+        for line in raw[:end].splitlines():
+            try:
+                keys.append(json.loads(line))
+            except ValueError:
+                LOG.warning(f"Ligne illisible ignorée dans {file}")
+        return keys, offset + end
+
+    def _apply(self, scanned: Dict[int, Tuple[List[str], int]], oldest: int) -> None:
+        for day, (keys, offset) in scanned.items():
+            if day < oldest:
+                continue
+            for key in keys:
+                self._remember(key, day)
+            # Deux lectures concurrentes (alertes et tracker) : la plus avancée l'emporte
+            self._offsets[day] = max(self._offsets.get(day, 0), offset)
+
+    def _remember(self, key: str, day: int) -> None:
+        old = self._days.get(key)
+        if old is not None and old >= day:
+            return
+        if old is not None:
+            self._buckets.get(old, set()).discard(key)
+        self._days[key] = day
+        self._buckets.setdefault(day, set()).add(key)
+
+    # ----------------- écriture -----------------
+
+    async def add(self, key: str, at: Optional[float] = None) -> None:
+        """Enregistre ``key`` (tout de suite en mémoire, puis une ligne ajoutée depuis un thread)."""
+        self._ensure_loaded()
+        day = _day(time.time() if at is None else at)
+        self._remember(key, day)
+        await asyncio.to_thread(self._append, day, [key])
+
+    def _append(self, day: int, keys: list) -> None:
+        raw = "".join(json.dumps(k, ensure_ascii=False) + "\n" for k in keys).encode("utf-8")
+        file = os.path.join(self.path, _bucket_name(day))
+        with self._lock:
+            try:
+                with open(file, "ab") as f:
+                    f.write(raw)
+            except OSError as e:
+                LOG.error(f"Erreur lors de la sauvegarde de {file}: {e}")
+
+    def metrics(self) -> Dict[str, int]:
+        return {"keys": len(self._days), "buckets": len(self._buckets), "expired": self.expired}
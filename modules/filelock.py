@@ -0,0 +1,76 @@
+"""
+Verrou de fichier consultatif (``fcntl.flock``) partagé entre processus.
+
+Plusieurs instances du bot (production, staging) peuvent travailler sur le
+même dossier ``data/`` : chaque lecture-modification-écriture d'un fichier
+partagé se fait sous ``FileLock(<fichier>.lock)``. Le verrou est aussi
+exclusif entre threads du même processus.
+
+Sans ``fcntl`` (Windows), seul le verrou entre threads est pris.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+_THREAD_LOCKS: Dict[str, threading.Lock] = {}
+_THREAD_LOCKS_GUARD = threading.Lock()
+
+
+class FileLock:
+    """Verrou exclusif sur ``path`` (créé au besoin), utilisable avec ``with``.
+
+    Attributes:
+        path: Fichier servant de verrou
+        acquisitions: Nombre de prises du verrou
+        waited: Temps total passé à attendre le verrou (secondes)
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with _THREAD_LOCKS_GUARD:
+            self._thread_lock = _THREAD_LOCKS.setdefault(os.path.abspath(path), threading.Lock())
+        self._fd: Optional[int] = None
+        self.acquisitions = 0
+        self.waited = 0.0
+
+    def acquire(self) -> None:
+        start = time.monotonic()
+        self._thread_lock.acquire()
+        try:
+            if fcntl is not None:
+                if self._fd is None:
+                    self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        self.acquisitions += 1
+        self.waited += time.monotonic() - start
+
+    def release(self) -> None:
+        try:
+            if fcntl is not None and self._fd is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            self._thread_lock.release()
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
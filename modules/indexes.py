@@ -0,0 +1,97 @@
+"""
+Index inversés tenus à jour au fil des modifications du store.
+
+``anitracker.json`` (``{user_id: [titres]}``) et ``linked_users.json``
+(``{user_id: pseudo}``) sont rangés par utilisateur ; les boucles d'alertes
+ont besoin de l'inverse : chaque titre (ou pseudo AniList) une seule fois,
+avec la liste des utilisateurs à prévenir. Un :class:`InvertedIndex` garde
+``terme -> {user_id}`` et se met à jour utilisateur par utilisateur quand le
+store signale une clé modifiée (:meth:`modules.store.DataStore.add_listener`) ;
+un remplacement complet du fichier le reconstruit à la lecture suivante,
+comme pour :class:`modules.leaderboard.Leaderboards`.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from modules.store import ALL
+
+
+class InvertedIndex:
+    """Termes d'un fichier du store -> utilisateurs qui les ont.
+
+    Attributes:
+        store: :class:`modules.store.DataStore` observé
+        path: Fichier indexé (``{user_id: valeur}``)
+        rebuilds: Nombre de reconstructions complètes
+    """
+
+    def __init__(self, store: Any, path: str, terms: Callable[[Any], Iterable[str]]) -> None:
+        self.store = store
+        self.path = path
+        self._extract = terms
+        self._users: Optional[Dict[str, Set[str]]] = None  # None : à (re)construire
+        self._terms: Dict[str, FrozenSet[str]] = {}
+        self.rebuilds = 0
+        store.add_listener(path, self._changed)
+
+    # ----------------- mise à jour -----------------
+
+    def _changed(self, data: Dict[str, Any], keys: Set[str]) -> None:
+        if self._users is None:
+            return
+        if ALL in keys:
+            self._users = None
+            return
+        for uid in keys:
+            self._place(uid, data.get(uid))
+
+    def _place(self, uid: str, value: Any) -> None:
+        new = frozenset(self._extract(value)) if value else frozenset()
+        old = self._terms.get(uid, frozenset())
+        if new == old:
+            return
+        for term in old - new:
+            users = self._users.get(term)
+            if users is not None:
+                users.discard(uid)
+                if not users:
+                    del self._users[term]
+        for term in new - old:
+            self._users.setdefault(term, set()).add(uid)
+        if new:
+            self._terms[uid] = new
+        else:
+            self._terms.pop(uid, None)
+
+    def _index(self) -> Dict[str, Set[str]]:
+        # get() rattrape aussi les écritures des autres instances (moteur partagé)
+        data = self.store.get(self.path, {})
+        if self._users is None:
+            self._users = {}
+            self._terms = {}
+            for uid, value in data.items():
+                self._place(uid, value)
+            self.rebuilds += 1
+        return self._users
+
+    # ----------------- lecture -----------------
+
+    def users(self, term: str) -> Set[str]:
+        """Utilisateurs qui ont ``term`` (copie)."""
+        return set(self._index().get(term, ()))
+
+    def terms(self) -> List[str]:
+        """Termes distincts, chacun une seule fois."""
+        return list(self._index())
+
+    def items(self) -> List[Tuple[str, Set[str]]]:
+        """``(terme, utilisateurs)`` pour chaque terme distinct (copies)."""
+        return [(term, set(users)) for term, users in self._index().items()]
+
+    def __contains__(self, term: str) -> bool:
+        return term in self._index()
+
+    def metrics(self) -> Dict[str, int]:
+        return {"terms": len(self._users or {}), "users": len(self._terms), "rebuilds": self.rebuilds}
@@ -0,0 +1,248 @@
+"""
+Classements tenus à jour au fil des modifications du store.
+
+Au lieu de trier tout ``quiz_scores.json`` à chaque ``!quiztop``, chaque
+classement est une liste triée de ``(-score, user_id)`` mise à jour par
+recherche binaire quand le store signale un utilisateur modifié
+(:meth:`modules.store.DataStore.add_listener`). Un remplacement complet du
+fichier (``save_scores({})`` de la remise à zéro mensuelle...) reconstruit
+le classement à la lecture suivante.
+
+Quand le fichier est monté sur ``modules.sqlite_store.SqliteBackend``, le
+classement est lu directement dans les colonnes indexées de sa table
+(aucune copie triée en mémoire) ; les modifications pas encore écrites le
+sont juste avant la requête, depuis un thread comme la requête elle-même.
+
+:class:`DisplayNames` garde les pseudos Discord résolus pour éviter un
+``fetch_user`` REST par ligne affichée.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from bisect import bisect_left, insort
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from modules.sqlite_store import SqliteBackend
+from modules.store import ALL
+
+LOG = logging.getLogger(__name__)
+
+
+class SortedBoard:
+    """Scores triés du plus haut au plus bas, ex æquo départagés par ID."""
+
+    def __init__(self) -> None:
+        self._order: List[Tuple[float, str]] = []
+        self._scores: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def update(self, user_id: str, score: Optional[float]) -> None:
+        """Place ``user_id`` à ``score`` (``None`` ou 0 : retiré du classement)."""
+        old = self._scores.pop(user_id, None)
+        if old is not None:
+            i = bisect_left(self._order, (-old, user_id))
+            if i < len(self._order) and self._order[i] == (-old, user_id):
+                del self._order[i]
+        if score:
+            self._scores[user_id] = score
+            insort(self._order, (-score, user_id))
+
+    def score(self, user_id: str) -> Optional[float]:
+        return self._scores.get(user_id)
+
+    def top(self, n: int = 10) -> List[Tuple[str, float]]:
+        return [(uid, -neg) for neg, uid in self._order[:n]]
+
+    def rank(self, user_id: str) -> Optional[int]:
+        """Position (1 = premier) ; les ex æquo partagent la même position."""
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+        return bisect_left(self._order, (-score, "")) + 1
+
+
+class _Source:
+    """Fichier du store et manière d'en extraire un ou plusieurs classements."""
+
+    def __init__(self, path: str, scores: Callable[[str, Any], Iterable[Tuple[str, float]]]) -> None:
+        self.path = path
+        self.scores = scores
+        self.boards: Optional[Dict[str, SortedBoard]] = None  # None : à (re)construire
+        self.columns: Tuple[str, ...] = ()  # colonnes SQLite du classement (moteur SQLite)
+        self.score: Optional[Callable[[Any], float]] = None
+
+
+class Leaderboards:
+    """Classements nommés alimentés par les fichiers du store.
+
+    Attributes:
+        store: :class:`modules.store.DataStore` observé
+    """
+
+    def __init__(self, store: Any) -> None:
+        self.store = store
+        self._sources: Dict[str, _Source] = {}
+        self._board_source: Dict[str, _Source] = {}
+        self._group_source: Dict[str, _Source] = {}
+        self.rebuilds = 0
+
+    def register(self, name: str, path: str, score: Callable[[Any], float], columns: Tuple[str, ...] = ()) -> None:
+        """Classement ``name`` : une valeur par utilisateur dans ``path``, notée par ``score``.
+
+        Args:
+            name: Nom du classement
+            path: Fichier du store
+            score: Note d'une valeur
+            columns: Colonnes SQLite donnant le même ordre que ``score`` (moteur SQLite)
+        """
+        source = self._board_source[name] = self._add(path, lambda uid, value: [(name, score(value))])
+        source.columns = columns
+        source.score = score
+
+    def register_group(self, prefix: str, path: str, items: Callable[[Any], Iterable[Tuple[str, float]]]) -> None:
+        """Un classement ``prefix:élément`` par élément des valeurs (un par mini-jeu...)."""
+        self._group_source[prefix] = self._add(
+            path, lambda uid, value: [(f"{prefix}:{k}", v) for k, v in items(value)]
+        )
+
+    def _add(self, path: str, scores: Callable[[str, Any], Iterable[Tuple[str, float]]]) -> _Source:
+        if path in self._sources:
+            raise ValueError(f"{path} a déjà un classement")
+        source = self._sources[path] = _Source(path, scores)
+        self.store.add_listener(path, lambda data, keys: self._changed(source, data, keys))
+        return source
+
+    # ----------------- mise à jour -----------------
+
+    def _changed(self, source: _Source, data: Dict[str, Any], keys: Set[str]) -> None:
+        if source.boards is None:
+            return
+        if ALL in keys:
+            source.boards = None
+            return
+        for uid in keys:
+            self._place(source, uid, data.get(uid))
+
+    def _place(self, source: _Source, uid: str, value: Any) -> None:
+        boards = source.boards
+        new = dict(source.scores(uid, value)) if value is not None else {}
+        for name, board in boards.items():
+            if name not in new and board.score(uid) is not None:
+                board.update(uid, None)
+        for name, score in new.items():
+            boards.setdefault(name, SortedBoard()).update(uid, score)
+
+    def _boards(self, source: _Source) -> Dict[str, SortedBoard]:
+        # Écritures des autres instances (moteur partagé) : rattrapées via _changed
+        self.store.refresh_if_changed(source.path)
+        if source.boards is None:
+            source.boards = {}
+            for uid, value in self.store.get(source.path, {}).items():
+                self._place(source, uid, value)
+            self.rebuilds += 1
+        return source.boards
+
+    def _source(self, name: str) -> Optional[_Source]:
+        return self._board_source.get(name) or self._group_source.get(name.split(":", 1)[0])
+
+    def _board(self, name: str) -> Optional[SortedBoard]:
+        source = self._source(name)
+        return self._boards(source).get(name) if source else None
+
+    async def _database(self, source: _Source) -> Any:
+        """Moteur SQLite qui sert ce classement, après écriture des modifications en attente."""
+        backend = self.store.backend_for(source.path)
+        if not isinstance(backend, SqliteBackend):
+            return None
+        table = backend.tables[source.path]
+        if not (source.columns if source.score is not None else table.items):
+            return None
+        self.store.get(source.path, {})
+        if self.store.is_dirty(source.path):
+            await self.store.flush_async()
+        return backend
+
+    # ----------------- lecture -----------------
+
+    async def top(self, name: str, n: int = 10) -> List[Tuple[str, float]]:
+        """Les ``n`` premiers ``(user_id, score)`` du classement."""
+        source = self._source(name)
+        database = await self._database(source) if source else None
+        if database is not None:
+            # La requête attend le verrou du moteur, que tient une écriture en cours
+            if name in self._board_source:
+                rows = await asyncio.to_thread(database.top, source.path, *source.columns, limit=n)
+                return [(uid, source.score(value)) for uid, value in rows]
+            return await asyncio.to_thread(database.top_items, source.path, name.split(":", 1)[1], limit=n)
+        board = self._board(name)
+        return board.top(n) if board else []
+
+    async def rank(self, name: str, user_id: Any) -> Optional[int]:
+        """Position d'un utilisateur (``None`` s'il n'est pas classé)."""
+        source = self._source(name)
+        database = await self._database(source) if source else None
+        if database is not None:
+            if name in self._board_source:
+                return await asyncio.to_thread(database.rank, source.path, user_id, *source.columns)
+            return await asyncio.to_thread(database.rank_item, source.path, name.split(":", 1)[1], user_id)
+        board = self._board(name)
+        return board.rank(str(user_id)) if board else None
+
+    def metrics(self) -> Dict[str, Any]:
+        sizes = {}
+        for source in self._sources.values():
+            for name, board in (source.boards or {}).items():
+                sizes[name] = len(board)
+        return {"boards": sizes, "rebuilds": self.rebuilds}
+
+
+class DisplayNames:
+    """Pseudos Discord déjà résolus, gardés ``ttl`` secondes.
+
+    Attributes:
+        ttl: Durée de vie d'un pseudo en cache (secondes)
+    """
+
+    def __init__(self, ttl: float = 3600.0) -> None:
+        self.ttl = ttl
+        self._names: Dict[int, Tuple[float, str]] = {}
+
+    async def resolve(self, bot: Any, user_ids: Iterable[Any]) -> Dict[int, Optional[str]]:
+        """Pseudos des utilisateurs : cache du client, puis ce cache, puis un seul lot REST.
+
+        Returns:
+            ``{id: pseudo}`` (``None`` si l'utilisateur est introuvable)
+        """
+        now = time.monotonic()
+        names: Dict[int, Optional[str]] = {}
+        missing: List[int] = []
+        for uid in map(int, user_ids):
+            user = bot.get_user(uid)
+            if user is not None:
+                names[uid] = user.display_name
+                self._names[uid] = (now, user.display_name)
+                continue
+            cached = self._names.get(uid)
+            if cached and now - cached[0] < self.ttl:
+                names[uid] = cached[1]
+            else:
+                missing.append(uid)
+
+        async def fetch(uid: int) -> None:
+            try:
+                user = await bot.fetch_user(uid)
+            except Exception as e:
+                LOG.warning(f"Utilisateur {uid} introuvable : {e}")
+                names[uid] = None
+                return
+            names[uid] = user.display_name
+            self._names[uid] = (time.monotonic(), user.display_name)
+
+        # Les appels manquants partent ensemble au lieu d'un par ligne
+        await asyncio.gather(*(fetch(uid) for uid in missing))
+        return names
@@ -0,0 +1,226 @@
+"""
+Miroir local des listes AniList des comptes liés.
+
+Au lieu de télécharger toute la ``MediaListCollection`` d'un utilisateur à
+chaque commande (plus de 1 000 entrées pour certains), on garde pour chaque
+compte ses entrées (média, statut, ``updatedAt``) et on ne redemande que
+ce qui a changé : ``Page.mediaList`` trié par ``UPDATED_TIME_DESC``, lu
+jusqu'à la première entrée déjà connue.
+
+Les suppressions n'apparaissent pas dans ce flux : une relecture complète
+est faite périodiquement (``full_every``). Combiné au planning local
+(``modules.airing``), ``!monnext``/``!monplanning`` se passent de tout
+téléchargement de liste ; ``nextAiringEpisode`` est gardé pour répondre
+quand le planning local n'est pas prêt ou ne couvre pas l'épisode.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from modules.store import atomic_write
+
+LOG = logging.getLogger(__name__)
+
+LIST_QUERY = """
+query ($userName: String, $page: Int, $perPage: Int) {
+  Page(page: $page, perPage: $perPage) {
+    pageInfo { hasNextPage }
+    mediaList(userName: $userName, type: ANIME, sort: UPDATED_TIME_DESC) {
+      mediaId
+      status
+      updatedAt
+      media {
+        id
+        title { romaji english native }
+        coverImage { extraLarge large }
+        genres
+        nextAiringEpisode { airingAt episode }
+      }
+    }
+  }
+}
+"""
+
+
+class MediaListMirror:
+    """Listes AniList des utilisateurs, tenues à jour de façon incrémentale.
+
+    Attributes:
+        client: Client AniList
+        path: Fichier JSON de persistance (``None`` : mémoire seule)
+        ttl: Âge maximal d'une liste avant actualisation à la lecture (secondes)
+        full_every: Intervalle entre deux relectures complètes (secondes)
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        path: Optional[str] = None,
+        *,
+        ttl: float = 300.0,
+        full_every: float = 24 * 3600.0,
+    ) -> None:
+        self.client = client
+        self.path = path
+        self.ttl = ttl
+        self.full_every = full_every
+        # username (minuscules) -> {"synced_at", "full_at", "max_updated", "entries": {mediaId: entrée}}
+        self._users: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._dirty = False
+        self.requests = 0
+
+    @staticmethod
+    def _key(username: str) -> str:
+        return username.strip().lower()
+
+    # ----------------- lecture -----------------
+
+    async def entries(
+        self,
+        username: str,
+        statuses: Optional[Iterable[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Entrées de la liste d'un utilisateur, actualisée si trop ancienne.
+
+        Args:
+            username: Pseudo AniList
+            statuses: Statuts à garder (``{"CURRENT"}``...), ``None`` pour tous
+
+        Returns:
+            Liste de ``{"mediaId", "status", "updatedAt", "media"}``
+        """
+        user = self._users.get(self._key(username))
+        if user is None or time.time() - user["synced_at"] >= self.ttl:
+            await self.refresh(username)
+            user = self._users.get(self._key(username))
+        if user is None:
+            return []
+        wanted = set(statuses) if statuses else None
+        return [e for e in user["entries"].values() if wanted is None or e.get("status") in wanted]
+
+    def media_ids(self, username: str) -> List[int]:
+        """Identifiants des médias connus pour l'utilisateur (sans actualisation)."""
+        user = self._users.get(self._key(username))
+        return [int(mid) for mid in user["entries"]] if user else []
+
+    # ----------------- synchronisation -----------------
+
+    async def refresh(self, username: str, full: bool = False) -> int:
+        """Met à jour la liste d'un utilisateur.
+
+        Args:
+            username: Pseudo AniList
+            full: Forcer une relecture complète (sinon seulement si elle est due)
+
+        Returns:
+            Nombre d'entrées reçues
+        """
+        key = self._key(username)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            user = self._users.get(key)
+            now = time.time()
+            # Une autre tâche vient de l'actualiser pendant qu'on attendait le verrou
+            if user is not None and not full and now - user["synced_at"] < 1:
+                return 0
+            full = full or user is None or now - user["full_at"] >= self.full_every
+            since = 0 if full else user["max_updated"]
+
+            received: List[Dict[str, Any]] = []
+            page = 1
+            per_page = 50 if full else 10
+            while True:
+                data = await self.client.query(
+                    LIST_QUERY, {"userName": username, "page": page, "perPage": per_page}, cache=False
+                )
+                self.requests += 1
+                page_data = ((data or {}).get("data") or {}).get("Page")
+                if page_data is None:
+                    # Erreur ou compte introuvable : on garde la copie existante
+                    LOG.warning("[MediaList] Actualisation impossible pour %s", username)
+                    return 0
+                items = page_data.get("mediaList") or []
+                fresh = [e for e in items if (e.get("updatedAt") or 0) >= since]
+                received.extend(fresh)
+                if len(fresh) < len(items) or not (page_data.get("pageInfo") or {}).get("hasNextPage"):
+                    break
+                page += 1
+                per_page = 50
+
+            if full:
+                user = {"synced_at": now, "full_at": now, "max_updated": 0, "entries": {}}
+            entries = user["entries"]
+            for e in received:
+                mid = e.get("mediaId")
+                if mid is None:
+                    continue
+                entries[str(mid)] = {
+                    "mediaId": mid,
+                    "status": e.get("status"),
+                    "updatedAt": e.get("updatedAt") or 0,
+                    "media": e.get("media") or {},
+                }
+                user["max_updated"] = max(user["max_updated"], e.get("updatedAt") or 0)
+            user["synced_at"] = now
+            self._users[key] = user
+            if received or full:
+                self._dirty = True
+            return len(received)
+
+    def forget(self, username: str) -> None:
+        """Oublie la liste d'un utilisateur (compte délié)."""
+        if self._users.pop(self._key(username), None) is not None:
+            self._dirty = True
+
+    # ----------------- persistance -----------------
+
+    async def load(self) -> int:
+        """Recharge les listes depuis le disque.
+
+        Returns:
+            Nombre d'utilisateurs rechargés
+        """
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        try:
+            self._users = await asyncio.to_thread(self._read)
+        except (OSError, ValueError) as e:
+            LOG.error("[MediaList] Lecture de %s impossible : %s", self.path, e)
+        for user in self._users.values():
+            # Copie antérieure à nextAiringEpisode dans la requête : relecture complète au prochain accès
+            if any("nextAiringEpisode" not in (e.get("media") or {}) for e in user["entries"].values()):
+                user["full_at"] = 0
+        return len(self._users)
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    async def flush(self) -> None:
+        """Écrit les listes sur disque si elles ont changé."""
+        if not self.path or not self._dirty:
+            return
+        self._dirty = False
+        payload = json.dumps(self._users, ensure_ascii=False, separators=(",", ":"))
+        try:
+            await asyncio.to_thread(self._write, payload)
+        except OSError as e:
+            self._dirty = True
+            LOG.error("[MediaList] Écriture de %s impossible : %s", self.path, e)
+
+    def _write(self, payload: str) -> None:
+        atomic_write(self.path, payload)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "users": len(self._users),
+            "entries": sum(len(u["entries"]) for u in self._users.values()),
+            "requests": self.requests,
+        }
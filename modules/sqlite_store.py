@@ -0,0 +1,305 @@
+"""
+Moteur SQLite (WAL) pour le :class:`modules.store.DataStore`.
+
+Chaque fichier monté devient une table avec une ligne par utilisateur
+(``user_id``, ``value`` en JSON) et des colonnes extraites et indexées
+pour les classements (niveau/XP, score...). Les éléments d'une valeur
+(jeux des mini-scores) vont dans une table ``<nom>_items`` indexée par
+élément. Ces index servent les classements
+(:class:`modules.leaderboard.Leaderboards`) quand ce moteur est monté.
+
+Seules les lignes modifiées sont écrites : les clés signalées par
+``mark_dirty``, ou, après un ``set`` complet, celles dont le JSON diffère
+de la dernière écriture.
+
+À la première ouverture, le contenu du fichier JSON correspondant est
+importé une seule fois (:meth:`SqliteBackend.migrate`).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from modules import codec
+from modules.store import ALL, StorageBackend
+
+LOG = logging.getLogger(__name__)
+
+
+class Table(NamedTuple):
+    """Schéma d'un fichier monté sur SQLite.
+
+    Attributes:
+        name: Nom de la table
+        columns: ``(colonne, type SQL, extraction depuis la valeur)`` indexées
+        indexes: Index composés supplémentaires (tuples de colonnes, ordre décroissant)
+        items: Éléments ``(item, score)`` d'une valeur, pour la table ``<nom>_items``
+    """
+
+    name: str
+    columns: Tuple[Tuple[str, str, Callable[[Any], Any]], ...] = ()
+    indexes: Tuple[Tuple[str, ...], ...] = ()
+    items: Optional[Callable[[Any], Iterable[Tuple[str, Any]]]] = None
+
+
+def _int(value: Any) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+LEVELS = Table(
+    "levels",
+    columns=(
+        ("level", "INTEGER", lambda v: _int(v.get("level"))),
+        ("xp", "INTEGER", lambda v: _int(v.get("xp"))),
+    ),
+    indexes=(("level", "xp"),),
+)
+QUIZ_SCORES = Table("quiz_scores", columns=(("score", "INTEGER", _int),))
+MINI_SCORES = Table(
+    "mini_scores",
+    columns=(("total", "INTEGER", lambda v: sum(_int(n) for n in v.values())),),
+    items=lambda v: ((game, _int(n)) for game, n in v.items()),
+)
+LINKS = Table("links")
+TRACKER = Table("tracker")
+
+
+class SqliteBackend(StorageBackend):
+    """Base SQLite partagée par plusieurs fichiers du store.
+
+    Attributes:
+        path: Chemin de la base
+        tables: Fichier JSON monté -> schéma de sa table
+    """
+
+    def __init__(self, path: str, tables: Dict[str, Table]) -> None:
+        self.path = path
+        self.tables = tables
+        self._lock = threading.Lock()
+        # fichier -> {user_id: JSON écrit} (absent : réécriture complète au prochain flush)
+        self._written: Dict[str, Dict[str, str]] = {}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create()
+
+    def _create(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS migrations (source TEXT PRIMARY KEY, rows INTEGER)")
+            for table in self.tables.values():
+                cols = "".join(f", {name} {kind}" for name, kind, _ in table.columns)
+                self._conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table.name} (user_id TEXT PRIMARY KEY, value TEXT NOT NULL{cols})"
+                )
+                for name, _, _ in table.columns:
+                    self._conn.execute(
+                        f"CREATE INDEX IF NOT EXISTS {table.name}_{name} ON {table.name}({name} DESC)"
+                    )
+                for index in table.indexes:
+                    order = ", ".join(f"{c} DESC" for c in index)
+                    self._conn.execute(
+                        f"CREATE INDEX IF NOT EXISTS {table.name}_{'_'.join(index)} ON {table.name}({order})"
+                    )
+                if table.items:
+                    self._conn.execute(
+                        f"CREATE TABLE IF NOT EXISTS {table.name}_items ("
+                        " user_id TEXT NOT NULL, item TEXT NOT NULL, score INTEGER,"
+                        " PRIMARY KEY (user_id, item))"
+                    )
+                    self._conn.execute(
+                        f"CREATE INDEX IF NOT EXISTS {table.name}_items_item "
+                        f"ON {table.name}_items(item, score DESC)"
+                    )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ----------------- StorageBackend -----------------
+
+    def load(self, path: str, default: Any) -> Dict[str, Any]:
+        table = self.tables[path]
+        with self._lock:
+            rows = self._conn.execute(f"SELECT user_id, value FROM {table.name}").fetchall()
+        data: Dict[str, Any] = {}
+        written: Dict[str, str] = {}
+        for user_id, value in rows:
+            try:
+                data[user_id] = json.loads(value)
+            except ValueError:
+                LOG.error("[SQLite] Ligne illisible %s/%s", table.name, user_id)
+                continue
+            written[user_id] = value
+        self._written[path] = written
+        return data
+
+    def snapshot(self, path: str, data: Dict[str, Any], keys: Set[str]) -> Tuple[bool, List[tuple], List[str]]:
+        """Lignes à écrire : ``(réécriture complète, [(user_id, json, valeur)], [supprimés])``."""
+        written = self._written.get(path)
+        replace = written is None
+        if replace:
+            written = self._written[path] = {}
+            keys = {ALL}
+        candidates = (set(data) | set(written)) if ALL in keys else keys
+        upserts: List[tuple] = []
+        deletes: List[str] = []
+        for key in candidates:
+            if key in data:
+                text = json.dumps(data[key], ensure_ascii=False, separators=(",", ":"))
+                if replace or written.get(key) != text:
+                    # La valeur est décodée à nouveau : le thread d'écriture n'y voit pas les mutations
+                    upserts.append((key, text, json.loads(text)))
+                    written[key] = text
+            elif key in written:
+                deletes.append(key)
+                del written[key]
+        return replace, upserts, deletes
+
+    def write(self, path: str, payload: Tuple[bool, List[tuple], List[str]]) -> None:
+        with self._lock, self._conn:
+            self._write(path, payload)
+
+    def write_batch(self, payloads: Dict[str, Tuple[bool, List[tuple], List[str]]]) -> None:
+        # Une seule transaction SQL : les tables d'un même flush changent ensemble
+        with self._lock, self._conn:
+            for path, payload in payloads.items():
+                self._write(path, payload)
+
+    def _write(self, path: str, payload: Tuple[bool, List[tuple], List[str]]) -> None:
+        table = self.tables[path]
+        replace, upserts, deletes = payload
+        if not (replace or upserts or deletes):
+            return
+        names = [name for name, _, _ in table.columns]
+        placeholders = ", ".join("?" * (2 + len(names)))
+        rows = [
+            (key, text, *(extract(value) for _, _, extract in table.columns))
+            for key, text, value in upserts
+        ]
+        if replace:
+            self._conn.execute(f"DELETE FROM {table.name}")
+            if table.items:
+                self._conn.execute(f"DELETE FROM {table.name}_items")
+        self._conn.executemany(
+            f"INSERT OR REPLACE INTO {table.name} (user_id, value{''.join(', ' + n for n in names)}) "
+            f"VALUES ({placeholders})",
+            rows,
+        )
+        self._conn.executemany(f"DELETE FROM {table.name} WHERE user_id = ?", [(k,) for k in deletes])
+        if table.items:
+            changed = [(key,) for key, _, _ in upserts] + [(k,) for k in deletes]
+            self._conn.executemany(f"DELETE FROM {table.name}_items WHERE user_id = ?", changed)
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {table.name}_items VALUES (?, ?, ?)",
+                [(key, item, score) for key, _, value in upserts for item, score in table.items(value)],
+            )
+
+    def failed(self, path: str) -> None:
+        # On ne sait plus ce qui est sur disque : tout sera réécrit
+        self._written.pop(path, None)
+
+    # ----------------- migration -----------------
+
+    def migrate(self, path: str) -> int:
+        """Importe une fois le fichier JSON ``path`` dans sa table.
+
+        Sans effet si ce fichier a déjà été importé ou s'il n'existe pas.
+
+        Returns:
+            Nombre de lignes importées
+        """
+        table = self.tables[path]
+        with self._lock:
+            done = self._conn.execute("SELECT 1 FROM migrations WHERE source = ?", (table.name,)).fetchone()
+        if done or not os.path.exists(path):
+            return 0
+        try:
+            data = codec.read_file(path)
+        except (OSError, ValueError) as e:
+            LOG.error("[SQLite] Migration de %s impossible : %s", path, e)
+            return 0
+        if not isinstance(data, dict):
+            LOG.error("[SQLite] %s n'est pas un objet JSON, migration ignorée", path)
+            return 0
+        data = {str(k): v for k, v in data.items()}
+        self._written.pop(path, None)
+        self.write(path, self.snapshot(path, data, {ALL}))
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO migrations VALUES (?, ?)", (table.name, len(data)))
+        LOG.info("[SQLite] %d lignes importées depuis %s", len(data), path)
+        return len(data)
+
+    # ----------------- classements -----------------
+    # Utilisés par modules.leaderboard.Leaderboards quand le moteur est SQLite.
+    # Comme en mémoire : les lignes à zéro ne sont pas classées, ex æquo
+    # départagés par ID, et les ex æquo partagent le même rang.
+
+    def _columns(self, table: Table, columns: Tuple[str, ...]) -> str:
+        known = {name for name, _, _ in table.columns}
+        for column in columns:
+            if column not in known:
+                raise ValueError(f"Colonne inconnue pour {table.name} : {column}")
+        return ", ".join(columns)
+
+    def top(self, path: str, *columns: str, limit: int = 10) -> List[Tuple[str, Any]]:
+        """Meilleures lignes selon des colonnes indexées, ``[(user_id, valeur)]``."""
+        table = self.tables[path]
+        cols = self._columns(table, columns)
+        order = ", ".join(f"{c} DESC" for c in columns)
+        zeros = ", ".join("0" * len(columns))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT user_id, value FROM {table.name} WHERE ({cols}) > ({zeros}) "
+                f"ORDER BY {order}, user_id LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [(user_id, json.loads(value)) for user_id, value in rows]
+
+    def rank(self, path: str, user_id: Any, *columns: str) -> Optional[int]:
+        """Rang (1 = premier) d'un utilisateur selon des colonnes indexées (``None`` s'il n'est pas classé)."""
+        table = self.tables[path]
+        cols = self._columns(table, columns)
+        marks = ", ".join("?" * len(columns))
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {cols} FROM {table.name} WHERE user_id = ?", (str(user_id),)
+            ).fetchone()
+            if row is None or not any(row):
+                return None
+            (above,) = self._conn.execute(
+                f"SELECT COUNT(*) FROM {table.name} WHERE ({cols}) > ({marks})", tuple(row)
+            ).fetchone()
+        return above + 1
+
+    def top_items(self, path: str, item: str, limit: int = 10) -> List[Tuple[str, Any]]:
+        """Meilleurs utilisateurs pour un élément (un mini-jeu...), ``[(user_id, score)]``."""
+        table = self.tables[path]
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT user_id, score FROM {table.name}_items WHERE item = ? AND score > 0 "
+                "ORDER BY score DESC, user_id LIMIT ?",
+                (item, limit),
+            ).fetchall()
+
+    def rank_item(self, path: str, item: str, user_id: Any) -> Optional[int]:
+        """Rang d'un utilisateur pour un élément (``None`` s'il n'est pas classé)."""
+        table = self.tables[path]
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT score FROM {table.name}_items WHERE item = ? AND user_id = ?", (item, str(user_id))
+            ).fetchone()
+            if row is None or not row[0]:
+                return None
+            (above,) = self._conn.execute(
+                f"SELECT COUNT(*) FROM {table.name}_items WHERE item = ? AND score > ?", (item, row[0])
+            ).fetchone()
+        return above + 1
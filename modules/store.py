@@ -0,0 +1,941 @@
+"""
+Stockage en mémoire des fichiers de données JSON, avec écriture différée.
+
+Chaque fichier est lu une seule fois ; les lectures suivantes renvoient
+l'objet gardé en mémoire. Une modification est signalée avec
+:meth:`DataStore.set` ou :meth:`DataStore.mark_dirty`, et le fichier est
+réécrit après un court délai (``flush_delay``) : plusieurs modifications
+rapprochées (une manche de quiz, un podium...) ne coûtent qu'une écriture.
+
+Les écritures se font hors de la boucle (``asyncio.to_thread``) à partir
+d'un instantané sérialisé sur la boucle, et tout ce qui reste est écrit à
+l'arrêt (:meth:`DataStore.close`, appelé aussi via ``atexit``). Une
+coroutine qui doit attendre l'écriture utilise ``await store.save(...)``.
+
+Le format sur disque dépend du moteur monté pour chaque fichier
+(:meth:`DataStore.mount`) : :class:`JsonBackend` par défaut,
+:class:`JournaledJsonBackend` (journal d'ajouts + compaction), ou
+``modules.sqlite_store.SqliteBackend`` qui n'écrit que les lignes modifiées.
+Les fichiers JSON sont toujours remplacés de façon atomique
+(:func:`atomic_write`).
+
+Plusieurs fichiers modifiés ensemble (une réponse de quiz : scores,
+niveaux, mini-scores, missions) passent par :meth:`DataStore.transaction` :
+tout est appliqué ou rien, et l'écriture est commune.
+
+Attention : l'objet renvoyé par :meth:`DataStore.get` est partagé ; toute
+modification doit être suivie de ``set``/``mark_dirty`` pour être écrite.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import copy
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from modules import codec
+from modules.filelock import FileLock
+
+LOG = logging.getLogger(__name__)
+
+# Marqueur « tout le fichier » dans les clés modifiées
+ALL = "*"
+
+# Valeur absente avant une transaction
+_MISSING = object()
+
+
+def atomic_write(path: str, text: Union[str, bytes]) -> None:
+    """Remplace ``path`` par ``text`` sans jamais laisser de fichier tronqué.
+
+    Le contenu est écrit dans un fichier temporaire du même dossier, forcé
+    sur disque (``fsync``) puis renommé par-dessus la cible : un lecteur ou
+    un redémarrage voit l'ancienne version ou la nouvelle, jamais un mélange.
+    """
+    raw = text.encode("utf-8") if isinstance(text, str) else text
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    if hasattr(os, "O_DIRECTORY"):
+        # Le renommage lui-même doit survivre à une coupure
+        fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class StorageBackend:
+    """Moteur de persistance d'un ou plusieurs fichiers du :class:`DataStore`.
+
+    ``snapshot`` est appelé sur la boucle (les données peuvent y changer à tout
+    moment) et doit copier ce qu'il faut écrire ; ``write`` reçoit ce résultat
+    dans un thread.
+
+    Un moteur ``shared`` (plusieurs processus sur les mêmes fichiers) écrit
+    au contraire chaque modification tout de suite, sous verrou : voir
+    :class:`SharedJournalBackend`.
+    """
+
+    shared = False
+
+    def load(self, path: str, default: Any) -> Any:
+        raise NotImplementedError
+
+    def snapshot(self, path: str, data: Any, keys: Set[str]) -> Any:
+        """Prépare l'écriture de ``data`` (``keys`` : clés modifiées, ou ``{ALL}``)."""
+        raise NotImplementedError
+
+    def write(self, path: str, payload: Any) -> None:
+        raise NotImplementedError
+
+    def write_batch(self, payloads: Dict[str, Any]) -> None:
+        """Écrit plusieurs fichiers d'un même flush (un moteur transactionnel le fait d'un bloc)."""
+        for path, payload in payloads.items():
+            self.write(path, payload)
+
+    def failed(self, path: str) -> None:
+        """Appelé après une écriture en échec (le fichier sera réécrit en entier)."""
+
+
+class JsonBackend(StorageBackend):
+    """Un fichier par chemin, réécrit en entier au format ``codec``.
+
+    Attributes:
+        codec: Format d'écriture (voir :mod:`modules.codec`) ; la lecture
+            reconnaît tous les formats
+    """
+
+    def __init__(self, codec: str = "json") -> None:
+        self.codec = codec
+
+    def load(self, path: str, default: Any) -> Any:
+        if not os.path.exists(path):
+            return copy.deepcopy(default)
+        try:
+            return codec.read_file(path)
+        except Exception as e:
+            LOG.error(f"Erreur lors du chargement de {path}: {e}")
+            return copy.deepcopy(default)
+
+    def snapshot(self, path: str, data: Any, keys: Set[str]) -> Union[str, bytes]:
+        return codec.snapshot(data, self.codec)
+
+    def write(self, path: str, payload: Union[str, bytes]) -> None:
+        atomic_write(path, codec.finish(payload, self.codec))
+
+
+class JournaledJsonBackend(JsonBackend):
+    """Fichier JSON complété par un journal d'ajouts ``<fichier>.journal``.
+
+    Une modification limitée à quelques clés (``mark_dirty(path, clé)``)
+    ajoute une ligne ``{"k": clé, "v": valeur}`` (ou ``{"k": clé, "d": 1}``
+    pour une suppression) au journal au lieu de réécrire le fichier. Après
+    ``compact_every`` lignes, ou à chaque remplacement complet, le fichier est
+    réécrit et le journal vidé. Au chargement, le journal est rejoué sur le
+    fichier ; une dernière ligne incomplète (coupure) est ignorée.
+
+    Attributes:
+        compact_every: Nombre de lignes de journal avant compaction
+    """
+
+    def __init__(self, compact_every: int = 500, codec: str = "json") -> None:
+        super().__init__(codec)
+        self.compact_every = compact_every
+        # fichier -> lignes dans le journal (None : compaction au prochain flush)
+        self._journaled: Dict[str, Optional[int]] = {}
+        self.compactions = 0
+
+    @staticmethod
+    def journal_path(path: str) -> str:
+        return path + ".journal"
+
+    def load(self, path: str, default: Any) -> Any:
+        data = super().load(path, default)
+        replayed = 0
+        torn = False
+        journal = self.journal_path(path)
+        if isinstance(data, dict) and os.path.exists(journal):
+            with open(journal, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        LOG.warning(f"Ligne de journal illisible ignorée dans {journal}")
+                        torn = True
+                        continue
+                    if record.get("d"):
+                        data.pop(record["k"], None)
+                    else:
+                        data[record["k"]] = record.get("v")
+                    replayed += 1
+            if replayed:
+                LOG.info(f"{replayed} modifications rejouées depuis {journal}")
+        # Après une ligne incomplète, on recompacte avant d'ajouter quoi que ce soit
+        self._journaled[path] = None if torn else replayed
+        return data
+
+    def snapshot(self, path: str, data: Any, keys: Set[str]) -> Tuple[str, Any]:
+        count = self._journaled.get(path)
+        if ALL in keys or not isinstance(data, dict) or count is None or count + len(keys) > self.compact_every:
+            self._journaled[path] = 0
+            return "snapshot", super().snapshot(path, data, keys)
+        lines = [self._record(key, data) for key in keys]
+        self._journaled[path] = count + len(lines)
+        return "append", "".join(lines)
+
+    @staticmethod
+    def _record(key: str, data: Dict[str, Any]) -> str:
+        record = {"k": key, "v": data[key]} if key in data else {"k": key, "d": 1}
+        return json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+    def write(self, path: str, payload: Tuple[str, Any]) -> None:
+        kind, text = payload
+        if kind == "append":
+            with open(self.journal_path(path), "a", encoding="utf-8") as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            return
+        # Le fichier complet contient déjà tout le journal : rejouer l'ancien
+        # journal après une coupure entre ces deux étapes ne change rien.
+        atomic_write(path, codec.finish(text, self.codec))
+        try:
+            os.remove(self.journal_path(path))
+        except FileNotFoundError:
+            pass
+        self.compactions += 1
+
+    def failed(self, path: str) -> None:
+        self._journaled[path] = None
+
+
+class SharedJournalBackend(JournaledJsonBackend):
+    """Journal partagé par plusieurs processus (instances sur le même ``data/``).
+
+    Chaque modification est écrite tout de suite sous ``FileLock`` : le
+    processus rattrape d'abord les lignes ajoutées par les autres depuis sa
+    dernière lecture (:meth:`refresh`), puis ajoute les siennes
+    (:meth:`commit`). Une compaction par un autre processus (nouveau fichier
+    complet) est détectée à l'identité du fichier et provoque une relecture.
+
+    Une mise à jour faite avec :meth:`DataStore.update` (lecture, calcul et
+    écriture sous le verrou) ne perd jamais la modification d'un autre
+    processus. Un simple ``mark_dirty`` après coup protège les autres clés
+    mais pas une écriture concurrente de la même clé.
+
+    Le verrou est pris sur la boucle, de façon bloquante (``update``,
+    ``mark_dirty``, transactions) : ces appels sont synchrones et le même
+    verrou ne peut pas être pris à la fois depuis un thread et sur la boucle
+    sans risquer qu'elle attende un thread qui attend lui-même la boucle.
+    L'attente est celle d'une autre instance qui rattrape le journal et y
+    ajoute une ligne (de l'ordre de la milliseconde), ou au pire d'une
+    compaction toutes les ``compact_every`` lignes (réécriture complète du
+    fichier). Le temps total d'attente est suivi par :meth:`lock_wait`.
+
+    Les lectures (:meth:`DataStore.get`) ne prennent pas le verrou : elles
+    comparent l'identité du fichier et la taille du journal (:meth:`poll`),
+    et seulement en cas de changement font lire la suite dans un thread
+    (:meth:`fetch`), appliquée ensuite sur la boucle (:meth:`apply`).
+
+    Attributes:
+        fsync: Forcer chaque ajout sur disque (plus lent, survit à une coupure de courant)
+    """
+
+    shared = True
+
+    def __init__(self, compact_every: int = 500, codec: str = "json", fsync: bool = False) -> None:
+        super().__init__(compact_every, codec)
+        self.fsync = fsync
+        self._locks: Dict[str, FileLock] = {}
+        self._snap_id: Dict[str, Optional[Tuple[int, int, int]]] = {}
+        self._offset: Dict[str, int] = {}
+        self.caught_up = 0
+
+    def locked(self, path: str) -> FileLock:
+        lock = self._locks.get(path)
+        if lock is None:
+            lock = self._locks[path] = FileLock(path + ".lock")
+        return lock
+
+    def lock_wait(self) -> float:
+        """Temps total passé à attendre les verrous de fichiers (secondes)."""
+        return sum(lock.waited for lock in self._locks.values())
+
+    @staticmethod
+    def _identity(path: str) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def load(self, path: str, default: Any) -> Any:
+        with self.locked(path):
+            return self._load_locked(path, default)
+
+    def _load_locked(self, path: str, default: Any) -> Any:
+        self._snap_id[path] = self._identity(path)
+        data = JsonBackend.load(self, path, default)
+        self._offset[path] = 0
+        self._journaled[path] = 0
+        if isinstance(data, dict):
+            self._catch_up(path, data, ())
+        return data
+
+    def _read_journal(self, path: str, offset: int) -> bytes:
+        """Lignes complètes du journal après ``offset`` (verrou pris)."""
+        journal = self.journal_path(path)
+        try:
+            with open(journal, "rb") as f:
+                f.seek(offset)
+                raw = f.read()
+        except FileNotFoundError:
+            return b""
+        end = raw.rfind(b"\n") + 1
+        if end < len(raw):
+            # Ligne incomplète laissée par un processus interrompu : on a le verrou, on la retire
+            LOG.warning(f"Ligne de journal incomplète retirée de {journal}")
+            os.truncate(journal, offset + end)
+        return raw[:end]
+
+    def _catch_up(self, path: str, data: Dict[str, Any], skip: Iterable[str]) -> Set[str]:
+        raw = self._read_journal(path, self._offset[path])
+        changed = self._apply_lines(path, data, raw, skip)
+        self._offset[path] += len(raw)
+        return changed
+
+    def _apply_lines(self, path: str, data: Dict[str, Any], raw: bytes, skip: Iterable[str]) -> Set[str]:
+        journal = self.journal_path(path)
+        skip = set(skip)
+        changed: Set[str] = set()
+        for line in raw.splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                LOG.warning(f"Ligne de journal illisible ignorée dans {journal}")
+                continue
+            self._journaled[path] += 1
+            key = record["k"]
+            if key in skip:
+                continue
+            if record.get("d"):
+                data.pop(key, None)
+            else:
+                data[key] = record.get("v")
+            changed.add(key)
+        self.caught_up += len(changed)
+        return changed
+
+    def poll(self, path: str) -> bool:
+        """``True`` si un autre processus a écrit depuis la dernière lecture (sans verrou : deux ``stat``)."""
+        if self._identity(path) != self._snap_id.get(path):
+            return True
+        try:
+            size = os.path.getsize(self.journal_path(path))
+        except FileNotFoundError:
+            size = 0
+        return size != self._offset.get(path, 0)
+
+    def fetch(self, path: str) -> Tuple[Any, ...]:
+        """Lit sous verrou ce que les autres processus ont écrit, sans toucher aux données.
+
+        Appelée depuis un thread ; le résultat est appliqué sur la boucle par :meth:`apply`.
+        """
+        with self.locked(path):
+            start = (self._snap_id.get(path), self._offset.get(path, 0))
+            identity = self._identity(path)
+            if identity != start[0]:
+                fresh = JsonBackend.load(self, path, {})
+                raw = self._read_journal(path, 0) if isinstance(fresh, dict) else b""
+                return start, identity, fresh, raw
+            return start, None, None, self._read_journal(path, start[1])
+
+    def apply(self, path: str, data: Dict[str, Any], fetched: Tuple[Any, ...]) -> Set[str]:
+        """Applique le résultat de :meth:`fetch` à ``data`` (clés modifiées, ``{ALL}`` après relecture).
+
+        Sans effet si le fichier a été relu entre-temps (sous verrou, par une écriture locale).
+        """
+        start, identity, fresh, raw = fetched
+        if (self._snap_id.get(path), self._offset.get(path, 0)) != start:
+            return set()
+        if identity is None and fresh is None:
+            changed = self._apply_lines(path, data, raw, ())
+            self._offset[path] += len(raw)
+            return changed
+        data.clear()
+        data.update(fresh)
+        self._snap_id[path] = identity
+        self._journaled[path] = 0
+        self._apply_lines(path, data, raw, ())
+        self._offset[path] = len(raw)
+        return {ALL}
+
+    def refresh(self, path: str, data: Dict[str, Any], skip: Iterable[str] = ()) -> Set[str]:
+        """Applique à ``data`` les modifications des autres processus (verrou pris).
+
+        Args:
+            path: Fichier
+            data: Contenu en mémoire, modifié sur place
+            skip: Clés modifiées localement, à ne pas écraser
+
+        Returns:
+            Clés modifiées (``{ALL}`` après une relecture complète)
+        """
+        if self._identity(path) == self._snap_id.get(path):
+            return self._catch_up(path, data, skip)
+        kept = {k: data[k] for k in skip if k in data}
+        fresh = self._load_locked(path, {})
+        data.clear()
+        data.update(fresh)
+        for k in skip:
+            if k in kept:
+                data[k] = kept[k]
+            else:
+                data.pop(k, None)
+        return {ALL}
+
+    def commit(self, path: str, data: Any, keys: Set[str]) -> None:
+        """Écrit ``keys`` tout de suite (verrou pris, après :meth:`refresh`)."""
+        count = self._journaled.get(path)
+        if ALL in keys or not isinstance(data, dict) or count is None or count + len(keys) > self.compact_every:
+            atomic_write(path, codec.encode(data, self.codec))
+            try:
+                os.remove(self.journal_path(path))
+            except FileNotFoundError:
+                pass
+            self._snap_id[path] = self._identity(path)
+            self._offset[path] = 0
+            self._journaled[path] = 0
+            self.compactions += 1
+            return
+        raw = "".join(self._record(key, data) for key in keys).encode("utf-8")
+        with open(self.journal_path(path), "ab") as f:
+            f.write(raw)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        self._offset[path] += len(raw)
+        self._journaled[path] = count + len(keys)
+
+
+class Transaction:
+    """Unité de travail sur plusieurs fichiers du store (voir :meth:`DataStore.transaction`).
+
+    Attributes:
+        paths: Fichiers que la transaction peut modifier
+    """
+
+    def __init__(self, store: "DataStore", paths: Iterable[str]) -> None:
+        self.store = store
+        self.paths = sorted(set(paths))
+        # fichier -> {clé: valeur avant la transaction} (ALL : objet complet remplacé)
+        self._undo: Dict[str, Dict[str, Any]] = {}
+        self._keys: Dict[str, Set[str]] = {}
+        self._refreshed: Dict[str, Set[str]] = {}
+        self._locks: List[FileLock] = []
+
+    def __enter__(self) -> "Transaction":
+        store = self.store
+        try:
+            # Toujours dans le même ordre : deux instances ne s'attendent pas mutuellement
+            for path in self.paths:
+                backend = store.backend_for(path)
+                if not backend.shared:
+                    continue
+                lock = backend.locked(path)
+                lock.acquire()
+                self._locks.append(lock)
+                store._held.add(path)
+                if path in store._data:
+                    changed = backend.refresh(path, store._data[path])
+                    if changed:
+                        self._refreshed[path] = changed
+        except BaseException:
+            self._release()
+            raise
+        store._tx = self
+        return self
+
+    def stage(self, path: str, keys: Iterable[str], data: Any) -> None:
+        """Mémorise l'état de ``keys`` avant leur première modification."""
+        if path not in self.paths:
+            raise RuntimeError(f"{path} ne fait pas partie de la transaction")
+        undo = self._undo.setdefault(path, {})
+        for key in keys:
+            if key not in undo:
+                undo[key] = copy.deepcopy(data[key]) if isinstance(data, dict) and key in data else _MISSING
+        self._keys.setdefault(path, set()).update(keys)
+
+    def replace(self, path: str, old: Any) -> None:
+        """Mémorise l'objet remplacé par un ``set`` complet."""
+        if path not in self.paths:
+            raise RuntimeError(f"{path} ne fait pas partie de la transaction")
+        self._undo.setdefault(path, {}).setdefault(ALL, old)
+        self._keys.setdefault(path, set()).add(ALL)
+
+    def mark(self, path: str, keys: Set[str]) -> None:
+        if path not in self.paths:
+            raise RuntimeError(f"{path} ne fait pas partie de la transaction")
+        self._keys.setdefault(path, set()).update(keys)
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        store = self.store
+        store._tx = None
+        try:
+            if exc_type is None:
+                self._commit()
+            else:
+                self._rollback()
+        finally:
+            self._release()
+        for path, keys in self._refreshed.items():
+            store._notify(path, keys)
+        if exc_type is not None:
+            return
+        for path, keys in self._keys.items():
+            store._notify(path, keys)
+        if any(not store.backend_for(path).shared for path in self._keys):
+            store._schedule()
+
+    def _commit(self) -> None:
+        store = self.store
+        for path, keys in self._keys.items():
+            backend = store.backend_for(path)
+            if not backend.shared:
+                store._dirty.setdefault(path, set()).update(keys)
+                continue
+            try:
+                backend.commit(path, store._data[path], keys)
+                store.writes += 1
+            except Exception as e:
+                LOG.error(f"Erreur lors de la sauvegarde de {path}: {e}")
+                backend.failed(path)
+
+    def _rollback(self) -> None:
+        store = self.store
+        for path, undo in self._undo.items():
+            if ALL in undo:
+                if undo[ALL] is _MISSING:
+                    store._data.pop(path, None)
+                else:
+                    store._data[path] = undo[ALL]
+                continue
+            data = store._data[path]
+            for key, value in undo.items():
+                if value is _MISSING:
+                    data.pop(key, None)
+                else:
+                    data[key] = value
+        LOG.warning(f"Transaction annulée ({', '.join(self._undo) or 'aucune modification'})")
+
+    def _release(self) -> None:
+        self.store._held.difference_update(self.paths)
+        while self._locks:
+            self._locks.pop().release()
+
+
+class DataStore:
+    """Cache mémoire des fichiers JSON avec écriture différée (debounce).
+
+    Attributes:
+        flush_delay: Délai entre la première modification et l'écriture (secondes)
+    """
+
+    def __init__(self, flush_delay: float = 2.0, backend: Optional[StorageBackend] = None) -> None:
+        self.flush_delay = flush_delay
+        self.backend = backend or JsonBackend()
+        self._backends: Dict[str, StorageBackend] = {}
+        self._data: Dict[str, Any] = {}
+        # chemin -> clés de premier niveau modifiées (ALL : tout le fichier)
+        self._dirty: Dict[str, Set[str]] = {}
+        # Les instantanés sont écrits dans l'ordre où ils ont été pris
+        self._seq = 0
+        self._next_write = 0
+        self._write_turn = threading.Condition()
+        self._claimed: Set[int] = set()
+        self._abandoned: Set[int] = set()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._listeners: Dict[str, List[Callable[[Any, Set[str]], None]]] = {}
+        self._tx: Optional[Transaction] = None
+        # Fichiers partagés dont ce thread tient déjà le verrou (update, transaction)
+        self._held: Set[str] = set()
+        self._refreshing: Set[str] = set()
+        self.writes = 0
+
+    def mount(self, backend: StorageBackend, *paths: str) -> None:
+        """Confie la persistance de ``paths`` à ``backend`` (avant toute lecture)."""
+        for path in paths:
+            if path in self._data:
+                raise RuntimeError(f"{path} est déjà chargé")
+            self._backends[path] = backend
+
+    def backend_for(self, path: str) -> StorageBackend:
+        return self._backends.get(path, self.backend)
+
+    def add_listener(self, path: str, callback: Callable[[Any, Set[str]], None]) -> None:
+        """Appelle ``callback(données, clés)`` à chaque modification de ``path``.
+
+        ``clés`` contient les clés signalées, ou :data:`ALL` pour tout le fichier.
+        """
+        self._listeners.setdefault(path, []).append(callback)
+
+    # ----------------- lecture / modification -----------------
+
+    def get(self, path: str, default: Any = None) -> Any:
+        """Retourne le contenu d'un fichier, lu depuis le disque au premier accès.
+
+        Args:
+            path: Chemin du fichier
+            default: Valeur si le fichier n'existe pas ou est illisible (copiée)
+        """
+        backend = self.backend_for(path)
+        if path not in self._data:
+            # Verrou déjà pris par la transaction ou l'update en cours
+            held = path in self._held
+            self._data[path] = backend._load_locked(path, default) if held else backend.load(path, default)
+        elif backend.shared and path not in self._held:
+            self.refresh_if_changed(path)
+        return self._data[path]
+
+    def refresh_if_changed(self, path: str) -> bool:
+        """Rattrape les écritures des autres processus sur ``path`` (moteur partagé).
+
+        La vérification est un simple ``stat``, sans verrou. Si le fichier a
+        changé, la lecture sous verrou se fait dans un thread et ses
+        modifications sont appliquées puis signalées aux observateurs sur la
+        boucle (la boucle ne bloque jamais sur le verrou d'une autre instance) ;
+        sans boucle, elle est faite tout de suite.
+
+        Returns:
+            ``True`` si une mise à jour a été lancée ou faite
+        """
+        backend = self.backend_for(path)
+        if not backend.shared or path not in self._data or path in self._held or not backend.poll(path):
+            return False
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            with backend.locked(path):
+                changed = backend.refresh(path, self._data[path])
+            if changed:
+                self._notify(path, changed)
+            return True
+        if path not in self._refreshing:
+            self._refreshing.add(path)
+            loop.create_task(self._refresh_async(path))
+        return True
+
+    async def _refresh_async(self, path: str) -> None:
+        backend = self.backend_for(path)
+        try:
+            fetched = await asyncio.to_thread(backend.fetch, path)
+        except Exception as e:
+            LOG.error(f"Erreur lors de la relecture de {path}: {e}")
+            return
+        finally:
+            self._refreshing.discard(path)
+        changed = backend.apply(path, self._data[path], fetched)
+        if changed:
+            self._notify(path, changed)
+
+    def set(self, path: str, data: Any) -> None:
+        """Remplace le contenu d'un fichier et programme son écriture."""
+        if self._tx is not None:
+            self._tx.replace(path, self._data.get(path, _MISSING))
+        self._data[path] = data
+        self.mark_dirty(path)
+
+    def mark_dirty(self, path: str, *keys: Any) -> None:
+        """Signale une modification de ``path`` (éventuellement limitée à ``keys``).
+
+        Args:
+            path: Chemin du fichier
+            keys: Clés de premier niveau modifiées ; aucune = tout le fichier
+        """
+        if path not in self._data:
+            return
+        changed = {str(k) for k in keys} if keys else {ALL}
+        if self._tx is not None:
+            # Écrit et signalé à la fin de la transaction
+            self._tx.mark(path, changed)
+            return
+        backend = self.backend_for(path)
+        if backend.shared:
+            self._commit_shared(path, changed)
+            return
+        self._dirty.setdefault(path, set()).update(changed)
+        self._notify(path, changed)
+        self._schedule()
+
+    def update(self, path: str, keys: Iterable[Any], fn: Callable[[Any], None], default: Any = None) -> Any:
+        """Lecture-modification-écriture de ``keys`` sans perte entre processus.
+
+        ``fn(données)`` modifie les données sur place. Avec un moteur partagé,
+        tout se fait sous le verrou du fichier, après avoir rattrapé les
+        écritures des autres processus ; sinon c'est ``fn`` puis ``mark_dirty``.
+
+        Args:
+            path: Chemin du fichier
+            keys: Clés que ``fn`` peut modifier
+            fn: Modification à appliquer
+            default: Valeur si le fichier n'existe pas encore
+
+        Returns:
+            Les données du fichier
+        """
+        data = self.get(path, {} if default is None else default)
+        keys = {str(k) for k in keys}
+        backend = self.backend_for(path)
+        if self._tx is not None:
+            # Verrou déjà pris et données à jour : on garde de quoi annuler
+            self._tx.stage(path, keys, data)
+            fn(data)
+            return data
+        if not backend.shared:
+            fn(data)
+            if keys:
+                self.mark_dirty(path, *keys)
+            return data
+        with backend.locked(path):
+            # fn peut relire le fichier avec get() : pas de seconde prise du verrou
+            self._held.add(path)
+            try:
+                refreshed = backend.refresh(path, data)
+                fn(data)
+                if keys:
+                    backend.commit(path, data, keys)
+            finally:
+                self._held.discard(path)
+        if refreshed:
+            self._notify(path, refreshed)
+        if keys:
+            self._notify(path, keys)
+        return data
+
+    def transaction(self, *paths: str) -> Any:
+        """Unité de travail : les modifications de ``paths`` sont validées ensemble.
+
+        Dans le bloc ``with``, ``update``/``set`` s'appliquent tout de suite en
+        mémoire mais ne sont écrites et signalées aux observateurs qu'à la
+        sortie, dans un même flush (d'un seul bloc sur SQLite). Si le bloc
+        lève une exception, les valeurs touchées par ``update``/``set`` sont
+        restaurées et rien n'est écrit. Avec un moteur partagé, les verrous de
+        tous les fichiers sont pris à l'entrée (dans un ordre fixe) et gardés
+        jusqu'à la sortie.
+
+        Le bloc ne doit pas contenir d'``await`` : une autre coroutine
+        verrait des modifications pas encore validées. Une transaction
+        ouverte dans une autre rejoint la première si ses fichiers en font
+        partie.
+
+        Args:
+            paths: Fichiers modifiés par la transaction
+
+        Raises:
+            RuntimeError: Transaction imbriquée sur d'autres fichiers
+        """
+        if self._tx is not None:
+            if not set(paths) <= set(self._tx.paths):
+                raise RuntimeError("Transaction déjà en cours sur d'autres fichiers")
+            return contextlib.nullcontext(self._tx)
+        return Transaction(self, paths)
+
+    def _commit_shared(self, path: str, changed: Set[str]) -> None:
+        backend = self.backend_for(path)
+        data = self._data[path]
+        with backend.locked(path):
+            refreshed = set() if ALL in changed else backend.refresh(path, data, skip=changed)
+            try:
+                backend.commit(path, data, changed)
+                self.writes += 1
+            except Exception as e:
+                LOG.error(f"Erreur lors de la sauvegarde de {path}: {e}")
+                backend.failed(path)
+        if refreshed:
+            self._notify(path, refreshed)
+        self._notify(path, changed)
+
+    def _notify(self, path: str, changed: Set[str]) -> None:
+        for callback in self._listeners.get(path, ()):
+            try:
+                callback(self._data[path], changed)
+            except Exception as e:
+                LOG.error(f"Erreur d'un observateur de {path}: {e}")
+
+    async def save(self, path: str, data: Any = None, keys: Iterable[Any] = ()) -> None:
+        """Signale une modification et attend son écriture, faite hors de la boucle.
+
+        Équivalent asynchrone de ``set``/``mark_dirty`` suivi d'une écriture
+        immédiate : seul l'instantané est pris sur la boucle, la mise en forme
+        et l'accès disque se font dans un thread (:meth:`flush_async`).
+
+        Args:
+            path: Chemin du fichier
+            data: Nouveau contenu complet (``None`` : contenu actuel modifié sur place)
+            keys: Clés de premier niveau modifiées ; aucune = tout le fichier
+        """
+        if data is not None:
+            self._data[path] = data
+            keys = ()
+        self.mark_dirty(path, *keys)
+        if self._timer is not None:
+            # L'écriture qui suit emporte aussi les modifications en attente
+            self._timer.cancel()
+            self._timer = None
+        await self.flush_async()
+
+    def is_dirty(self, path: Optional[str] = None) -> bool:
+        return bool(self._dirty.get(path)) if path else bool(self._dirty)
+
+    # ----------------- écriture -----------------
+
+    def _schedule(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Pas de boucle (script, atexit) : écriture immédiate
+            self.flush()
+            return
+        if self._timer is None:
+            self._timer = loop.call_later(self.flush_delay, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        asyncio.get_running_loop().create_task(self.flush_async())
+
+    def _snapshot(self) -> Tuple[int, Dict[str, Any]]:
+        """Prépare l'écriture des fichiers modifiés et remet les marqueurs à zéro."""
+        pending = {}
+        for path, keys in self._dirty.items():
+            pending[path] = self.backend_for(path).snapshot(path, self._data[path], keys)
+        self._dirty.clear()
+        seq = self._seq
+        if pending:
+            self._seq += 1
+        return seq, pending
+
+    async def flush_async(self) -> None:
+        """Écrit les fichiers modifiés depuis un thread, sans bloquer la boucle."""
+        seq, pending = self._snapshot()
+        if not pending:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.to_thread(self._write_all, seq, pending, loop)
+        except asyncio.CancelledError:
+            # Écriture jamais lancée (tâche annulée, exécuteur arrêté) : son tour est libéré
+            self._abandon(seq, pending)
+            raise
+
+    def flush(self) -> None:
+        """Écrit immédiatement les fichiers modifiés (bloquant)."""
+        seq, pending = self._snapshot()
+        if pending:
+            self._write_all(seq, pending)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Annule l'écriture programmée et écrit tout ce qui reste.
+
+        Args:
+            timeout: Attente maximale des écritures encore en cours (secondes) ;
+                au-delà, elles sont abandonnées et les fichiers réécrits en entier
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        with self._write_turn:
+            done = self._write_turn.wait_for(lambda: self._next_write >= self._seq, timeout)
+            if not done:
+                LOG.error(f"Écritures en attente abandonnées après {timeout}s, réécriture complète")
+                self._next_write = self._seq
+                self._write_turn.notify_all()
+        if not done:
+            # On ne sait plus ce qui a été écrit : tout ce qui est chargé repart en entier
+            self._mark_failed(list(self._data), retry=False)
+        self.flush()
+
+    def _abandon(self, seq: int, pending: Dict[str, Any]) -> None:
+        with self._write_turn:
+            if seq in self._claimed:
+                return  # le thread l'a déjà prise : elle ira jusqu'au bout
+            self._abandoned.add(seq)
+            self._skip_abandoned()
+        self._mark_failed(list(pending))
+
+    def _skip_abandoned(self) -> None:
+        # Verrou _write_turn pris
+        while self._next_write in self._abandoned:
+            self._abandoned.discard(self._next_write)
+            self._next_write += 1
+        self._write_turn.notify_all()
+
+    def _mark_failed(self, paths: Iterable[str], retry: bool = True) -> None:
+        """Programme la réécriture complète de ``paths`` (sur la boucle, ou sans boucle)."""
+        for path in paths:
+            self.backend_for(path).failed(path)
+            self._dirty.setdefault(path, set()).add(ALL)
+        if retry:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return  # écriture synchrone : le prochain flush/close réessaiera
+            self._schedule()
+
+    def _write_all(self, seq: int, pending: Dict[str, Any], loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        failed: List[str] = []
+        # Un instantané plus ancien encore en cours d'écriture passe d'abord :
+        # les moteurs incrémentaux (SQLite) n'écrivent que des différences.
+        with self._write_turn:
+            if seq in self._abandoned:
+                self._abandoned.discard(seq)
+                return
+            self._claimed.add(seq)
+            self._write_turn.wait_for(lambda: self._next_write >= seq)
+            try:
+                if self._next_write > seq:
+                    # Tour sauté par close() après une attente trop longue
+                    failed.extend(pending)
+                    return
+                batches: Dict[int, Tuple[StorageBackend, Dict[str, Any]]] = {}
+                for path, payload in pending.items():
+                    backend = self.backend_for(path)
+                    batches.setdefault(id(backend), (backend, {}))[1][path] = payload
+                for backend, payloads in batches.values():
+                    try:
+                        backend.write_batch(payloads)
+                        self.writes += len(payloads)
+                    except Exception as e:
+                        LOG.error(f"Erreur lors de la sauvegarde de {', '.join(payloads)}: {e}")
+                        failed.extend(payloads)
+            finally:
+                self._claimed.discard(seq)
+                self._next_write = max(self._next_write, seq + 1)
+                self._skip_abandoned()
+                if failed:
+                    # Les marqueurs appartiennent à la boucle : la nouvelle tentative y est programmée
+                    if loop is not None and not loop.is_closed():
+                        loop.call_soon_threadsafe(self._mark_failed, failed)
+                    else:
+                        self._mark_failed(failed, retry=False)
+
+    def metrics(self) -> Dict[str, Any]:
+        metrics = {"files": len(self._data), "dirty": len(self._dirty), "writes": self.writes}
+        if self.backend.shared:
+            metrics["lock_wait"] = self.backend.lock_wait()
+        return metrics
@@ -0,0 +1,177 @@
+# scripts/bench_anilist.py
+"""
+Banc d'essai du client AniList contre le faux serveur (aucun accès réseau).
+
+Chaque scénario part d'un client neuf (cache vide) et mesure le temps total,
+les latences vues par les appelants et le nombre de requêtes reçues par le
+serveur :
+
+- ``tracker``  : boucle d'alertes, ``users`` × ``titles`` recherches par titre ;
+- ``details``  : fiches ``Media`` par id, tirées au hasard (fusion + lots + cache) ;
+- ``repeat``   : la même requête répétée (chemin du cache) ;
+- ``lanes``    : commandes (HIGH) et boucles (LOW) mêlées sous une limite basse.
+
+    python scripts/bench_anilist.py --latency 80 --rate 90
+    python scripts/bench_anilist.py --scenario tracker --users 200 --titles 10
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from fake_anilist import FakeAniList  # noqa: E402
+from modules.anilist import HIGH, LOW, AniListClient  # noqa: E402
+
+# Mêmes sélections que modules/core.py
+NEXT_AIRING_SELECTION = """{
+        title { romaji english native }
+        nextAiringEpisode { episode airingAt }
+        coverImage { large extraLarge }
+        format
+        season
+        seasonYear
+      }"""
+DETAILS_SELECTION = """{
+        id
+        title { romaji english native }
+        description
+        coverImage { large }
+        genres
+        averageScore
+        studios { nodes { name } }
+      }"""
+STATS_QUERY = """
+query ($name: String) {
+  User(name: $name) {
+    statistics { anime { count minutesWatched meanScore genres { genre count } } }
+  }
+}
+"""
+
+
+def _pct(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+async def _timed(samples: List[float], coro: Awaitable) -> None:
+    start = time.perf_counter()
+    await coro
+    samples.append((time.perf_counter() - start) * 1000)
+
+
+async def scenario_tracker(client: AniListClient, fake: FakeAniList, args) -> List[float]:
+    titles = [m["title"]["romaji"] for m in fake.resolver.fx.media.values()]
+    rng = random.Random(1)
+    tracked = [rng.sample(titles, min(args.titles, len(titles))) for _ in range(args.users)]
+    samples: List[float] = []
+
+    async def lookup(title: str) -> None:
+        await client.fetch("Media", {"type": ("MediaType", "ANIME"), "search": ("String", title)},
+                           NEXT_AIRING_SELECTION)
+
+    with client.background():
+        for _ in range(args.rounds):
+            # Comme Tracker.alert_loop : un appel par titre distinct, lancés ensemble
+            distinct = {t for user_titles in tracked for t in user_titles}
+            await asyncio.gather(*(_timed(samples, lookup(t)) for t in distinct))
+    return samples
+
+
+async def scenario_details(client: AniListClient, fake: FakeAniList, args) -> List[float]:
+    ids = list(fake.resolver.fx.media)
+    rng = random.Random(2)
+    samples: List[float] = []
+    sem = asyncio.Semaphore(args.concurrency)
+
+    async def one() -> None:
+        async with sem:
+            await _timed(samples, client.fetch("Media", {"id": ("Int", rng.choice(ids))}, DETAILS_SELECTION))
+
+    await asyncio.gather(*(one() for _ in range(args.calls)))
+    return samples
+
+
+async def scenario_repeat(client: AniListClient, fake: FakeAniList, args) -> List[float]:
+    samples: List[float] = []
+    for _ in range(args.calls):
+        await _timed(samples, client.query(STATS_QUERY, {"name": "Zirnoixdcoco"}))
+    return samples
+
+
+async def scenario_lanes(client: AniListClient, fake: FakeAniList, args) -> List[float]:
+    ids = list(fake.resolver.fx.media)
+    high: List[float] = []
+    low: List[float] = []
+    q = "query ($id: Int) { Media(id: $id) { id } }"
+    tasks = []
+    for i in range(args.calls):
+        lane, bucket = (HIGH, high) if i % 5 == 0 else (LOW, low)
+        tasks.append(_timed(bucket, client.query(q, {"id": ids[i % len(ids)]}, priority=lane, cache=False)))
+    await asyncio.gather(*tasks)
+    print(f"    HIGH p50={_pct(high, 50):.0f} ms p95={_pct(high, 95):.0f} ms "
+          f"| LOW p50={_pct(low, 50):.0f} ms p95={_pct(low, 95):.0f} ms")
+    return high + low
+
+
+SCENARIOS: Dict[str, Callable] = {
+    "tracker": scenario_tracker,
+    "details": scenario_details,
+    "repeat": scenario_repeat,
+    "lanes": scenario_lanes,
+}
+
+
+async def run(name: str, args) -> None:
+    async with FakeAniList(latency=args.latency, jitter=args.jitter, rate=args.rate,
+                           synthetic=args.synthetic, seed=0) as fake:
+        client = AniListClient(fake.url, rate_per_minute=args.client_rate, batch_size=args.batch)
+        start = time.perf_counter()
+        try:
+            samples = await SCENARIOS[name](client, fake, args)
+        finally:
+            await client.close()
+        elapsed = time.perf_counter() - start
+        m = client.metrics()
+        print(f"[{name}] {len(samples)} appels en {elapsed:.2f}s — "
+              f"serveur : {fake.stats['requests']} requêtes, 429 : {fake.stats['status'][429]}")
+        print(f"    latence p50={_pct(samples, 50):.1f} ms p95={_pct(samples, 95):.1f} ms "
+              f"p99={_pct(samples, 99):.1f} ms max={max(samples, default=0):.1f} ms")
+        c = m["cache"]
+        print(f"    cache {c['hits']}/{c['stale_hits']}/{c['misses']} (frais/périmés/manqués), "
+              f"fusions {m['coalesced']}, lots {m['batch']['documents']} pour {m['batch']['items']} sélections")
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description="Banc d'essai du client AniList (faux serveur local)")
+    ap.add_argument("--scenario", choices=[*SCENARIOS, "all"], default="all")
+    ap.add_argument("--latency", type=float, default=50.0, help="latence du serveur (ms)")
+    ap.add_argument("--jitter", type=float, default=10.0)
+    ap.add_argument("--rate", type=int, default=0, help="limite du serveur par minute (0 = aucune)")
+    ap.add_argument("--client-rate", type=int, default=6000, help="limite du client par minute")
+    ap.add_argument("--batch", type=int, default=20, help="sélections par lot")
+    ap.add_argument("--synthetic", type=int, default=200, help="médias générés en plus des fixtures")
+    ap.add_argument("--users", type=int, default=200)
+    ap.add_argument("--titles", type=int, default=10)
+    ap.add_argument("--rounds", type=int, default=2)
+    ap.add_argument("--calls", type=int, default=500)
+    ap.add_argument("--concurrency", type=int, default=50)
+    args = ap.parse_args()
+
+    for name in (SCENARIOS if args.scenario == "all" else [args.scenario]):
+        await run(name, args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
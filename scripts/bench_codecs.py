@@ -0,0 +1,80 @@
+# scripts/bench_codecs.py
+"""
+Banc d'essai des formats d'écriture des fichiers de données (modules/codec.py).
+
+Génère des tables de la forme de ``quiz_levels.json`` et ``quiz_scores.json``
+pour ``--users`` joueurs, puis mesure pour chaque format le temps
+d'encodage, d'écriture atomique (comme un flush du store), de relecture
+et la taille sur disque.
+
+    python scripts/bench_codecs.py --users 100000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from modules import codec  # noqa: E402
+from modules.store import atomic_write  # noqa: E402
+
+
+def _levels(users: int, rng: random.Random) -> Dict[str, Any]:
+    return {
+        str(rng.randrange(10 ** 17, 10 ** 18)): {"xp": rng.randrange(0, 500), "level": rng.randrange(0, 60)}
+        for _ in range(users)
+    }
+
+
+def _scores(users: int, rng: random.Random) -> Dict[str, Any]:
+    return {str(rng.randrange(10 ** 17, 10 ** 18)): rng.randrange(0, 2000) for _ in range(users)}
+
+
+DATASETS: Dict[str, Callable[[int, random.Random], Dict[str, Any]]] = {
+    "levels": _levels,
+    "scores": _scores,
+}
+
+
+def _best(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Banc d'essai des formats de fichiers de données")
+    ap.add_argument("--users", type=int, default=20000)
+    ap.add_argument("--repeat", type=int, default=5, help="mesures par opération (meilleure gardée)")
+    args = ap.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, build in DATASETS.items():
+            data = build(args.users, rng)
+            print(f"[{name}] {len(data)} joueurs")
+            for fmt in codec.CODECS:
+                path = os.path.join(tmp, f"{name}.{fmt}")
+                payload = codec.encode(data, fmt)
+                encode_ms = _best(lambda: codec.encode(data, fmt), args.repeat)
+                flush_ms = _best(lambda: atomic_write(path, codec.encode(data, fmt)), args.repeat)
+                load_ms = _best(lambda: codec.read_file(path), args.repeat)
+                assert codec.read_file(path) == data
+                size = len(payload.encode("utf-8") if isinstance(payload, str) else payload)
+                print(f"    {fmt:<13} encodage {encode_ms:8.1f} ms | flush {flush_ms:8.1f} ms "
+                      f"| lecture {load_ms:8.1f} ms | {size / 1024:9.1f} Kio")
+
+
+if __name__ == "__main__":
+    main()
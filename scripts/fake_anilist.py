@@ -0,0 +1,587 @@
+# scripts/fake_anilist.py
+"""
+Faux serveur GraphQL AniList, hors ligne, pour les benchmarks et les tests.
+
+Il répond aux requêtes du bot (``modules/core.py``, ``cogs/*.py``,
+``modules/animethemes.py``, ``modules/airing.py``, ``modules/medialist.py``)
+à partir des fixtures de ``scripts/fixtures/anilist/`` :
+
+- ``media.json``       : fiches ``Media``
+- ``characters.json``  : fiches ``Character``
+- ``airing.json``      : planning de diffusion (``airingSchedules``)
+- ``users.json``       : profils ``User`` (statistiques) et listes
+
+Les horodatages enregistrés (``airingAt``, ``updatedAt``) sont décalés de
+``maintenant - recorded_at`` au démarrage : le planning reste « à venir »
+quel que soit le jour où l'on lance le serveur.
+
+Le document GraphQL est réellement analysé (alias, variables, arguments,
+sélections imbriquées) et la réponse ne contient que les champs demandés.
+Fragments, directives et mutations ne sont pas pris en charge.
+
+Simulation (options ou ``POST /_control`` en JSON) :
+- ``latency`` / ``jitter`` : délai de réponse en millisecondes ;
+- ``rate`` : limite par minute, en-têtes ``X-RateLimit-*`` et 429 + ``Retry-After`` ;
+- ``throttle_rate`` : probabilité d'un 429 forcé ;
+- ``error_rate`` : probabilité d'une erreur 500 ;
+- ``outage`` : ``"down"`` (503 immédiat), ``"hang"`` (pas de réponse) ou ``null``.
+
+``GET /_stats`` renvoie les compteurs (requêtes, champs racine, statuts).
+
+En ligne de commande :
+    python scripts/fake_anilist.py --port 8765 --latency 80 --rate 90
+    ANILIST_URL=http://127.0.0.1:8765 python bot.py
+
+Dans un script :
+    async with FakeAniList(latency=50) as fake:
+        client = AniListClient(fake.url)
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import copy
+import json
+import random
+import re
+import time
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures" / "anilist"
+
+
+# ---------- Analyse GraphQL (sous-ensemble utilisé par le bot) ----------
+
+_TOKEN = re.compile(r'\s+|,|#[^\n]*|"(?:\\.|[^"\\])*"|-?\d+(?:\.\d+)?|\$?[_A-Za-z][_0-9A-Za-z]*|[{}()\[\]:!=]')
+
+
+class Field:
+    """Champ d'une sélection : ``alias: name(args) { children }``."""
+
+    __slots__ = ("alias", "name", "args", "children")
+
+    def __init__(self, alias: str, name: str, args: Dict[str, Any], children: List["Field"]) -> None:
+        self.alias = alias
+        self.name = name
+        self.args = args
+        self.children = children
+
+    def child(self, name: str) -> Optional["Field"]:
+        return next((c for c in self.children if c.name == name), None)
+
+
+class _Parser:
+    def __init__(self, text: str, variables: Dict[str, Any]) -> None:
+        self.tokens = [t for t in _TOKEN.findall(text) if t.strip() and t != "," and not t.startswith("#")]
+        self.pos = 0
+        self.variables = variables
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self, expected: Optional[str] = None) -> str:
+        tok = self.peek()
+        if tok is None or (expected is not None and tok != expected):
+            raise ValueError(f"Syntax Error: attendu {expected!r}, trouvé {tok!r}")
+        self.pos += 1
+        return tok
+
+    def document(self) -> List[Field]:
+        if self.peek() == "query":
+            self.take()
+            if self.peek() not in ("(", "{"):
+                self.take()  # nom de l'opération
+            if self.peek() == "(":
+                depth = 0
+                while True:  # définitions de variables : ignorées, les valeurs suffisent
+                    tok = self.take()
+                    depth += tok == "("
+                    depth -= tok == ")"
+                    if depth == 0:
+                        break
+        return self.selection_set()
+
+    def selection_set(self) -> List[Field]:
+        self.take("{")
+        fields = []
+        while self.peek() != "}":
+            fields.append(self.field())
+        self.take("}")
+        return fields
+
+    def field(self) -> Field:
+        name = self.take()
+        alias = name
+        if self.peek() == ":":
+            self.take()
+            name = self.take()
+        args: Dict[str, Any] = {}
+        if self.peek() == "(":
+            self.take()
+            while self.peek() != ")":
+                key = self.take()
+                self.take(":")
+                args[key] = self.value()
+            self.take(")")
+        children = self.selection_set() if self.peek() == "{" else []
+        return Field(alias, name, args, children)
+
+    def value(self) -> Any:
+        tok = self.take()
+        if tok.startswith("$"):
+            return self.variables.get(tok[1:])
+        if tok.startswith('"'):
+            return json.loads(tok)
+        if tok == "[":
+            items = []
+            while self.peek() != "]":
+                items.append(self.value())
+            self.take("]")
+            return items
+        if tok == "{":
+            obj = {}
+            while self.peek() != "}":
+                key = self.take()
+                self.take(":")
+                obj[key] = self.value()
+            self.take("}")
+            return obj
+        if tok in ("true", "false"):
+            return tok == "true"
+        if tok == "null":
+            return None
+        if re.fullmatch(r"-?\d+", tok):
+            return int(tok)
+        if re.fullmatch(r"-?\d+\.\d+", tok):
+            return float(tok)
+        return tok  # valeur d'énumération (ANIME, POPULARITY_DESC...)
+
+
+def parse(query: str, variables: Optional[Dict[str, Any]] = None) -> List[Field]:
+    return _Parser(query, variables or {}).document()
+
+
+def project(value: Any, fields: List[Field]) -> Any:
+    """Ne garde de ``value`` que les champs sélectionnés (alias compris)."""
+    if not fields or value is None:
+        return value
+    if isinstance(value, list):
+        return [project(v, fields) for v in value]
+    if not isinstance(value, dict):
+        return value
+    return {f.alias: project(value.get(f.name), f.children) for f in fields}
+
+
+@lru_cache(maxsize=65536)
+def _norm(text: Optional[str]) -> str:
+    if not text:
+        return ""
+    text = "".join(c for c in unicodedata.normalize("NFD", text) if unicodedata.category(c) != "Mn")
+    return "".join(c for c in text.lower() if c.isalnum() or c.isspace()).strip()
+
+
+class NotFound(Exception):
+    pass
+
+
+# ---------- Données ----------
+
+class Fixtures:
+    """Fixtures chargées en mémoire, horodatages recalés sur maintenant."""
+
+    def __init__(self, directory: Path = FIXTURES_DIR, synthetic: int = 0) -> None:
+        media = json.loads((directory / "media.json").read_text(encoding="utf-8"))
+        chars = json.loads((directory / "characters.json").read_text(encoding="utf-8"))
+        airing = json.loads((directory / "airing.json").read_text(encoding="utf-8"))
+        users = json.loads((directory / "users.json").read_text(encoding="utf-8"))
+
+        now = int(time.time())
+        self.media: Dict[int, dict] = {m["id"]: m for m in media["media"]}
+        self.characters: Dict[int, dict] = {c["id"]: c for c in chars["characters"]}
+        shift = now - int(airing["recorded_at"])
+        self.schedules: List[dict] = sorted(
+            ({**s, "airingAt": s["airingAt"] + shift} for s in airing["schedules"]),
+            key=lambda s: s["airingAt"],
+        )
+        shift = now - int(users["recorded_at"])
+        self.users: Dict[str, dict] = {}
+        for key, u in users["users"].items():
+            entries = [{**e, "updatedAt": e["updatedAt"] + shift} for e in u.get("list", [])]
+            self.users[key.lower()] = {**u, "list": entries}
+
+        if synthetic:
+            self._add_synthetic(synthetic, now)
+        self._index_schedules()
+
+    def _add_synthetic(self, count: int, now: int) -> None:
+        """Clone les fixtures pour les tests de charge (``count`` médias et utilisateurs)."""
+        rng = random.Random(42)
+        base_media = list(self.media.values())
+        for i in range(count):
+            src = base_media[i % len(base_media)]
+            mid = 900000 + i
+            m = copy.deepcopy(src)
+            m["id"] = mid
+            m["title"] = {k: f"{v} #{i}" if v else v for k, v in src["title"].items()}
+            m["popularity"] = rng.randint(1000, 900000)
+            self.media[mid] = m
+            if m.get("status") == "RELEASING" or i % 3 == 0:
+                at = now + rng.randint(-7 * 86400, 7 * 86400)
+                self.schedules.append({"id": 800000 + i, "airingAt": at, "episode": rng.randint(1, 24), "mediaId": mid})
+        self.schedules.sort(key=lambda s: s["airingAt"])
+        ids = list(self.media)
+        template = next(iter(self.users.values()))
+        for i in range(count):
+            picks = rng.sample(ids, min(len(ids), 40))
+            entries = [
+                {"mediaId": mid, "status": rng.choice(["CURRENT", "COMPLETED", "PLANNING"]),
+                 "updatedAt": now - j * 3600, "score": rng.randint(4, 10)}
+                for j, mid in enumerate(picks)
+            ]
+            self.users[f"user{i}"] = {**template, "name": f"user{i}", "list": entries}
+
+    def _index_schedules(self) -> None:
+        self._by_media: Dict[int, List[dict]] = {}
+        for s in self.schedules:
+            self._by_media.setdefault(s["mediaId"], []).append(s)
+
+    def next_airing(self, media_id: int) -> Optional[dict]:
+        now = time.time()
+        for s in self._by_media.get(media_id, ()):
+            if s["airingAt"] > now:
+                return {"airingAt": s["airingAt"], "episode": s["episode"],
+                        "timeUntilAiring": int(s["airingAt"] - now)}
+        return None
+
+    def media_view(self, media_id: int) -> Optional[dict]:
+        m = self.media.get(media_id)
+        if m is None:
+            return None
+        return {**m, "nextAiringEpisode": self.next_airing(media_id)}
+
+    def search_media(self, args: Dict[str, Any]) -> List[dict]:
+        items = list(self.media.values())
+        if args.get("type"):
+            items = [m for m in items if m.get("type", "ANIME") == args["type"]]
+        if args.get("isAdult") is not None:
+            items = [m for m in items if bool(m.get("isAdult")) == args["isAdult"]]
+        if args.get("id") is not None:
+            items = [m for m in items if m["id"] == args["id"]]
+        if args.get("search"):
+            needle = _norm(args["search"])
+            scored = []
+            for m in items:
+                titles = [_norm(t) for t in (m.get("title") or {}).values() if t]
+                if any(needle == t for t in titles):
+                    scored.append((0, m))
+                elif any(needle in t for t in titles):
+                    scored.append((1, m))
+                elif any(all(w in t for w in needle.split()) for t in titles):
+                    scored.append((2, m))
+            scored.sort(key=lambda x: (x[0], -(x[1].get("popularity") or 0)))
+            items = [m for _, m in scored]
+            if not args.get("sort"):
+                return [self.media_view(m["id"]) for m in items]
+        return [self.media_view(m["id"]) for m in _sort(items, args.get("sort"))]
+
+
+def _sort(items: List[dict], sort: Any) -> List[dict]:
+    keys = sort if isinstance(sort, list) else [sort] if sort else []
+    for key in reversed(keys):
+        name, _, direction = str(key).rpartition("_") if str(key).endswith("_DESC") else (str(key), "", "")
+        field = {
+            "POPULARITY": "popularity", "TRENDING": "trending", "SCORE": "averageScore",
+            "FAVOURITES": "favourites", "TIME": "airingAt", "UPDATED_TIME": "updatedAt", "ID": "id",
+        }.get(name)
+        if field:
+            items = sorted(items, key=lambda x: x.get(field) or 0, reverse=direction == "DESC")
+    return items
+
+
+# ---------- Résolution ----------
+
+class Resolver:
+    def __init__(self, fixtures: Fixtures, wrap_pages: bool = True) -> None:
+        self.fx = fixtures
+        self.wrap_pages = wrap_pages
+
+    def root(self, field: Field) -> Any:
+        a = field.args
+        if field.name == "Media":
+            items = self.fx.search_media(a)
+            if not items:
+                raise NotFound()
+            return items[0]
+        if field.name == "Character":
+            char = self.fx.characters.get(a.get("id"))
+            if char is None:
+                raise NotFound()
+            return char
+        if field.name == "User":
+            user = self.fx.users.get(str(a.get("name") or "").lower())
+            if user is None:
+                raise NotFound()
+            return {k: v for k, v in user.items() if k != "list"}
+        if field.name == "MediaListCollection":
+            return {"lists": [{"entries": self._list_entries(a)}]}
+        if field.name == "Page":
+            return self._page(field)
+        raise ValueError(f'Cannot query field "{field.name}" on type "Query".')
+
+    def _list_entries(self, a: Dict[str, Any]) -> List[dict]:
+        user = self.fx.users.get(str(a.get("userName") or "").lower())
+        if user is None:
+            raise NotFound()
+        statuses = a.get("status_in") or ([a["status"]] if a.get("status") else None)
+        entries = [e for e in user["list"] if not statuses or e["status"] in statuses]
+        return [{**e, "media": self.fx.media_view(e["mediaId"])} for e in entries]
+
+    def _page(self, field: Field) -> dict:
+        page = max(1, int(field.args.get("page") or 1))
+        per_page = min(50, max(1, int(field.args.get("perPage") or 50)))
+        out: Dict[str, Any] = {}
+        total = 0
+        for child in field.children:
+            if child.name == "pageInfo":
+                continue
+            items = self._page_items(child)
+            total = len(items)
+            start = (page - 1) * per_page
+            if self.wrap_pages and items and start >= len(items):
+                # Les mini-jeux tirent une page au hasard jusqu'à 100 : on reboucle
+                start %= len(items)
+            out[child.name] = items[start:start + per_page]
+        out["pageInfo"] = {"hasNextPage": page * per_page < total, "currentPage": page,
+                           "perPage": per_page, "total": total}
+        return out
+
+    def _page_items(self, field: Field) -> List[dict]:
+        a = field.args
+        if field.name == "media":
+            return self.fx.search_media(a)
+        if field.name == "characters":
+            return _sort(list(self.fx.characters.values()), a.get("sort"))
+        if field.name == "airingSchedules":
+            now = time.time()
+            items = self.fx.schedules
+            if a.get("notYetAired"):
+                items = [s for s in items if s["airingAt"] > now]
+            if a.get("airingAt_greater") is not None:
+                items = [s for s in items if s["airingAt"] > a["airingAt_greater"]]
+            if a.get("airingAt_lesser") is not None:
+                items = [s for s in items if s["airingAt"] < a["airingAt_lesser"]]
+            if a.get("mediaId") is not None:
+                items = [s for s in items if s["mediaId"] == a["mediaId"]]
+            items = [{**s, "media": self.fx.media_view(s["mediaId"])} for s in items]
+            return _sort(items, a.get("sort") or "TIME")
+        if field.name == "mediaList":
+            try:
+                return _sort(self._list_entries(a), a.get("sort"))
+            except NotFound:
+                return []
+        raise ValueError(f'Cannot query field "{field.name}" on type "Page".')
+
+    def execute(self, query: str, variables: Optional[Dict[str, Any]]) -> Tuple[int, dict, List[str]]:
+        """Exécute un document ; retourne ``(statut HTTP, corps, champs racine)``."""
+        try:
+            fields = parse(query, variables)
+        except ValueError as e:
+            return 400, {"errors": [{"message": str(e), "status": 400}], "data": None}, []
+        data: Dict[str, Any] = {}
+        errors = []
+        for f in fields:
+            try:
+                data[f.alias] = project(self.root(f), f.children)
+            except NotFound:
+                data[f.alias] = None
+                errors.append({"message": "Not Found.", "status": 404, "path": [f.alias]})
+            except ValueError as e:
+                data[f.alias] = None
+                errors.append({"message": str(e), "status": 400, "path": [f.alias]})
+        body: Dict[str, Any] = {"data": data}
+        if errors:
+            body["errors"] = errors
+            # Comme AniList : le statut de la première erreur, données partielles comprises
+            return errors[0]["status"], body, [f.name for f in fields]
+        return 200, body, [f.name for f in fields]
+
+
+# ---------- Serveur ----------
+
+class FakeAniList:
+    """Serveur aiohttp en processus, à utiliser comme ``async with``.
+
+    Attributes:
+        url: URL de l'endpoint une fois démarré
+        stats: Compteurs (requêtes, champs racine, statuts HTTP)
+    """
+
+    def __init__(
+        self,
+        *,
+        fixtures: Path = FIXTURES_DIR,
+        synthetic: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        rate: int = 90,
+        throttle_rate: float = 0.0,
+        error_rate: float = 0.0,
+        outage: Optional[str] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.resolver = Resolver(Fixtures(fixtures, synthetic))
+        self.latency = latency
+        self.jitter = jitter
+        self.rate = rate
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.outage = outage
+        self.rng = random.Random(seed)
+        self.url = ""
+        self.stats: Dict[str, Any] = {"requests": 0, "fields": Counter(), "status": Counter()}
+        self._tokens = float(rate)
+        self._refill_at = time.monotonic()
+        self._runner: Optional[web.AppRunner] = None
+
+    # --- limite de débit (même logique qu'AniList : fenêtre glissante par minute) ---
+
+    def _take_token(self) -> Tuple[bool, int]:
+        now = time.monotonic()
+        if self.rate > 0:
+            self._tokens = min(self.rate, self._tokens + (now - self._refill_at) * self.rate / 60.0)
+        self._refill_at = now
+        if self.rate <= 0:
+            return True, 0
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True, int(self._tokens)
+        return False, 0
+
+    def _rate_headers(self, remaining: int) -> Dict[str, str]:
+        return {"X-RateLimit-Limit": str(self.rate), "X-RateLimit-Remaining": str(remaining)}
+
+    def _throttled(self) -> web.Response:
+        wait = 60 if self.rate <= 0 else max(1, int((1 - self._tokens) * 60 / self.rate) + 1)
+        headers = {**self._rate_headers(0), "Retry-After": str(wait),
+                   "X-RateLimit-Reset": str(int(time.time()) + wait)}
+        self.stats["status"][429] += 1
+        return web.json_response({"errors": [{"message": "Too Many Requests.", "status": 429}], "data": None},
+                                 status=429, headers=headers)
+
+    # --- handlers ---
+
+    async def handle_graphql(self, request: web.Request) -> web.StreamResponse:
+        self.stats["requests"] += 1
+        while self.outage == "hang":
+            # Pas de réponse tant que la panne dure (le client finit en timeout)
+            await asyncio.sleep(0.1)
+        if self.outage == "down":
+            self.stats["status"][503] += 1
+            return web.Response(status=503, text="Service Unavailable")
+
+        delay = self.latency + (self.rng.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000.0)
+
+        ok, remaining = self._take_token()
+        if not ok or self.rng.random() < self.throttle_rate:
+            return self._throttled()
+        if self.rng.random() < self.error_rate:
+            self.stats["status"][500] += 1
+            return web.json_response({"errors": [{"message": "Internal Server Error", "status": 500}], "data": None},
+                                     status=500, headers=self._rate_headers(remaining))
+
+        try:
+            payload = await request.json()
+        except ValueError:
+            self.stats["status"][400] += 1
+            return web.json_response({"errors": [{"message": "Invalid JSON", "status": 400}], "data": None},
+                                     status=400, headers=self._rate_headers(remaining))
+        status, body, roots = self.resolver.execute(payload.get("query") or "", payload.get("variables"))
+        self.stats["fields"].update(roots)
+        self.stats["status"][status] += 1
+        return web.json_response(body, status=status, headers=self._rate_headers(remaining),
+                                 dumps=lambda o: json.dumps(o, ensure_ascii=False))
+
+    async def handle_control(self, request: web.Request) -> web.Response:
+        changes = await request.json()
+        for key in ("latency", "jitter", "rate", "throttle_rate", "error_rate", "outage"):
+            if key in changes:
+                setattr(self, key, changes[key])
+        if "rate" in changes:
+            self._tokens = float(self.rate)
+        return web.json_response(self.settings())
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response({**self.stats, "settings": self.settings()})
+
+    def settings(self) -> Dict[str, Any]:
+        return {"latency": self.latency, "jitter": self.jitter, "rate": self.rate,
+                "throttle_rate": self.throttle_rate, "error_rate": self.error_rate, "outage": self.outage}
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/", self.handle_graphql)
+        app.router.add_post("/_control", self.handle_control)
+        app.router.add_get("/_stats", self.handle_stats)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound = site._server.sockets[0].getsockname()[1]  # port choisi par l'OS si 0
+        self.url = f"http://{host}:{bound}/"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "FakeAniList":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.stop()
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description="Faux serveur GraphQL AniList (fixtures locales)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency", type=float, default=0.0, help="délai de réponse (ms)")
+    ap.add_argument("--jitter", type=float, default=0.0, help="variation du délai (ms)")
+    ap.add_argument("--rate", type=int, default=90, help="requêtes par minute (0 = illimité)")
+    ap.add_argument("--throttle-rate", type=float, default=0.0, help="probabilité d'un 429 forcé")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="probabilité d'une erreur 500")
+    ap.add_argument("--outage", choices=["down", "hang"], default=None)
+    ap.add_argument("--synthetic", type=int, default=0, help="médias/utilisateurs générés en plus")
+    ap.add_argument("--seed", type=int, default=None)
+    args = ap.parse_args()
+
+    fake = FakeAniList(
+        synthetic=args.synthetic, latency=args.latency, jitter=args.jitter, rate=args.rate,
+        throttle_rate=args.throttle_rate, error_rate=args.error_rate, outage=args.outage, seed=args.seed,
+    )
+    url = await fake.start(args.host, args.port)
+    print(f"Faux AniList prêt sur {url} (ANILIST_URL={url})")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await fake.stop()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,124 @@
+"""Tests de modules/airing.py : miroir local du planning de diffusion."""
+
+import asyncio
+import time
+
+from modules.airing import AiringIndex, title_key
+from modules.anilist import AniListClient
+from scripts.fake_anilist import FakeAniList
+
+
+class Schedule:
+    """Client minimal : sert ``Page.airingSchedules`` depuis une liste, par pages de 50."""
+
+    def __init__(self, schedules):
+        self.schedules = schedules
+        self.calls = []
+        self.down = False
+
+    async def query(self, query, variables, cache=True):
+        self.calls.append(variables)
+        if self.down:
+            return {}
+        items = sorted(
+            (s for s in self.schedules if variables["start"] < s["airingAt"] < variables["end"]),
+            key=lambda s: s["airingAt"],
+        )
+        page = variables["page"]
+        return {"data": {"Page": {
+            "pageInfo": {"hasNextPage": page * 50 < len(items)},
+            "airingSchedules": items[(page - 1) * 50:page * 50],
+        }}}
+
+
+def _schedule(sid, at, media_id, episode=1, title=None):
+    media = {"id": media_id, "title": {"romaji": title or f"Anime {media_id}", "english": None}}
+    return {"id": sid, "airingAt": at, "episode": episode, "mediaId": media_id, "media": media}
+
+
+def test_title_key_ignores_case_accents_and_punctuation():
+    assert title_key("Sousou no Frieren!") == title_key("sousou NO frieren")
+    assert title_key("Café") == "cafe"
+    assert title_key(None) == ""
+
+
+def test_full_sync_indexes_by_time_media_and_title():
+    now = int(time.time())
+    client = Schedule(
+        [_schedule(i, now + 600 * i, 100 + i % 7) for i in range(1, 61)]
+        + [_schedule(99, now + 3000, 500, title="Kōkaku Kidōtai")]
+    )
+    index = AiringIndex(client)
+
+    async def main():
+        assert not await index.wait_ready(timeout=0)
+        assert await index.sync() == 61
+        assert await index.wait_ready(timeout=0)
+
+    asyncio.run(main())
+    assert len(index) == 61 and len(client.calls) == 2  # deux pages
+    assert index.next_airing(now)["id"] == 1
+    assert [e["id"] for e in index.between(now + 600, now + 2400)] == [1, 2, 3]
+    assert index.next_for_media(101, now + 600)["id"] == 8
+    assert index.next_for_title("kokaku kidotai", now)["mediaId"] == 500
+    assert index.next_for_title("inconnu", now) is None
+    assert index.covers("Anime 103") and index.metrics()["media"] == 8
+
+
+def test_incremental_sync_replaces_its_window():
+    now = int(time.time())
+    client = Schedule([
+        _schedule(1, now + 1800, 10, title="Reporté"),
+        _schedule(2, now + 3600, 20, title="Annulé"),
+        _schedule(3, now + 3 * 86400, 30),
+    ])
+    index = AiringIndex(client, horizon=6 * 3600)
+
+    async def main():
+        await index.sync(full=True)
+        client.schedules = [
+            _schedule(1, now + 2 * 86400, 10, title="Reporté"),  # sort de la zone relue
+            _schedule(4, now + 7200, 40, title="Ajouté"),
+        ]
+        await index.sync()
+
+    asyncio.run(main())
+    start, end = client.calls[-1]["start"], client.calls[-1]["end"]
+    assert start <= now and end <= now + 6 * 3600 + 5
+    # Le report n'est pas encore connu (hors zone), l'annulation et l'ajout le sont
+    assert index.next_for_title("Reporté", now) is None
+    assert not index.covers("Annulé")
+    assert index.next_for_title("Ajouté", now)["id"] == 4
+    assert index.next_for_media(30, now)["id"] == 3
+
+
+def test_failed_sync_keeps_the_index():
+    now = int(time.time())
+    client = Schedule([_schedule(1, now + 600, 10)])
+    index = AiringIndex(client)
+
+    async def main():
+        await index.sync(full=True)
+        client.down = True
+        assert await index.sync(full=True) == 0
+
+    asyncio.run(main())
+    assert len(index) == 1 and index.next_for_media(10, now)["id"] == 1
+
+
+def test_sync_against_the_stand_in():
+    async def main():
+        async with FakeAniList() as fake:
+            client = AniListClient(fake.url)
+            try:
+                index = AiringIndex(client)
+                received = await index.sync(full=True)
+            finally:
+                await client.close()
+        assert received > 0 and len(index) == received
+        upcoming = index.next_airing()
+        assert upcoming is not None and upcoming["airingAt"] > time.time()
+        title = upcoming["media"]["title"]["romaji"]
+        assert index.next_for_title(title)["mediaId"] == upcoming["mediaId"]
+
+    asyncio.run(main())
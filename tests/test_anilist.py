@@ -0,0 +1,356 @@
+"""Tests de modules/anilist.py : limiteur de débit, disjoncteur, regroupement et client."""
+
+import asyncio
+
+import aiohttp
+from aiohttp import web
+
+from modules.anilist import HIGH, LOW, AniListClient, BatchLoader, CircuitBreaker, RateLimiter, is_stale, request_key
+from scripts.fake_anilist import FakeAniList
+
+MEDIA = "{ id title { romaji } }"
+
+
+def _media_key(media_id):
+    return request_key(BatchLoader._item_document("Media", {"id": ("Int", 0)}, MEDIA), {"id": media_id})
+
+
+async def _fetch_media(client, media_id):
+    return await client.fetch("Media", {"id": ("Int", media_id)}, MEDIA)
+
+
+# ----------------- RateLimiter -----------------
+
+def test_limiter_fast_path_consumes_tokens():
+    async def main():
+        limiter = RateLimiter(rate_per_minute=60, burst=5, low_reserve=0)
+        for _ in range(5):
+            await limiter.acquire(HIGH)
+        return limiter
+
+    limiter = asyncio.run(main())
+    assert limiter.tokens < 1
+    assert limiter.metrics()["lanes"][HIGH]["served"] == 5
+
+
+def test_low_lane_keeps_reserve_for_high():
+    async def main():
+        limiter = RateLimiter(rate_per_minute=60, burst=12, low_reserve=10)
+        await limiter.acquire(LOW)  # 12 -> 11
+        low = asyncio.create_task(limiter.acquire(LOW))  # 11 jetons : besoin de 11 -> passe
+        await asyncio.wait_for(low, 1)
+        blocked = asyncio.create_task(limiter.acquire(LOW))  # 10 jetons : réservés
+        await asyncio.sleep(0.05)
+        assert not blocked.done()
+        await asyncio.wait_for(limiter.acquire(HIGH), 1)  # HIGH passe sur la réserve
+        blocked.cancel()
+
+    asyncio.run(main())
+
+
+def test_high_lane_is_served_before_low():
+    async def main():
+        limiter = RateLimiter(rate_per_minute=600, burst=1, low_reserve=0)
+        limiter.tokens = 0.0
+        order = []
+
+        async def take(lane, name):
+            await limiter.acquire(lane)
+            order.append(name)
+
+        low = asyncio.create_task(take(LOW, "low"))
+        await asyncio.sleep(0)
+        high = asyncio.create_task(take(HIGH, "high"))
+        await asyncio.wait_for(asyncio.gather(low, high), 2)
+        return order
+
+    assert asyncio.run(main()) == ["high", "low"]
+
+
+def test_limiter_follows_server_headers():
+    limiter = RateLimiter(rate_per_minute=90)
+    assert limiter.update_from_headers({"X-RateLimit-Limit": "30", "X-RateLimit-Remaining": "4"}, 200) is None
+    assert limiter.rate_per_minute == 30 and limiter.tokens <= 4
+    assert limiter.update_from_headers({"Retry-After": "12"}, 429) == 12.0
+    assert limiter.tokens == 0.0 and limiter.throttled == 1
+    assert limiter.metrics()["blocked_for"] > 10
+
+
+# ----------------- CircuitBreaker -----------------
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    states = []
+    breaker.add_listener(states.append)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()  # remet le compteur à zéro
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert states == [CircuitBreaker.OPEN] and breaker.trips == 1
+
+
+def test_breaker_half_open_allows_a_single_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.reset_timeout = 60
+    assert not breaker.allow_request()  # essai déjà en cours
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.failures == 0
+
+
+def test_breaker_failed_probe_reopens():
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=0)
+    for _ in range(5):
+        breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()  # un seul échec suffit en half_open
+    assert breaker.state == CircuitBreaker.OPEN and breaker.trips == 2
+
+
+def test_breaker_listener_errors_are_contained():
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.add_listener(lambda state: 1 / 0)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_batched_lookups_send_the_half_open_probe():
+    """Le lot part avec l'essai half_open et les pannes rendent la dernière valeur connue."""
+    async def main():
+        async with FakeAniList() as fake:
+            client = AniListClient(fake.url, failure_threshold=1, reset_timeout=0.2, max_retries=0)
+            try:
+                value = await _fetch_media(client, 21)
+                assert value["title"]["romaji"] == "One Piece"
+                client.cache.set(_media_key(21), value, -10, -5)  # expirée, gardée pour peek()
+
+                fake.outage = "down"
+                stale = await _fetch_media(client, 21)
+                assert is_stale(stale) and stale == value
+                assert client.breaker.state == CircuitBreaker.OPEN
+
+                sent = fake.stats["requests"]
+                assert is_stale(await _fetch_media(client, 21))
+                assert await _fetch_media(client, 999999) is None  # jamais vue : rien à servir
+                assert fake.stats["requests"] == sent
+
+                fake.outage = None
+                await asyncio.sleep(0.25)
+                fresh = await _fetch_media(client, 21)
+                assert not is_stale(fresh) and fresh == value
+                assert fake.stats["requests"] == sent + 1
+                assert client.breaker.state == CircuitBreaker.CLOSED
+            finally:
+                await client.close()
+
+    asyncio.run(main())
+
+
+# ----------------- AniListClient -----------------
+
+QUERY = "query ($id: Int) { Media(id: $id) { id title { romaji } } }"
+
+
+def test_client_queries_the_endpoint():
+    async def main():
+        async with FakeAniList() as fake:
+            client = AniListClient(fake.url)
+            try:
+                result = await client.query(QUERY, {"id": 154587})
+                missing = await client.query(QUERY, {"id": 999999})
+            finally:
+                await client.close()
+        assert result["data"]["Media"]["title"]["romaji"] == "Sousou no Frieren"
+        # 404 : AniList renvoie les données partielles, ici un champ vide
+        assert missing["data"]["Media"] is None
+
+    asyncio.run(main())
+
+
+def test_unreadable_body_counts_as_a_failure():
+    async def broken(request):
+        return web.Response(status=200, text="<html>maintenance</html>")
+
+    async def main():
+        app = web.Application()
+        app.router.add_post("/", broken)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        client = AniListClient(f"http://127.0.0.1:{port}/", failure_threshold=1)
+        try:
+            assert await client.query(QUERY, {"id": 21}) == {}
+            assert client.breaker.state == CircuitBreaker.OPEN
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    asyncio.run(main())
+
+
+def test_identical_concurrent_queries_share_one_request():
+    async def main():
+        async with FakeAniList(latency=50) as fake:
+            client = AniListClient(fake.url)
+            try:
+                first, second = await asyncio.gather(
+                    client.query(QUERY, {"id": 21}, cache=False),
+                    client.query(QUERY, {"id": 21}, cache=False),
+                )
+                other = await client.query(QUERY, {"id": 16498}, cache=False)
+            finally:
+                await client.close()
+            assert first is second
+            assert other["data"]["Media"]["id"] == 16498
+            assert fake.stats["requests"] == 2 and client.coalesced == 1
+
+    asyncio.run(main())
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_request():
+    async def main():
+        async with FakeAniList(latency=100) as fake:
+            client = AniListClient(fake.url)
+            try:
+                first = asyncio.create_task(client.query(QUERY, {"id": 21}, cache=False))
+                await asyncio.sleep(0.02)
+                second = asyncio.create_task(client.query(QUERY, {"id": 21}, cache=False))
+                await asyncio.sleep(0.02)
+                first.cancel()
+                result = await second
+            finally:
+                await client.close()
+            assert result["data"]["Media"]["id"] == 21
+            assert fake.stats["requests"] == 1
+
+    asyncio.run(main())
+
+
+# ----------------- BatchLoader -----------------
+
+def test_concurrent_lookups_are_split_into_aliased_documents():
+    async def main():
+        async with FakeAniList() as fake:
+            client = AniListClient(fake.url, batch_size=2)
+            try:
+                results = await asyncio.gather(
+                    *(_fetch_media(client, media_id) for media_id in (21, 154587, 16498, 999999)),
+                    client.fetch("Character", {"id": ("Int", 40)}, "{ id }"),
+                )
+            finally:
+                await client.close()
+            assert [r and r["id"] for r in results] == [21, 154587, 16498, None, 40]
+            assert client.batcher.documents == 3 and client.batcher.items == 5
+            assert fake.stats["requests"] == 3
+
+    asyncio.run(main())
+
+
+def test_partial_errors_only_affect_their_alias_and_results_are_cached():
+    async def main():
+        async with FakeAniList() as fake:
+            client = AniListClient(fake.url)
+            try:
+                found, missing = await asyncio.gather(_fetch_media(client, 21), _fetch_media(client, 999999))
+                assert found["id"] == 21 and missing is None
+                # Cache par sélection : la fiche trouvée ne repart pas, l'introuvable si
+                again, missing = await asyncio.gather(_fetch_media(client, 21), _fetch_media(client, 999999))
+            finally:
+                await client.close()
+            assert again == found and missing is None
+            assert fake.stats["requests"] == 2 and client.batcher.items == 3
+
+    asyncio.run(main())
+
+
+def test_duplicate_lookups_in_a_window_are_sent_once():
+    async def main():
+        async with FakeAniList() as fake:
+            client = AniListClient(fake.url)
+            try:
+                results = await asyncio.gather(*(_fetch_media(client, 21) for _ in range(3)), _fetch_media(client, 1))
+            finally:
+                await client.close()
+            assert [r["id"] for r in results] == [21, 21, 21, 1]
+            assert client.batcher.items == 2 and client.coalesced == 2
+
+    asyncio.run(main())
+
+
+# ----------------- FakeAniList : débit et pannes -----------------
+
+def test_client_waits_out_a_429_and_retries():
+    async def main():
+        async with FakeAniList(throttle_rate=1.0) as fake:
+            client = AniListClient(fake.url)
+            try:
+                task = asyncio.create_task(client.query(QUERY, {"id": 21}, cache=False))
+                while not fake.stats["status"][429]:
+                    await asyncio.sleep(0.01)
+                fake.throttle_rate = 0.0
+                result = await asyncio.wait_for(task, 5)
+            finally:
+                await client.close()
+            assert result["data"]["Media"]["id"] == 21
+            assert client.limiter.throttled == 1
+            assert fake.stats["status"][429] == 1 and fake.stats["status"][200] == 1
+            assert client.breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(main())
+
+
+def test_outage_serves_cached_responses_then_recovers():
+    async def main():
+        async with FakeAniList() as fake:
+            client = AniListClient(fake.url, timeout=0.3, failure_threshold=2, reset_timeout=0.2)
+            try:
+                cached = await client.query(QUERY, {"id": 21})
+                key = request_key(QUERY, {"id": 21})
+                client.cache.set(key, cached, -10, -5)
+
+                # Pas de réponse : timeout, puis 503 ; le disjoncteur s'ouvre au second échec
+                fake.outage = "hang"
+                assert await client.query(QUERY, {"id": 16498}) == {}
+                fake.outage = "down"
+                assert await client.query(QUERY, {"id": 16498}) == {}
+                assert client.breaker.state == CircuitBreaker.OPEN
+
+                sent = fake.stats["requests"]
+                stale = await client.query(QUERY, {"id": 21})
+                assert is_stale(stale) and stale == cached
+                assert fake.stats["requests"] == sent
+
+                fake.outage = None
+                await asyncio.sleep(0.25)
+                fresh = await client.query(QUERY, {"id": 21})
+                assert not is_stale(fresh) and fresh["data"] == cached["data"]
+                assert client.breaker.state == CircuitBreaker.CLOSED
+            finally:
+                fake.outage = None
+                await client.close()
+
+    asyncio.run(main())
+
+
+def test_control_and_stats_endpoints():
+    async def main():
+        async with FakeAniList() as fake, aiohttp.ClientSession() as session:
+            async with session.post(fake.url + "_control", json={"outage": "down", "latency": 5}) as resp:
+                assert (await resp.json())["outage"] == "down"
+            async with session.post(fake.url, json={"query": QUERY, "variables": {"id": 21}}) as resp:
+                assert resp.status == 503
+            async with session.get(fake.url + "_stats") as resp:
+                stats = await resp.json()
+            assert stats["requests"] == 1 and stats["status"] == {"503": 1}
+            assert stats["settings"]["latency"] == 5
+
+    asyncio.run(main())
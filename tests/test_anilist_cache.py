@@ -0,0 +1,159 @@
+"""Tests de modules/anilist_cache.py : cache LRU + TTL et stockage SQLite."""
+
+import asyncio
+import time
+
+from modules.anilist import AniListClient, request_key
+from modules.anilist_cache import DEFAULT_POLICY, CacheStore, ResponseCache, policy_for
+from scripts.fake_anilist import FakeAniList
+
+
+# ----------------- politiques -----------------
+
+def test_most_volatile_policy_wins():
+    stats = policy_for("query { User(name: $n) { statistics { anime { count } } } }")
+    airing = policy_for("query { Media(id: 1) { nextAiringEpisode { episode } } }")
+    media = policy_for("query { Media(id: 1) { id } }")
+    assert stats[0] < airing[0] < media[0]
+    assert policy_for("query { Viewer { id } }") == DEFAULT_POLICY
+
+
+# ----------------- ResponseCache -----------------
+
+def test_fresh_stale_and_expired_entries():
+    cache = ResponseCache()
+    cache.set("fresh", 1, ttl=60, stale=60)
+    cache.set("stale", 2, ttl=-1, stale=60)
+    cache.set("expired", 3, ttl=-10, stale=5)
+    assert cache.get("fresh") == (1, ResponseCache.FRESH)
+    assert cache.get("stale") == (2, ResponseCache.STALE)
+    assert cache.get("expired") == (None, None)
+    assert cache.get("absent") == (None, None)
+    # Une entrée expirée reste disponible pour le mode dégradé
+    value, age = cache.peek("expired")
+    assert value == 3 and age >= 10
+    assert (cache.hits, cache.stale_hits, cache.misses) == (1, 1, 2)
+
+
+def test_lru_eviction_keeps_recently_used():
+    cache = ResponseCache(maxsize=2)
+    cache.set("a", 1, 60, 60)
+    cache.set("b", 2, 60, 60)
+    cache.get("a")
+    cache.set("c", 3, 60, 60)
+    assert cache.get("b") == (None, None)
+    assert cache.get("a")[0] == 1 and cache.get("c")[0] == 3
+    assert len(cache) == 2
+
+
+def test_invalidate_and_clear():
+    cache = ResponseCache()
+    cache.set("a", 1, 60, 60)
+    cache.set("b", 2, 60, 60)
+    cache.invalidate("a")
+    assert cache.peek("a") == (None, 0.0)
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_stale_response_is_served_while_refreshing():
+    query = "query ($id: Int) { Media(id: $id) { id } }"
+
+    async def main():
+        async with FakeAniList(latency=100) as fake:
+            client = AniListClient(fake.url)
+            try:
+                first = await client.query(query, {"id": 21})
+                key = request_key(query, {"id": 21})
+                client.cache.set(key, first, ttl=-1, stale=60)
+
+                loop = asyncio.get_running_loop()
+                start = loop.time()
+                stale = await client.query(query, {"id": 21})
+                assert stale is first
+                assert loop.time() - start < 0.05  # sans attendre le réseau
+
+                while client._inflight:
+                    await asyncio.sleep(0.02)
+                assert client.cache.get(key)[1] == ResponseCache.FRESH
+                assert fake.stats["requests"] == 2
+            finally:
+                await client.close()
+
+    asyncio.run(main())
+
+
+# ----------------- CacheStore -----------------
+
+def test_cache_survives_a_restart(tmp_path):
+    path = str(tmp_path / "anilist_cache.db")
+
+    async def main():
+        cache = ResponseCache(store=CacheStore(path))
+        cache.set("a", {"data": {"x": 1}}, 60, 60)
+        cache.set("b", [1, 2], -1, 60)
+        await cache.flush()
+        assert cache.metrics()["pending"] == 0
+
+        reloaded = ResponseCache(store=CacheStore(path))
+        assert await reloaded.load() == 2
+        assert reloaded.get("a") == ({"data": {"x": 1}}, ResponseCache.FRESH)
+        assert reloaded.get("b") == ([1, 2], ResponseCache.STALE)
+
+    asyncio.run(main())
+
+
+def test_dirty_entries_evicted_before_flush_are_written(tmp_path):
+    path = str(tmp_path / "anilist_cache.db")
+
+    async def main():
+        cache = ResponseCache(maxsize=2, store=CacheStore(path))
+        for i in range(5):
+            cache.set(str(i), i, 60, 60)
+        assert len(cache) == 2 and cache.metrics()["pending"] == 5
+        await cache.flush()
+        reloaded = ResponseCache(maxsize=10, store=CacheStore(path))
+        assert await reloaded.load() == 5
+        assert [reloaded.get(str(i))[0] for i in range(5)] == list(range(5))
+
+    asyncio.run(main())
+
+
+def test_invalidated_entries_are_removed_from_disk(tmp_path):
+    path = str(tmp_path / "anilist_cache.db")
+
+    async def main():
+        cache = ResponseCache(maxsize=1, store=CacheStore(path))
+        cache.set("a", 1, 60, 60)
+        cache.set("b", 2, 60, 60)  # "a" évincée avant d'être écrite
+        cache.invalidate("a")
+        await cache.flush()
+        cache.invalidate("b")
+        await cache.flush()
+        reloaded = ResponseCache(store=CacheStore(path))
+        assert await reloaded.load() == 0
+
+    asyncio.run(main())
+
+
+def test_expired_rows_are_kept_for_the_retention_period(tmp_path):
+    store = CacheStore(str(tmp_path / "anilist_cache.db"), retention=100)
+    now = time.time()
+    store.write(
+        [("recent", 1, now - 60, now - 50), ("old", 2, now - 300, now - 200), ("live", 3, now + 10, now + 20)],
+        [],
+        [],
+    )
+    assert sorted(key for key, *_ in store.load(10)) == ["live", "recent"]
+
+
+def test_size_limit_drops_least_recently_used_rows(tmp_path):
+    store = CacheStore(str(tmp_path / "anilist_cache.db"), max_rows=2)
+    now = time.time()
+    for key in "ab":
+        store.write([(key, key, now + 60, now + 120)], [], [])
+        time.sleep(0.01)
+    store.write([], ["a"], [])  # "a" utilisée plus récemment que "b"
+    time.sleep(0.01)
+    store.write([("c", "c", now + 60, now + 120)], [], [])
+    assert sorted(key for key, *_ in store.load(10)) == ["a", "c"]
@@ -0,0 +1,65 @@
+"""Tests de modules/codec.py : formats d'écriture et relecture."""
+
+import json
+
+import pytest
+
+from modules import codec
+
+
+def test_packed_round_trip_scores():
+    data = {"123456789012345678": 42, "1": -7, "18446744073709551615": 0}
+    raw = codec.encode(data, "packed")
+    assert isinstance(raw, bytes) and raw.startswith(codec.MAGIC)
+    assert codec.detect(raw) == "packed"
+    assert codec.decode(raw) == data
+
+
+def test_packed_round_trip_fixed_fields():
+    data = {"10": {"level": 3, "xp": 250}, "11": {"level": 0, "xp": 5}}
+    assert codec.decode(codec.encode(data, "packed")) == data
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"01": 1},                                   # ID non canonique
+        {"abc": 1},                                  # clé non numérique
+        {"1": 1.5},                                  # valeur non entière
+        {"1": {"level": 1}, "2": {"xp": 2}},         # champs différents
+        {"1": {"level": "3"}},                       # champ non entier
+        {"1": True},                                 # bool n'est pas int ici
+        {},
+        [1, 2],
+    ],
+)
+def test_packed_falls_back_to_compact_json(data):
+    raw = codec.encode(data, "packed")
+    assert isinstance(raw, str)
+    assert raw == json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    assert codec.decode(raw.encode("utf-8")) == data
+
+
+def test_snapshot_then_finish_matches_indented_json():
+    data = {"1": {"é": [1, 2]}, "2": "x"}
+    for name in codec.CODECS:
+        assert codec.finish(codec.snapshot(data, name), name) == codec.encode(data, name)
+
+
+def test_truncated_packed_is_rejected():
+    raw = codec.encode({"1": 1, "2": 2}, "packed")
+    with pytest.raises(ValueError):
+        codec.decode(raw[:-3])
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError):
+        codec.encode({}, "xml")
+
+
+def test_read_file_detects_format(tmp_path):
+    for name in codec.CODECS:
+        path = tmp_path / f"data.{name}"
+        raw = codec.encode({"5": 9}, name)
+        path.write_bytes(raw if isinstance(raw, bytes) else raw.encode("utf-8"))
+        assert codec.read_file(str(path)) == {"5": 9}
@@ -0,0 +1,91 @@
+"""Tests des gains d'XP de modules/core.py : lots de gains et courbe de niveaux."""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("discord")
+core = pytest.importorskip("modules.core")
+
+from modules.store import DataStore  # noqa: E402
+
+
+@pytest.fixture
+def files(tmp_path, monkeypatch):
+    """Store neuf sur des fichiers temporaires à la place de ceux de ``data/``."""
+    paths = {name: str(tmp_path / f"{name.lower()}.json") for name in ("LEVELS", "QUIZ_SCORES", "MINI_SCORES")}
+    for name, path in paths.items():
+        monkeypatch.setattr(core.FileConfig, name, path)
+    monkeypatch.setattr(core, "XP_FILES", (paths["LEVELS"], paths["QUIZ_SCORES"], paths["MINI_SCORES"]))
+    monkeypatch.setattr(core, "store", DataStore(flush_delay=60))
+    return paths
+
+
+class Channel:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, text):
+        self.sent.append(text)
+
+
+# ----------------- courbe de niveaux -----------------
+
+def _naive_level(total):
+    level = 0
+    while total >= core.xp_for_next_level(level):
+        total -= core.xp_for_next_level(level)
+        level += 1
+    return level, total
+
+
+def test_bisection_matches_the_level_loop():
+    for total in (0, 1, 49, 50, 51, 161, 162, 10_000, 123_456, 9_876_543):
+        assert core.level_for_total_xp(total) == _naive_level(total)
+    for level in range(0, 200, 7):
+        assert core.level_for_total_xp(core.total_xp(level, 0)) == (level, 0)
+        assert core.CUMULATIVE_XP[level + 1] - core.CUMULATIVE_XP[level] == core.xp_for_next_level(level)
+
+
+def test_recompute_levels_moves_players_to_the_new_curve():
+    old_table = [0, 10, 30, 60, 100]
+    levels = {"a": {"level": 4, "xp": 5}, "b": {"level": 1, "xp": 0}, "c": {"level": 0, "xp": 3}}
+    assert core.recompute_levels(levels, old_table) == 2  # "c" reste au niveau 0
+    assert levels["a"] == {"level": 2, "xp": 105 - core.CUMULATIVE_XP[2]}
+    assert levels["b"] == {"level": 0, "xp": 10} and levels["c"] == {"level": 0, "xp": 3}
+    # Courbe inchangée : rien à corriger
+    assert core.recompute_levels(levels) == 0
+
+
+# ----------------- lots de gains -----------------
+
+def test_batch_sums_xp_scores_and_mini_games(files):
+    changes = core.apply_xp_events([
+        core.XpEvent(1, 30, "duel", score=1),
+        core.XpEvent(2, 10),
+        core.XpEvent(1, 30, "duel", score=2),
+    ])
+    assert [(c.user_id, c.old_level, c.new_level) for c in changes] == [(1, 0, 1), (2, 0, 0)]
+    assert core.store.get(files["LEVELS"]) == {"1": {"level": 1, "xp": 10}, "2": {"level": 0, "xp": 10}}
+    assert core.store.get(files["QUIZ_SCORES"]) == {"1": 3}
+    assert core.store.get(files["MINI_SCORES"]) == {"1": {"duel": 2}}
+
+
+def test_zero_xp_only_updates_the_quiz_score(files):
+    changes = core.apply_xp_events([core.XpEvent(7, 0, score=-1), core.XpEvent(8, 5, score=2)])
+    assert [c.user_id for c in changes] == [8]
+    assert "7" not in core.store.get(files["LEVELS"])
+    assert core.store.get(files["QUIZ_SCORES"]) == {"7": 0, "8": 2}
+
+
+def test_award_xp_announces_promotions(files):
+    channel = Channel()
+    total = core.total_xp(3, 0)
+
+    async def main():
+        await core.award_xp(channel, [core.XpEvent(1, total), core.XpEvent(2, 1)])
+        return await core.add_xp(None, channel, 3, 0)
+
+    unchanged = asyncio.run(main())
+    assert len(channel.sent) == 1 and "<@1>" in channel.sent[0] and "<@2>" not in channel.sent[0]
+    assert unchanged["leveled"] is False and unchanged["new_level"] == 0
@@ -0,0 +1,101 @@
+"""Tests de modules/dedupe.py : seaux journaliers, expiration, import de l'ancien format."""
+
+import asyncio
+import json
+import os
+import time
+
+from modules.dedupe import DAY, DedupeStore, _bucket_name, _day
+
+
+def test_keys_go_to_the_bucket_of_their_day(tmp_path):
+    path = str(tmp_path / "sent_alerts")
+    now = time.time()
+    store = DedupeStore(path, ttl_days=3)
+
+    async def main():
+        await store.add("a|1|30img", at=now)
+        await store.add("b|2|0img", at=now - DAY)
+        await store.add("a|1|30img", at=now)  # déjà connue : une ligne de plus, même jour
+
+    asyncio.run(main())
+    assert "a|1|30img" in store and store.seen("b|2|0img") and "c" not in store
+    assert sorted(os.listdir(path)) == sorted([_bucket_name(_day(now)), _bucket_name(_day(now) - 1)])
+    assert store.metrics()["keys"] == 2
+
+
+def test_expired_buckets_are_dropped_whole(tmp_path):
+    path = str(tmp_path / "sent_alerts")
+    now = time.time()
+    store = DedupeStore(path, ttl_days=2)
+
+    async def main():
+        for i in range(5):
+            await store.add(f"old{i}", at=now - 5 * DAY)
+        await store.add("recent", at=now)
+        assert not store.seen("old0")  # expirée même avant le passage de refresh
+        return await store.refresh()
+
+    assert asyncio.run(main()) == 5
+    assert len(store) == 1 and store.metrics()["expired"] == 5
+    assert os.listdir(path) == [_bucket_name(_day(now))]
+
+
+def test_refresh_reads_other_instances_and_skips_torn_lines(tmp_path):
+    path = str(tmp_path / "sent_alerts")
+    first, second = DedupeStore(path), DedupeStore(path)
+
+    async def main():
+        await first.refresh()
+        await second.add("x")
+        bucket = os.path.join(path, _bucket_name(_day(time.time())))
+        with open(bucket, "a", encoding="utf-8") as f:
+            f.write('"y"\n"z')  # "z" : ligne en cours d'écriture
+        await first.refresh()
+        assert "x" in first and "y" in first and "z" not in first
+        with open(bucket, "a", encoding="utf-8") as f:
+            f.write('"\n')
+        await first.refresh()
+        assert "z" in first
+
+    asyncio.run(main())
+
+
+def test_legacy_file_is_imported_once(tmp_path):
+    path = str(tmp_path / "sent_alerts")
+    legacy = str(tmp_path / "sent_alerts.json")
+    now = time.time()
+    with open(legacy, "w", encoding="utf-8") as f:
+        json.dump({"new": {"at": now - DAY}, "old": {"at": now - 30 * DAY}, "bad": "x"}, f)
+
+    async def main():
+        store = DedupeStore(path, ttl_days=14, legacy=legacy)
+        await store.refresh()
+        return store
+
+    store = asyncio.run(main())
+    assert "new" in store and "old" not in store and "bad" not in store
+    os.remove(legacy)
+    assert "new" in DedupeStore(path, legacy=legacy)  # relu depuis les seaux
+
+
+# ----------------- MP du tracker -----------------
+
+def test_tracker_dm_keys_survive_a_restart_and_are_shared(tmp_path):
+    path = str(tmp_path / "sent_alerts")
+    dm = "track|42|Frieren|12|30"  # track|user_id|titre|épisode|minutes (cogs/tracker.py)
+
+    async def main():
+        bot = DedupeStore(path)
+        other = DedupeStore(path)  # deuxième instance sur le même data/
+        await other.refresh()
+        await bot.add(dm)
+        await bot.add("Frieren|12|30img")  # alerte de salon du même épisode
+        assert dm not in other
+        await other.refresh()
+        assert dm in other
+
+    asyncio.run(main())
+    restarted = DedupeStore(path)
+    assert dm in restarted and "track|43|Frieren|12|30" not in restarted
+    assert restarted.metrics()["keys"] == 2
@@ -0,0 +1,46 @@
+"""Tests de modules/indexes.py : index inversés tenus à jour par les observateurs du store."""
+
+from modules.indexes import InvertedIndex
+from modules.store import DataStore
+
+
+def _tracker(tmp_path):
+    store = DataStore(flush_delay=60)
+    path = str(tmp_path / "anitracker.json")
+    return store, path, InvertedIndex(store, path, lambda titles: map(str, titles))
+
+
+def test_index_groups_users_by_term(tmp_path):
+    store, path, index = _tracker(tmp_path)
+    store.set(path, {"1": ["A", "B"], "2": ["B"]})
+    assert index.users("B") == {"1", "2"}
+    assert sorted(index.terms()) == ["A", "B"]
+    assert "C" not in index
+
+
+def test_key_changes_update_the_index_in_place(tmp_path):
+    store, path, index = _tracker(tmp_path)
+    store.set(path, {"1": ["A"], "2": ["A"]})
+    index.terms()
+    data = store.get(path)
+    data["1"] = ["C"]
+    del data["2"]
+    store.mark_dirty(path, "1", "2")
+    assert dict(index.items()) == {"C": {"1"}}
+    assert index.rebuilds == 1
+
+
+def test_full_replacement_rebuilds(tmp_path):
+    store, path, index = _tracker(tmp_path)
+    store.set(path, {"1": ["A"]})
+    index.terms()
+    store.set(path, {"2": ["B"]})
+    assert index.terms() == ["B"]
+    assert index.rebuilds == 2
+
+
+def test_returned_sets_are_copies(tmp_path):
+    store, path, index = _tracker(tmp_path)
+    store.set(path, {"1": ["A"]})
+    index.users("A").add("intrus")
+    assert index.users("A") == {"1"}
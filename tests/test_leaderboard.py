@@ -0,0 +1,84 @@
+"""Tests de modules/leaderboard.py : ex æquo, mises à jour incrémentales, moteur SQLite."""
+
+import asyncio
+import random
+
+import pytest
+
+from modules.leaderboard import Leaderboards, SortedBoard
+from modules.sqlite_store import LEVELS, MINI_SCORES, QUIZ_SCORES, SqliteBackend
+from modules.store import DataStore
+
+
+def test_sorted_board_ties_share_rank():
+    board = SortedBoard()
+    for uid, score in (("b", 5), ("a", 5), ("c", 9), ("d", 0), ("e", 1)):
+        board.update(uid, score)
+    assert board.top(10) == [("c", 9), ("a", 5), ("b", 5), ("e", 1)]
+    assert [board.rank(uid) for uid in "cabe"] == [1, 2, 2, 4]
+    assert board.rank("d") is None
+    board.update("c", None)
+    assert board.rank("a") == 1 and len(board) == 3
+
+
+def _build(tmp_path, sql):
+    paths = [str(tmp_path / name) for name in ("levels.json", "quiz.json", "mini.json")]
+    store = DataStore(flush_delay=60)
+    if sql:
+        db = SqliteBackend(str(tmp_path / "bot.db"), dict(zip(paths, (LEVELS, QUIZ_SCORES, MINI_SCORES))))
+        store.mount(db, *paths)
+    boards = Leaderboards(store)
+    boards.register("quiz", paths[1], lambda v: int(v or 0), columns=("score",))
+    boards.register("xp", paths[0], lambda v: v["level"] * 1000 + v["xp"], columns=("level", "xp"))
+    boards.register_group("mini", paths[2], lambda games: games.items())
+    return store, boards, paths
+
+
+def test_boards_follow_store_changes(tmp_path):
+    store, boards, (_, quiz, _) = _build(tmp_path, sql=False)
+    store.get(quiz, {}).update({"1": 3, "2": 7})
+    store.mark_dirty(quiz, "1", "2")
+    assert asyncio.run(boards.top("quiz")) == [("2", 7), ("1", 3)]
+    store.get(quiz)["1"] = 8
+    store.mark_dirty(quiz, "1")
+    assert asyncio.run(boards.rank("quiz", 1)) == 1 and boards.rebuilds == 1
+    store.set(quiz, {"3": 1})
+    assert asyncio.run(boards.top("quiz")) == [("3", 1)] and boards.rebuilds == 2
+
+
+def test_same_path_cannot_feed_two_sources(tmp_path):
+    store, boards, (_, quiz, _) = _build(tmp_path, sql=False)
+    with pytest.raises(ValueError):
+        boards.register("other", quiz, int)
+
+
+def test_sqlite_and_memory_agree(tmp_path):
+    (tmp_path / "memory").mkdir()
+    (tmp_path / "sqlite").mkdir()
+    memory = _build(tmp_path / "memory", sql=False)
+    sqlite = _build(tmp_path / "sqlite", sql=True)
+    rng = random.Random(3)
+
+    async def main():
+        # Sur la boucle, les modifications restent en attente : la lecture SQL les écrit d'abord
+        for step in range(200):
+            uid = str(rng.randint(1, 30))
+            values = (
+                {"level": rng.randint(0, 3), "xp": rng.randint(0, 999)},
+                rng.randint(0, 6),
+                {"a": rng.randint(0, 4)},
+            )
+            for store, _, paths in (memory, sqlite):
+                for path, value in zip(paths, values):
+                    store.get(path, {})[uid] = value.copy() if isinstance(value, dict) else value
+                    store.mark_dirty(path, uid)
+            if step % 40 == 0:
+                for name in ("quiz", "xp", "mini:a"):
+                    assert await memory[1].top(name, 10) == await sqlite[1].top(name, 10)
+                    for user in map(str, range(1, 31)):
+                        assert await memory[1].rank(name, user) == await sqlite[1].rank(name, user)
+                assert not sqlite[0].is_dirty()
+        for store, _, _ in (memory, sqlite):
+            store.close()
+
+    asyncio.run(main())
@@ -0,0 +1,142 @@
+"""Tests de modules/medialist.py : miroir incrémental des listes AniList."""
+
+import asyncio
+import json
+
+from modules.medialist import MediaListMirror
+
+
+class Lists:
+    """Client minimal : sert ``Page.mediaList`` trié par ``updatedAt`` décroissant."""
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.pages = []
+        self.down = False
+
+    async def query(self, query, variables, cache=True):
+        self.pages.append((variables["page"], variables["perPage"]))
+        if self.down:
+            return {}
+        items = sorted(self.entries.values(), key=lambda e: -e["updatedAt"])
+        page, per_page = variables["page"], variables["perPage"]
+        return {"data": {"Page": {
+            "pageInfo": {"hasNextPage": page * per_page < len(items)},
+            "mediaList": items[(page - 1) * per_page:page * per_page],
+        }}}
+
+
+def _entry(media_id, updated, status="CURRENT"):
+    media = {"id": media_id, "title": {"romaji": f"Anime {media_id}"}, "nextAiringEpisode": None}
+    return {"mediaId": media_id, "status": status, "updatedAt": updated, "media": media}
+
+
+def _age(mirror, username, seconds=60):
+    """Vieillit la copie d'un utilisateur (sinon refresh() la juge actualisée à l'instant)."""
+    mirror._users[username]["synced_at"] -= seconds
+
+
+def _lists(count):
+    return Lists({i: _entry(i, 1000 + i, "CURRENT" if i % 2 else "COMPLETED") for i in range(1, count + 1)})
+
+
+def test_first_read_loads_the_whole_list():
+    client = _lists(120)
+    mirror = MediaListMirror(client)
+
+    async def main():
+        current = await mirror.entries("Alice", {"CURRENT"})
+        again = await mirror.entries("alice")
+        return current, again
+
+    current, everything = asyncio.run(main())
+    assert len(current) == 60 and len(everything) == 120
+    assert client.pages == [(1, 50), (2, 50), (3, 50)]  # la seconde lecture vient du miroir
+    assert sorted(mirror.media_ids("ALICE")) == list(range(1, 121))
+
+
+def test_incremental_refresh_stops_at_the_first_known_entry():
+    client = _lists(120)
+    mirror = MediaListMirror(client)
+
+    async def main():
+        await mirror.refresh("alice")
+        _age(mirror, "alice")
+        client.pages.clear()
+        client.entries[5] = _entry(5, 5000, "COMPLETED")
+        client.entries[500] = _entry(500, 5001)
+        received = await mirror.refresh("alice", full=False)
+        return received, await mirror.entries("alice")
+
+    received, entries = asyncio.run(main())
+    # Les deux entrées modifiées + celle qui a fixé max_updated (>= since)
+    assert received == 3 and client.pages == [(1, 10)]
+    by_id = {e["mediaId"]: e for e in entries}
+    assert by_id[5]["status"] == "COMPLETED" and 500 in by_id and len(by_id) == 121
+
+
+def test_deletions_need_a_full_refresh():
+    client = _lists(10)
+    mirror = MediaListMirror(client, full_every=3600)
+
+    async def main():
+        await mirror.refresh("alice")
+        del client.entries[3]
+        _age(mirror, "alice")
+        assert await mirror.refresh("alice", full=False) == 1
+        assert 3 in mirror.media_ids("alice")
+        await mirror.refresh("alice", full=True)
+        assert 3 not in mirror.media_ids("alice")
+
+    asyncio.run(main())
+
+
+def test_failed_refresh_keeps_the_copy():
+    client = _lists(10)
+    mirror = MediaListMirror(client, ttl=0)
+
+    async def main():
+        await mirror.refresh("alice")
+        client.down = True
+        assert await mirror.refresh("alice", full=True) == 0
+        return await mirror.entries("alice")
+
+    assert len(asyncio.run(main())) == 10
+
+
+def test_persistence_round_trip(tmp_path):
+    path = str(tmp_path / "media_lists.json")
+    client = _lists(10)
+
+    async def main():
+        mirror = MediaListMirror(client, path)
+        await mirror.refresh("alice")
+        await mirror.flush()
+        reloaded = MediaListMirror(client, path)
+        assert await reloaded.load() == 1
+        assert sorted(reloaded.media_ids("alice")) == list(range(1, 11))
+        mirror.forget("Alice")
+        await mirror.flush()
+        assert await MediaListMirror(client, path).load() == 0
+
+    asyncio.run(main())
+
+
+def test_copy_without_next_airing_is_fully_reloaded(tmp_path):
+    path = str(tmp_path / "media_lists.json")
+    old = {"alice": {"synced_at": 0, "full_at": 9e12, "max_updated": 1010, "entries": {
+        "1": {"mediaId": 1, "status": "CURRENT", "updatedAt": 1001, "media": {"id": 1}},
+    }}}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(old, f)
+    client = _lists(3)
+
+    async def main():
+        mirror = MediaListMirror(client, path)
+        await mirror.load()
+        entries = await mirror.entries("alice")
+        return entries
+
+    entries = asyncio.run(main())
+    assert client.pages == [(1, 50)]
+    assert all("nextAiringEpisode" in e["media"] for e in entries) and len(entries) == 3
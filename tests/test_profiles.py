@@ -0,0 +1,63 @@
+"""Tests des profils joueurs de modules/core.py : cache LRU et invalidation."""
+
+from collections import OrderedDict
+
+import pytest
+
+pytest.importorskip("discord")
+core = pytest.importorskip("modules.core")
+
+from modules.store import DataStore, SharedJournalBackend  # noqa: E402
+
+
+class Polls(SharedJournalBackend):
+    """Moteur partagé qui compte ses vérifications (``stat``)."""
+
+    polls = 0
+
+    def poll(self, path):
+        Polls.polls += 1
+        return super().poll(path)
+
+
+def _use_store(tmp_path, monkeypatch, store):
+    names = ("LEVELS", "QUIZ_SCORES", "MINI_SCORES", "STREAKS")
+    paths = tuple(str(tmp_path / f"{name.lower()}.json") for name in names)
+    for name, path in zip(names, paths):
+        monkeypatch.setattr(core.FileConfig, name, path)
+        store.add_listener(path, core._invalidate_profiles)
+    monkeypatch.setattr(core, "store", store)
+    monkeypatch.setattr(core, "_PROFILE_SOURCES", paths)
+    monkeypatch.setattr(core, "_PROFILES", OrderedDict())
+    return paths
+
+
+def test_profiles_are_cached_until_a_source_changes(tmp_path, monkeypatch):
+    levels, scores, _, _ = _use_store(tmp_path, monkeypatch, DataStore(flush_delay=60))
+    core.store.set(levels, {"1": {"level": 2, "xp": 7}})
+    core.store.set(scores, {"1": 4})
+    profile = core.get_profile(1)
+    assert (profile.level, profile.xp, profile.quiz_score) == (2, 7, 4)
+    assert core.get_profile(1) is profile
+    core.store.update(scores, ["1"], lambda d: d.__setitem__("1", 5))
+    assert core.get_profile(1).quiz_score == 5
+
+
+def test_cache_keeps_the_most_recently_used_profiles(tmp_path, monkeypatch):
+    _use_store(tmp_path, monkeypatch, DataStore(flush_delay=60))
+    monkeypatch.setattr(core, "PROFILE_CACHE_SIZE", 2)
+    first = core.get_profile(1)
+    core.get_profile(2)
+    assert core.get_profile(1) is first
+    core.get_profile(3)
+    assert list(core._PROFILES) == ["1", "3"]
+
+
+def test_shared_sources_are_polled_at_most_once_per_interval(tmp_path, monkeypatch):
+    _use_store(tmp_path, monkeypatch, DataStore(backend=Polls()))
+    monkeypatch.setattr(core, "_profiles_polled_at", 0.0)
+    core.get_profile(1)
+    Polls.polls = 0
+    for _ in range(10):
+        core.get_profile(1)
+    assert Polls.polls == 4  # une vérification par fichier source
@@ -0,0 +1,127 @@
+"""Tests de modules/sqlite_store.py : migration, écritures différentielles, classements."""
+
+import json
+
+import pytest
+
+from modules.sqlite_store import LEVELS, MINI_SCORES, QUIZ_SCORES, SqliteBackend
+from modules.store import ALL, DataStore
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return {name: str(tmp_path / f"{name}.json") for name in ("levels", "quiz", "mini")}
+
+
+@pytest.fixture
+def db(tmp_path, paths):
+    backend = SqliteBackend(
+        str(tmp_path / "bot.db"),
+        {paths["levels"]: LEVELS, paths["quiz"]: QUIZ_SCORES, paths["mini"]: MINI_SCORES},
+    )
+    yield backend
+    backend.close()
+
+
+def _rows(db, table):
+    with db._lock:
+        return dict(db._conn.execute(f"SELECT user_id, value FROM {table}").fetchall())
+
+
+def test_migration_imports_json_once(db, paths):
+    with open(paths["quiz"], "w", encoding="utf-8") as f:
+        json.dump({"1": 3, 2: 5}, f)
+    assert db.migrate(paths["quiz"]) == 2
+    assert db.load(paths["quiz"], {}) == {"1": 3, "2": 5}
+    with open(paths["quiz"], "w", encoding="utf-8") as f:
+        json.dump({"9": 9}, f)
+    assert db.migrate(paths["quiz"]) == 0
+    assert db.load(paths["quiz"], {}) == {"1": 3, "2": 5}
+
+
+def test_migration_ignores_missing_or_invalid_file(db, paths):
+    assert db.migrate(paths["levels"]) == 0
+    with open(paths["quiz"], "w", encoding="utf-8") as f:
+        f.write("[1, 2]")
+    assert db.migrate(paths["quiz"]) == 0
+
+
+def test_snapshot_only_contains_changed_rows(db, paths):
+    path = paths["levels"]
+    data = {"1": {"level": 1, "xp": 10}, "2": {"level": 2, "xp": 20}}
+    db.load(path, {})
+    db.write(path, db.snapshot(path, data, {ALL}))
+
+    data["1"]["xp"] = 11
+    replace, upserts, deletes = db.snapshot(path, data, {ALL})
+    assert not replace and [key for key, _, _ in upserts] == ["1"] and deletes == []
+
+    del data["2"]
+    replace, upserts, deletes = db.snapshot(path, data, {"2"})
+    assert upserts == [] and deletes == ["2"]
+
+
+def test_failed_write_rewrites_whole_table(db, paths):
+    path = paths["quiz"]
+    db.load(path, {})
+    db.write(path, db.snapshot(path, {"1": 1}, {"1"}))
+    db.failed(path)
+    replace, upserts, _ = db.snapshot(path, {"1": 1, "2": 2}, {"2"})
+    assert replace and sorted(key for key, _, _ in upserts) == ["1", "2"]
+
+
+def test_store_round_trip(db, paths, tmp_path):
+    store = DataStore(flush_delay=60)
+    store.mount(db, *paths.values())
+    store.get(paths["mini"], {})["7"] = {"a": 2, "b": 1}
+    store.mark_dirty(paths["mini"], "7")
+    store.get(paths["levels"], {})["7"] = {"level": 3, "xp": 5}
+    store.mark_dirty(paths["levels"], "7")
+    assert _rows(db, "mini_scores") == {"7": '{"a":2,"b":1}'}
+
+    reopened = SqliteBackend(db.path, db.tables)
+    try:
+        assert reopened.load(paths["levels"], {}) == {"7": {"level": 3, "xp": 5}}
+        assert reopened.load(paths["mini"], {}) == {"7": {"a": 2, "b": 1}}
+    finally:
+        reopened.close()
+
+
+def _fill(db, path, data):
+    db.load(path, {})
+    db.write(path, db.snapshot(path, data, {ALL}))
+
+
+def test_top_and_rank_share_ties_and_skip_zeros(db, paths):
+    path = paths["quiz"]
+    _fill(db, path, {"1": 5, "2": 9, "3": 5, "4": 0, "5": 1})
+    assert db.top(path, "score", limit=10) == [("2", 9), ("1", 5), ("3", 5), ("5", 1)]
+    assert [db.rank(path, uid, "score") for uid in ("2", "1", "3", "5")] == [1, 2, 2, 4]
+    assert db.rank(path, "4", "score") is None
+    assert db.rank(path, "404", "score") is None
+
+
+def test_rank_on_several_columns(db, paths):
+    path = paths["levels"]
+    _fill(db, path, {
+        "1": {"level": 2, "xp": 0},
+        "2": {"level": 1, "xp": 900},
+        "3": {"level": 2, "xp": 0},
+        "4": {"level": 0, "xp": 0},
+    })
+    assert [uid for uid, _ in db.top(path, "level", "xp")] == ["1", "3", "2"]
+    assert db.rank(path, 2, "level", "xp") == 3
+    assert db.rank(path, 3, "level", "xp") == 1
+    assert db.rank(path, 4, "level", "xp") is None
+    with pytest.raises(ValueError):
+        db.top(path, "value")
+
+
+def test_item_rankings(db, paths):
+    path = paths["mini"]
+    _fill(db, path, {"1": {"a": 3, "b": 0}, "2": {"a": 3}, "3": {"a": 1, "b": 2}})
+    assert db.top_items(path, "a") == [("1", 3), ("2", 3), ("3", 1)]
+    assert db.top_items(path, "b") == [("3", 2)]
+    assert db.rank_item(path, "a", 2) == 1
+    assert db.rank_item(path, "a", 3) == 3
+    assert db.rank_item(path, "b", 1) is None
@@ -0,0 +1,274 @@
+"""Tests de modules/store.py : écriture différée, journal, transactions, moteur partagé."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from modules import codec
+from modules.store import DataStore, JournaledJsonBackend, JsonBackend, SharedJournalBackend
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "data.json")
+
+
+# ----------------- écriture différée -----------------
+
+def test_write_is_deferred_on_the_loop(path):
+    default = {}
+
+    async def main():
+        store = DataStore(flush_delay=60)
+        data = store.get(path, default)
+        assert data == {} and data is not default
+        data["1"] = 5
+        store.mark_dirty(path, "1")
+        assert store.is_dirty(path)
+        await store.flush_async()
+        assert not store.is_dirty(path)
+        store.close()
+
+    asyncio.run(main())
+    assert codec.read_file(path) == {"1": 5}
+
+
+def test_without_loop_writes_immediately(path):
+    store = DataStore(flush_delay=60)
+    store.get(path, {})["1"] = 5
+    store.mark_dirty(path, "1")
+    assert not store.is_dirty()
+    assert codec.read_file(path) == {"1": 5}
+
+
+def test_snapshots_are_written_in_order(path):
+    """Une écriture lente ne peut pas être doublée par un instantané plus récent."""
+    first_started = threading.Event()
+
+    class Slow(JsonBackend):
+        def write(self, p, payload):
+            if '"v":1' in payload:
+                first_started.set()
+                time.sleep(0.2)
+            super().write(p, payload)
+
+    async def main():
+        store = DataStore(flush_delay=60, backend=Slow("json-compact"))
+        store.set(path, {"v": 1})
+        first = asyncio.create_task(store.flush_async())
+        await asyncio.to_thread(first_started.wait, 2)
+        store.set(path, {"v": 2})
+        await asyncio.gather(first, store.flush_async())
+
+    asyncio.run(main())
+    assert codec.read_file(path) == {"v": 2}
+
+
+def test_close_does_not_wait_forever_for_an_abandoned_snapshot(path):
+    async def main():
+        store = DataStore(flush_delay=60)
+        store.get(path, {})["k"] = 1
+        store.mark_dirty(path, "k")
+        store._snapshot()  # instantané dont l'écriture ne sera jamais lancée
+        start = time.monotonic()
+        store.close(timeout=0.3)
+        assert time.monotonic() - start < 2
+
+    asyncio.run(main())
+    assert codec.read_file(path) == {"k": 1}
+
+
+def test_cancelled_flush_is_written_later(path):
+    async def main():
+        store = DataStore(flush_delay=60)
+        store.get(path, {})["x"] = 1
+        store.mark_dirty(path, "x")
+        task = asyncio.create_task(store.flush_async())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0.1)
+        store.get(path)["y"] = 2
+        store.mark_dirty(path, "y")
+        await asyncio.wait_for(store.flush_async(), 2)
+
+    asyncio.run(main())
+    assert codec.read_file(path) == {"x": 1, "y": 2}
+
+
+def test_failed_write_is_retried(path):
+    class Flaky(JsonBackend):
+        calls = 0
+
+        def write(self, p, payload):
+            Flaky.calls += 1
+            if Flaky.calls == 1:
+                raise OSError("disque plein")
+            super().write(p, payload)
+
+    async def main():
+        store = DataStore(flush_delay=0.05, backend=Flaky())
+        store.get(path, {})["z"] = 1
+        store.mark_dirty(path, "z")
+        await asyncio.sleep(0.5)
+
+    asyncio.run(main())
+    assert Flaky.calls == 2
+    assert codec.read_file(path) == {"z": 1}
+
+
+def test_listeners_receive_changed_keys(path):
+    store = DataStore(flush_delay=60)
+    seen = []
+    store.add_listener(path, lambda data, keys: seen.append(set(keys)))
+    store.get(path, {})["1"] = 1
+    store.mark_dirty(path, 1)
+    store.set(path, {})
+    assert seen == [{"1"}, {"*"}]
+
+
+# ----------------- journal -----------------
+
+def test_journal_is_replayed_on_load(path):
+    store = DataStore(flush_delay=60, backend=JournaledJsonBackend(compact_every=100))
+    store.set(path, {"a": 1, "b": 2})
+    store.flush()
+    data = store.get(path)
+    data["a"] = 10
+    del data["b"]
+    data["c"] = 3
+    store.mark_dirty(path, "a", "b", "c")
+    store.flush()
+    assert codec.read_file(path) == {"a": 1, "b": 2}  # seul le journal a changé
+    reloaded = JournaledJsonBackend().load(path, {})
+    assert reloaded == {"a": 10, "c": 3}
+
+
+def test_torn_journal_line_is_ignored_then_compacted(path):
+    backend = JournaledJsonBackend(compact_every=100)
+    store = DataStore(flush_delay=60, backend=backend)
+    store.set(path, {"a": 1})
+    store.flush()
+    store.get(path)["a"] = 2
+    store.mark_dirty(path, "a")
+    store.flush()
+    with open(backend.journal_path(path), "a", encoding="utf-8") as f:
+        f.write('{"k":"a","v":')
+    fresh = DataStore(flush_delay=60, backend=JournaledJsonBackend(compact_every=100))
+    assert fresh.get(path) == {"a": 2}
+    fresh.get(path)["b"] = 1
+    fresh.mark_dirty(path, "b")
+    fresh.flush()
+    assert codec.read_file(path) == {"a": 2, "b": 1}
+
+
+def test_journal_compacts_after_limit(path):
+    backend = JournaledJsonBackend(compact_every=3)
+    store = DataStore(flush_delay=60, backend=backend)
+    store.set(path, {})
+    store.flush()
+    for i in range(5):
+        store.get(path)[str(i)] = i
+        store.mark_dirty(path, i)
+        store.flush()
+    assert backend.compactions >= 2
+    assert JournaledJsonBackend().load(path, {}) == {str(i): i for i in range(5)}
+
+
+# ----------------- transactions -----------------
+
+def test_transaction_commits_all_paths(tmp_path):
+    a, b = str(tmp_path / "a.json"), str(tmp_path / "b.json")
+    store = DataStore(flush_delay=60)
+    with store.transaction(a, b):
+        store.update(a, ["1"], lambda d: d.__setitem__("1", 1))
+        store.update(b, ["1"], lambda d: d.__setitem__("1", 2))
+    store.flush()
+    assert codec.read_file(a) == {"1": 1} and codec.read_file(b) == {"1": 2}
+
+
+def test_transaction_rolls_back_on_error(tmp_path):
+    a, b = str(tmp_path / "a.json"), str(tmp_path / "b.json")
+    store = DataStore(flush_delay=60)
+    store.get(a, {})["1"] = {"n": 1}
+    store.get(b, {})
+    with pytest.raises(ZeroDivisionError):
+        with store.transaction(a, b):
+            store.update(a, ["1", "2"], lambda d: (d["1"].__setitem__("n", 99), d.__setitem__("2", 0)))
+            store.update(b, ["1"], lambda d: d.__setitem__("1", 1))
+            1 / 0
+    assert store.get(a) == {"1": {"n": 1}}
+    assert store.get(b) == {}
+    assert not store.is_dirty()
+
+
+def test_nested_transaction(tmp_path):
+    a, b = str(tmp_path / "a.json"), str(tmp_path / "b.json")
+    store = DataStore(flush_delay=60)
+    with store.transaction(a, b) as outer:
+        with store.transaction(a) as inner:
+            assert inner is outer
+        with pytest.raises(RuntimeError):
+            with store.transaction(str(tmp_path / "c.json")):
+                pass
+
+
+# ----------------- moteur partagé -----------------
+
+def test_shared_update_sees_other_instance(path):
+    first = DataStore(backend=SharedJournalBackend(compact_every=3))
+    second = DataStore(backend=SharedJournalBackend(compact_every=3))
+    for i in range(5):  # traverse au moins une compaction
+        store = first if i % 2 else second
+        store.update(path, ["n"], lambda d: d.__setitem__("n", d.get("n", 0) + 1))
+    assert first.get(path)["n"] == 5
+    assert second.get(path)["n"] == 5
+
+
+def test_shared_update_callback_can_read_same_path(path):
+    store = DataStore(backend=SharedJournalBackend())
+    store.get(path, {})
+    store.update(path, ["k"], lambda d: d.__setitem__("k", len(store.get(path)) + 1))
+    assert store.get(path) == {"k": 1}
+
+
+def test_shared_refresh_runs_off_the_loop(path):
+    writer = DataStore(backend=SharedJournalBackend())
+    reader = DataStore(backend=SharedJournalBackend())
+    reader.get(path, {})
+    seen = []
+    reader.add_listener(path, lambda data, keys: seen.append(set(keys)))
+
+    async def main():
+        writer.update(path, ["a"], lambda d: d.__setitem__("a", 1))
+        assert not writer.refresh_if_changed(path)
+        assert reader.refresh_if_changed(path)
+        await asyncio.sleep(0.1)
+        assert reader.get(path) == {"a": 1}
+        assert not reader.backend.poll(path)
+
+    asyncio.run(main())
+    assert seen == [{"a"}]
+
+
+def test_shared_lock_wait_is_measured(path):
+    holder = DataStore(backend=SharedJournalBackend())
+    store = DataStore(backend=SharedJournalBackend())
+    store.get(path, {})
+    held = threading.Event()
+
+    def hold():
+        with holder.backend.locked(path):
+            held.set()
+            time.sleep(0.2)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    held.wait(2)
+    store.update(path, ["a"], lambda d: d.__setitem__("a", 1))
+    thread.join()
+    assert store.metrics()["lock_wait"] >= 0.15
+    assert "lock_wait" not in DataStore(flush_delay=60).metrics()